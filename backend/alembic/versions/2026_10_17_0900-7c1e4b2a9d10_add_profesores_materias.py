@@ -0,0 +1,32 @@
+"""Add profesores_materias eligibility table
+
+Revision ID: 7c1e4b2a9d10
+Revises: 54281c46bceb
+Create Date: 2026-10-17 09:00:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1e4b2a9d10'
+down_revision = '54281c46bceb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('profesores_materias',
+    sa.Column('id_profesor', sa.Integer(), nullable=False),
+    sa.Column('id_materia', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['id_materia'], ['materias.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['id_profesor'], ['profesores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_profesor', 'id_materia')
+    )
+    op.create_index(op.f('ix_profesores_materias_id_materia'), 'profesores_materias', ['id_materia'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_profesores_materias_id_materia'), table_name='profesores_materias')
+    op.drop_table('profesores_materias')
@@ -0,0 +1,43 @@
+"""Add generation_jobs table
+
+Revision ID: 3f8a6d2c5b71
+Revises: 7c1e4b2a9d10
+Create Date: 2026-10-17 09:30:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8a6d2c5b71'
+down_revision = '7c1e4b2a9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('generation_jobs',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('id_carrera', sa.Integer(), nullable=False),
+    sa.Column('id_usuario', sa.Integer(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED', name='jobstatusenum'), nullable=False),
+    sa.Column('progress', sa.Float(), nullable=False),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('request', sa.JSON(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('cancel_requested', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_carrera'], ['carreras.id'], ),
+    sa.ForeignKeyConstraint(['id_usuario'], ['usuarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_generation_jobs_id_carrera'), 'generation_jobs', ['id_carrera'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_generation_jobs_id_carrera'), table_name='generation_jobs')
+    op.drop_table('generation_jobs')
+    sa.Enum(name='jobstatusenum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""Add horarios_pendientes table and horarios_generados dependency indexes
+
+Revision ID: 9b4e2f7a1c38
+Revises: 3f8a6d2c5b71
+Create Date: 2026-10-17 10:00:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9b4e2f7a1c38'
+down_revision = '3f8a6d2c5b71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('horarios_pendientes',
+    sa.Column('id_grupo', sa.Integer(), nullable=False),
+    sa.Column('version_horario', sa.Integer(), nullable=False),
+    sa.Column('motivo', sa.String(length=255), nullable=True),
+    sa.Column('marcado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_grupo'], ['grupos.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_grupo', 'version_horario')
+    )
+    op.create_index(op.f('ix_horarios_generados_id_materia'), 'horarios_generados', ['id_materia'], unique=False)
+    op.create_index(op.f('ix_horarios_generados_id_profesor'), 'horarios_generados', ['id_profesor'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_horarios_generados_id_profesor'), table_name='horarios_generados')
+    op.drop_index(op.f('ix_horarios_generados_id_materia'), table_name='horarios_generados')
+    op.drop_table('horarios_pendientes')
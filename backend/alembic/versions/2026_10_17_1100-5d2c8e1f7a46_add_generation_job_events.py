@@ -0,0 +1,38 @@
+"""Add generation_job_events table and generation_jobs.accept_requested
+
+Revision ID: 5d2c8e1f7a46
+Revises: 9b4e2f7a1c38
+Create Date: 2026-10-17 11:00:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2c8e1f7a46'
+down_revision = '9b4e2f7a1c38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('generation_jobs', sa.Column('accept_requested', sa.Boolean(), nullable=False, server_default=sa.false()))
+    op.create_table('generation_job_events',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_job', sa.String(length=36), nullable=False),
+    sa.Column('tipo', sa.String(length=20), nullable=False),
+    sa.Column('datos', sa.JSON(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_job'], ['generation_jobs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_generation_job_events_id'), 'generation_job_events', ['id'], unique=False)
+    op.create_index(op.f('ix_generation_job_events_id_job'), 'generation_job_events', ['id_job'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_generation_job_events_id_job'), table_name='generation_job_events')
+    op.drop_index(op.f('ix_generation_job_events_id'), table_name='generation_job_events')
+    op.drop_table('generation_job_events')
+    op.drop_column('generation_jobs', 'accept_requested')
@@ -0,0 +1,49 @@
+"""Add solver_runs telemetry table
+
+Revision ID: 8e3b6f0d4c95
+Revises: 5d2c8e1f7a46
+Create Date: 2026-10-17 11:30:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e3b6f0d4c95'
+down_revision = '5d2c8e1f7a46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('solver_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_carrera', sa.Integer(), nullable=False),
+    sa.Column('grupo_ids', sa.JSON(), nullable=False),
+    sa.Column('version_horario', sa.Integer(), nullable=False),
+    sa.Column('engine', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('variables', sa.Integer(), nullable=False),
+    sa.Column('constraints', sa.Integer(), nullable=False),
+    sa.Column('build_time', sa.Float(), nullable=False),
+    sa.Column('solve_time', sa.Float(), nullable=False),
+    sa.Column('conflicts', sa.Integer(), nullable=False),
+    sa.Column('branches', sa.Integer(), nullable=False),
+    sa.Column('objective', sa.Float(), nullable=True),
+    sa.Column('peak_rss_kb', sa.Integer(), nullable=True),
+    sa.Column('params', sa.JSON(), nullable=False),
+    sa.Column('creado_en', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_carrera'], ['carreras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_solver_runs_creado_en'), 'solver_runs', ['creado_en'], unique=False)
+    op.create_index(op.f('ix_solver_runs_id'), 'solver_runs', ['id'], unique=False)
+    op.create_index(op.f('ix_solver_runs_id_carrera'), 'solver_runs', ['id_carrera'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_solver_runs_id_carrera'), table_name='solver_runs')
+    op.drop_index(op.f('ix_solver_runs_id'), table_name='solver_runs')
+    op.drop_index(op.f('ix_solver_runs_creado_en'), table_name='solver_runs')
+    op.drop_table('solver_runs')
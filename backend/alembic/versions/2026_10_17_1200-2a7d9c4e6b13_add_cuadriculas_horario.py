@@ -0,0 +1,46 @@
+"""Add cuadriculas_horario and grupos.turno
+
+Revision ID: 2a7d9c4e6b13
+Revises: 8e3b6f0d4c95
+Create Date: 2026-10-17 12:00:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a7d9c4e6b13'
+down_revision = '8e3b6f0d4c95'
+branch_labels = None
+depends_on = None
+
+turno_enum = sa.Enum('MATUTINO', 'VESPERTINO', name='turnoenum')
+
+
+def upgrade() -> None:
+    # create_table crea el tipo turnoenum (PostgreSQL) que después usa grupos.turno
+    op.create_table('cuadriculas_horario',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_carrera', sa.Integer(), nullable=False),
+    sa.Column('turno', turno_enum, nullable=True),
+    sa.Column('dias', sa.JSON(), nullable=False),
+    sa.Column('hora_inicio', sa.Time(), nullable=False),
+    sa.Column('hora_fin', sa.Time(), nullable=False),
+    sa.Column('duracion_bloque', sa.Integer(), nullable=False),
+    sa.Column('recesos', sa.JSON(), nullable=True),
+    sa.Column('max_horas_diarias', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['id_carrera'], ['carreras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_cuadriculas_horario_id'), 'cuadriculas_horario', ['id'], unique=False)
+    op.create_index(op.f('ix_cuadriculas_horario_id_carrera'), 'cuadriculas_horario', ['id_carrera'], unique=False)
+    op.add_column('grupos', sa.Column('turno', turno_enum, nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('grupos', 'turno')
+    op.drop_index(op.f('ix_cuadriculas_horario_id_carrera'), table_name='cuadriculas_horario')
+    op.drop_index(op.f('ix_cuadriculas_horario_id'), table_name='cuadriculas_horario')
+    op.drop_table('cuadriculas_horario')
+    turno_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,30 @@
+"""Add generation_leases
+
+Revision ID: 6c1f3a8e2d57
+Revises: 2a7d9c4e6b13
+Create Date: 2026-10-17 13:00:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1f3a8e2d57'
+down_revision = '2a7d9c4e6b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('generation_leases',
+    sa.Column('id_carrera', sa.Integer(), nullable=False),
+    sa.Column('holder', sa.String(length=36), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_carrera'], ['carreras.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id_carrera')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('generation_leases')
@@ -0,0 +1,24 @@
+"""Add generation_jobs.heartbeat_at
+
+Revision ID: 1e9a5c7b3f28
+Revises: 6c1f3a8e2d57
+Create Date: 2026-10-17 14:00:00.000000-06:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1e9a5c7b3f28'
+down_revision = '6c1f3a8e2d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('generation_jobs', sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('generation_jobs', 'heartbeat_at')
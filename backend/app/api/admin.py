@@ -1,10 +1,16 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from app.core import get_db
-from app.models import Usuario
-from app.schemas import CarreraCreate, CarreraResponse, UsuarioCreate, UsuarioResponse
-from app.services import CarreraService, UsuarioService
+from app.core import get_db, settings
+from app.models import Carrera, Usuario
+from app.schemas import (
+    CarreraCreate, CarreraResponse, UsuarioCreate, UsuarioResponse,
+    SolverRunResponse, SolverMetricsResponse, UniversityGenerationRequest, UniversityGenerationResponse
+)
+from app.services import (
+    CarreraService, UsuarioService, SolverRunService, ScheduleOptimizer, SolverParameters, CareerLease
+)
 from app.api.dependencies import require_superuser
 
 router = APIRouter(prefix="/admin", tags=["administration"])
@@ -56,3 +62,66 @@ async def create_user(
             )
     
     return user_service.create_user(user_data)
+
+@router.get("/solver-runs", response_model=List[SolverRunResponse])
+async def get_solver_runs(
+    carrera_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_superuser)
+):
+    """Últimas resoluciones de CP-SAT registradas (Solo Superusuario)"""
+    return SolverRunService(db).get_runs(carrera_id, limit)
+
+@router.get("/solver-runs/metrics", response_model=List[SolverMetricsResponse])
+async def get_solver_metrics(
+    carrera_id: Optional[int] = None,
+    desde: Optional[datetime] = None,
+    por_dia: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_superuser)
+):
+    """Agregados de las resoluciones por carrera, opcionalmente por día (Solo Superusuario)"""
+    return SolverRunService(db).get_metrics(carrera_id, desde, por_dia)
+
+@router.post("/generate-universidad", response_model=UniversityGenerationResponse)
+def generate_university_schedule(
+    request: UniversityGenerationRequest,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_superuser)
+):
+    """
+    Generar los horarios de todas las carreras sin choques de profesores entre ellas (Solo Superusuario)
+    Toma el arrendamiento de todas las carreras: espera a las generaciones en curso (409 si tardan
+    más de GENERATION_LEASE_WAIT_SECONDS) y ninguna otra inicia hasta que termine
+    """
+    lease = CareerLease([id_carrera for id_carrera, in db.query(Carrera.id)])
+    if not lease.acquire(timeout=settings.GENERATION_LEASE_WAIT_SECONDS):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Hay generaciones de horarios en curso")
+    
+    try:
+        solver_params = SolverParameters.from_settings(
+            num_search_workers=request.num_search_workers,
+            random_seed=request.random_seed
+        )
+        result = ScheduleOptimizer(db).generate_schedule_for_university(
+            time_budget=request.time_budget_seconds,
+            solver_params=solver_params,
+            num_versions=request.num_versions,
+            min_hamming_distance=request.min_hamming_distance,
+            engine=request.engine,
+            block_hours=request.block_hours,
+            symmetry_breaking=request.symmetry_breaking
+        )
+    finally:
+        lease.release()
+    
+    return UniversityGenerationResponse(
+        success=result["success"],
+        message=result["message"],
+        generated_schedules=result.get("generated_schedules", []),
+        solver_status=result.get("solver_status"),
+        diagnostics=result.get("diagnostics", []),
+        professor_conflicts=result.get("professor_conflicts", 0),
+        lns_iterations=result.get("lns_iterations", 0)
+    )
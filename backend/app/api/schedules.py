@@ -1,14 +1,19 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.core import get_db
 from app.models import Usuario
 from app.schemas import (
-    ProfesorResponse, ProfesorUpdate, MateriaResponse, 
-    ScheduleGenerationRequest, ScheduleGenerationResponse,
-    HorarioGeneradoResponse
+    ProfesorResponse, ProfesorUpdate, MateriaResponse, ProfesorMateriasUpdate,
+    ScheduleGenerationRequest, ScheduleGenerationResponse, GenerationJobResponse,
+    HorarioGeneradoResponse, HorarioPendienteResponse, CuadriculaHorarioBase, CuadriculaHorarioResponse
+)
+from app.models import JobStatusEnum, TurnoEnum
+from app.services import (
+    ProfesorService, HorarioService, ExcelImportService,
+    GenerationJobService, ScheduleDependencyService, CuadriculaHorarioService, run_coalesced_request
 )
-from app.services import ProfesorService, ScheduleOptimizer, HorarioService, ExcelImportService
 from app.api.dependencies import require_jefe_carrera_or_super, check_carrera_access
 import tempfile
 import os
@@ -46,22 +51,188 @@ async def update_profesor_availability(
     
     return profesor_service.update_profesor_availability(profesor_id, update_data.disponibilidad)
 
+@router.get("/profesor/{profesor_id}/materias", response_model=List[MateriaResponse])
+async def get_profesor_materias(
+    profesor_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Obtener materias que un profesor puede impartir"""
+    from app.models import Profesor
+    profesor = db.query(Profesor).filter(Profesor.id == profesor_id).first()
+    
+    if not profesor:
+        raise HTTPException(status_code=404, detail="Profesor no encontrado")
+    
+    check_carrera_access(current_user, profesor.id_carrera)
+    
+    profesor_service = ProfesorService(db)
+    return profesor_service.get_materias_profesor(profesor_id)
+
+@router.put("/profesor/{profesor_id}/materias", response_model=List[MateriaResponse])
+async def update_profesor_materias(
+    profesor_id: int,
+    update_data: ProfesorMateriasUpdate,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Actualizar materias que un profesor puede impartir"""
+    from app.models import Profesor, Materia
+    profesor = db.query(Profesor).filter(Profesor.id == profesor_id).first()
+    
+    if not profesor:
+        raise HTTPException(status_code=404, detail="Profesor no encontrado")
+    
+    check_carrera_access(current_user, profesor.id_carrera)
+    
+    materia_ids = set(update_data.materias)
+    materia_carreras = dict(
+        db.query(Materia.id, Materia.id_carrera).filter(Materia.id.in_(materia_ids)).all()
+    ) if materia_ids else {}
+    if len(materia_carreras) != len(materia_ids):
+        raise HTTPException(status_code=400, detail="Una o más materias no existen")
+    # Solo se pueden asignar materias de carreras a las que el usuario tiene acceso
+    for id_carrera in set(materia_carreras.values()):
+        check_carrera_access(current_user, id_carrera)
+    
+    profesor_service = ProfesorService(db)
+    return profesor_service.set_materias_profesor(profesor_id, update_data.materias)
+
 @router.post("/generate", response_model=ScheduleGenerationResponse)
-async def generate_schedule(
+def generate_schedule(
     request: ScheduleGenerationRequest,
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(require_jefe_carrera_or_super)
 ):
-    """Generar horarios para una carrera"""
+    """
+    Generar horarios para una carrera (síncrono; para trabajos largos usar /schedule/jobs)
+    Peticiones idénticas simultáneas comparten una sola generación; otra generación de la
+    misma carrera espera a que termine la actual (409 si tarda más de GENERATION_LEASE_WAIT_SECONDS)
+    """
     check_carrera_access(current_user, request.id_carrera)
     
-    optimizer = ScheduleOptimizer(db)
-    result = optimizer.generate_schedule_for_career(request.id_carrera, request.cuatrimestre)
+    result = run_coalesced_request(db, request, current_user)
+    if result.get("busy"):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=result["message"])
     
     return ScheduleGenerationResponse(
         success=result["success"],
         message=result["message"],
-        generated_schedules=result.get("generated_schedules", [])
+        generated_schedules=result.get("generated_schedules", []),
+        solver_status=result.get("solver_status"),
+        diagnostics=result.get("diagnostics", []),
+        cached_solutions=result.get("cached_solutions", 0)
+    )
+
+@router.post("/jobs", response_model=GenerationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_generation_job(
+    request: ScheduleGenerationRequest,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Encolar la generación de horarios; devuelve el trabajo para consultar su estado"""
+    check_carrera_access(current_user, request.id_carrera)
+    
+    job_service = GenerationJobService(db)
+    return job_service.create_job(request, current_user)
+
+def _get_job_or_404(job_service: GenerationJobService, job_id: str, current_user: Usuario):
+    job = job_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    
+    check_carrera_access(current_user, job.id_carrera)
+    return job
+
+@router.get("/jobs/{job_id}", response_model=GenerationJobResponse)
+async def get_generation_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Consultar estado y progreso de un trabajo de generación"""
+    return _get_job_or_404(GenerationJobService(db), job_id, current_user)
+
+@router.get("/jobs/{job_id}/result", response_model=ScheduleGenerationResponse)
+async def get_generation_job_result(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Obtener el resultado de un trabajo de generación terminado"""
+    job = _get_job_or_404(GenerationJobService(db), job_id, current_user)
+    
+    if job.result is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El trabajo no tiene resultado (estado: {job.status.value})"
+        )
+    
+    return ScheduleGenerationResponse(
+        success=job.result["success"],
+        message=job.result["message"],
+        generated_schedules=job.result.get("generated_schedules", []),
+        solver_status=job.result.get("solver_status"),
+        diagnostics=job.result.get("diagnostics", []),
+        cached_solutions=job.result.get("cached_solutions", 0)
+    )
+
+@router.post("/jobs/{job_id}/cancel", response_model=GenerationJobResponse)
+async def cancel_generation_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Cancelar un trabajo de generación pendiente o en ejecución"""
+    job_service = GenerationJobService(db)
+    job = _get_job_or_404(job_service, job_id, current_user)
+    
+    if job.status not in (JobStatusEnum.PENDING, JobStatusEnum.RUNNING):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El trabajo ya terminó (estado: {job.status.value})"
+        )
+    
+    return job_service.request_cancel(job_id)
+
+@router.post("/jobs/{job_id}/accept", response_model=GenerationJobResponse)
+async def accept_generation_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Detener un trabajo en ejecución conservando las soluciones encontradas hasta ahora"""
+    job_service = GenerationJobService(db)
+    job = _get_job_or_404(job_service, job_id, current_user)
+    
+    if job.status != JobStatusEnum.RUNNING:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El trabajo no está en ejecución (estado: {job.status.value})"
+        )
+    
+    return job_service.request_accept(job_id)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job_events(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """
+    Transmitir (Server-Sent Events) el progreso de un trabajo: eventos progreso, solucion
+    (cada solución encontrada por CP-SAT, con objetivo y tiempo) y estado (al terminar)
+    """
+    _get_job_or_404(GenerationJobService(db), job_id, current_user)
+    # La sesión de la petición solo se usa para la verificación: se cierra para no retener su
+    # conexión mientras dura la transmisión (FastAPI cierra las dependencias al terminar la respuesta)
+    db.close()
+    
+    return StreamingResponse(
+        GenerationJobService.stream_events(job_id, after=last_event_id or 0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
     )
 
 @router.get("/grupo/{grupo_id}/horario", response_model=List[HorarioGeneradoResponse])
@@ -84,6 +255,61 @@ async def get_grupo_schedule(
     
     return horario_service.get_horario_grupo(grupo_id, version)
 
+@router.get("/pendientes/{carrera_id}", response_model=List[HorarioPendienteResponse])
+async def get_horarios_pendientes(
+    carrera_id: int,
+    cuatrimestre: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Obtener horarios desactualizados por cambios (resolver con only_dirty en /generate o /jobs)"""
+    check_carrera_access(current_user, carrera_id)
+    
+    dependency_service = ScheduleDependencyService(db)
+    return dependency_service.get_pendientes(carrera_id, cuatrimestre)
+
+@router.get("/cuadriculas/{carrera_id}", response_model=List[CuadriculaHorarioResponse])
+async def get_cuadriculas(
+    carrera_id: int,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Obtener las cuadrículas de tiempo de una carrera (sin ninguna se usa la cuadrícula por defecto)"""
+    check_carrera_access(current_user, carrera_id)
+    
+    return CuadriculaHorarioService(db).get_cuadriculas(carrera_id)
+
+@router.put("/cuadriculas/{carrera_id}", response_model=CuadriculaHorarioResponse)
+async def save_cuadricula(
+    carrera_id: int,
+    cuadricula: CuadriculaHorarioBase,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Crear o reemplazar la cuadrícula de la carrera o de uno de sus turnos; marca sus horarios como pendientes"""
+    check_carrera_access(current_user, carrera_id)
+    
+    result = CuadriculaHorarioService(db).save_cuadricula(carrera_id, cuadricula)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["message"])
+    
+    return result["cuadricula"]
+
+@router.delete("/cuadriculas/{carrera_id}")
+async def delete_cuadricula(
+    carrera_id: int,
+    turno: Optional[TurnoEnum] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Eliminar la cuadrícula de la carrera (sin turno) o de un turno"""
+    check_carrera_access(current_user, carrera_id)
+    
+    if not CuadriculaHorarioService(db).delete_cuadricula(carrera_id, turno):
+        raise HTTPException(status_code=404, detail="Cuadrícula no encontrada")
+    
+    return {"message": "Cuadrícula eliminada"}
+
 @router.post("/import/profesores/{carrera_id}")
 async def import_profesores(
     carrera_id: int,
@@ -135,3 +361,29 @@ async def import_materias(
         return result
     finally:
         os.unlink(tmp_file_path)
+
+@router.post("/import/profesor-materias/{carrera_id}")
+async def import_profesor_materias(
+    carrera_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(require_jefe_carrera_or_super)
+):
+    """Importar materias que imparte cada profesor desde Excel"""
+    check_carrera_access(current_user, carrera_id)
+    
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(status_code=400, detail="Archivo debe ser formato Excel")
+    
+    # Guardar archivo temporalmente
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
+        content = await file.read()
+        tmp_file.write(content)
+        tmp_file_path = tmp_file.name
+    
+    try:
+        excel_service = ExcelImportService(db)
+        result = excel_service.import_profesor_materias_from_excel(tmp_file_path, carrera_id)
+        return result
+    finally:
+        os.unlink(tmp_file_path)
@@ -1,5 +1,6 @@
-from .models import Base, Carrera, Usuario, Profesor, Materia, Grupo, HorarioGenerado
-from .models import RolEnum, TipoProfesorEnum, DiaSemanaEnum
+from .models import Base, Carrera, Usuario, Profesor, Materia, Grupo, CuadriculaHorario, HorarioGenerado, profesores_materias
+from .models import HorarioPendiente, GenerationJob, GenerationJobEvent, GenerationLease, SolverRun
+from .models import RolEnum, TipoProfesorEnum, DiaSemanaEnum, TurnoEnum, JobStatusEnum
 
 __all__ = [
     "Base",
@@ -8,8 +9,17 @@ __all__ = [
     "Profesor",
     "Materia", 
     "Grupo",
+    "CuadriculaHorario",
     "HorarioGenerado",
+    "profesores_materias",
+    "HorarioPendiente",
+    "GenerationJob",
+    "GenerationJobEvent",
+    "GenerationLease",
+    "SolverRun",
     "RolEnum",
     "TipoProfesorEnum", 
-    "DiaSemanaEnum"
+    "DiaSemanaEnum",
+    "TurnoEnum",
+    "JobStatusEnum"
 ]
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Time, JSON, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Time, JSON, Text, Table, Float, Boolean, DateTime
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from datetime import datetime
 import enum
 
 Base = declarative_base()
@@ -21,6 +22,25 @@ class DiaSemanaEnum(enum.Enum):
     VIERNES = "Viernes"
     SABADO = "Sábado"
 
+class TurnoEnum(enum.Enum):
+    MATUTINO = "MATUTINO"
+    VESPERTINO = "VESPERTINO"
+
+class JobStatusEnum(enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+# Materias que cada profesor está habilitado para impartir
+profesores_materias = Table(
+    "profesores_materias",
+    Base.metadata,
+    Column("id_profesor", Integer, ForeignKey("profesores.id", ondelete="CASCADE"), primary_key=True),
+    Column("id_materia", Integer, ForeignKey("materias.id", ondelete="CASCADE"), primary_key=True, index=True),
+)
+
 class Carrera(Base):
     __tablename__ = "carreras"
     
@@ -32,6 +52,7 @@ class Carrera(Base):
     profesores = relationship("Profesor", back_populates="carrera")
     materias = relationship("Materia", back_populates="carrera")
     grupos = relationship("Grupo", back_populates="carrera")
+    cuadriculas = relationship("CuadriculaHorario", back_populates="carrera", cascade="all, delete-orphan")
 
 class Usuario(Base):
     __tablename__ = "usuarios"
@@ -59,6 +80,7 @@ class Profesor(Base):
     # Relaciones
     carrera = relationship("Carrera", back_populates="profesores")
     horarios = relationship("HorarioGenerado", back_populates="profesor")
+    materias = relationship("Materia", secondary=profesores_materias, back_populates="profesores")
 
 class Materia(Base):
     __tablename__ = "materias"
@@ -72,6 +94,7 @@ class Materia(Base):
     # Relaciones
     carrera = relationship("Carrera", back_populates="materias")
     horarios = relationship("HorarioGenerado", back_populates="materia")
+    profesores = relationship("Profesor", secondary=profesores_materias, back_populates="materias")
 
 class Grupo(Base):
     __tablename__ = "grupos"
@@ -80,24 +103,123 @@ class Grupo(Base):
     id_carrera = Column(Integer, ForeignKey("carreras.id"), nullable=False)
     cuatrimestre = Column(Integer, nullable=False)  # 1 al 10
     nombre_grupo = Column(String(100), nullable=True)  # Ej: "Grupo A", "Grupo B"
+    turno = Column(Enum(TurnoEnum), nullable=True)  # Elige la cuadrícula del turno (None: la de la carrera)
     
     # Relaciones
     carrera = relationship("Carrera", back_populates="grupos")
     horarios = relationship("HorarioGenerado", back_populates="grupo")
 
+class CuadriculaHorario(Base):
+    """Cuadrícula de tiempo de una carrera (turno NULL) o de uno de sus turnos"""
+    __tablename__ = "cuadriculas_horario"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    id_carrera = Column(Integer, ForeignKey("carreras.id", ondelete="CASCADE"), nullable=False, index=True)
+    turno = Column(Enum(TurnoEnum), nullable=True)
+    dias = Column(JSON, nullable=False)  # ["Lunes", "Martes", ...]
+    hora_inicio = Column(Time, nullable=False)
+    hora_fin = Column(Time, nullable=False)
+    duracion_bloque = Column(Integer, nullable=False, default=60)  # minutos por hora de clase
+    recesos = Column(JSON, nullable=True)  # ["10:00-10:30"]
+    max_horas_diarias = Column(Integer, nullable=True)  # por grupo y día (None: sin límite)
+    
+    # Relaciones
+    carrera = relationship("Carrera", back_populates="cuadriculas")
+
 class HorarioGenerado(Base):
     __tablename__ = "horarios_generados"
     
     id = Column(Integer, primary_key=True, index=True)
     id_grupo = Column(Integer, ForeignKey("grupos.id"), nullable=False)
-    id_materia = Column(Integer, ForeignKey("materias.id"), nullable=False)
-    id_profesor = Column(Integer, ForeignKey("profesores.id"), nullable=False)
+    # Índices por materia y profesor: permiten encontrar los horarios que dependen de ellos
+    id_materia = Column(Integer, ForeignKey("materias.id"), nullable=False, index=True)
+    id_profesor = Column(Integer, ForeignKey("profesores.id"), nullable=False, index=True)
     dia_semana = Column(Enum(DiaSemanaEnum), nullable=False)
     hora_inicio = Column(Time, nullable=False)
     hora_fin = Column(Time, nullable=False)
-    version_horario = Column(Integer, nullable=False, default=1)  # 1 o 2 (para las 2 opciones)
+    version_horario = Column(Integer, nullable=False, default=1)  # 1..N (versiones alternativas, por defecto 2)
     
     # Relaciones
     grupo = relationship("Grupo", back_populates="horarios")
     materia = relationship("Materia", back_populates="horarios")
     profesor = relationship("Profesor", back_populates="horarios")
+
+class HorarioPendiente(Base):
+    """Horario (grupo, versión) desactualizado por un cambio en sus datos; pendiente de resolver"""
+    __tablename__ = "horarios_pendientes"
+    
+    id_grupo = Column(Integer, ForeignKey("grupos.id", ondelete="CASCADE"), primary_key=True)
+    version_horario = Column(Integer, primary_key=True)
+    motivo = Column(String(255), nullable=True)
+    marcado_en = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # Relaciones
+    grupo = relationship("Grupo")
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    
+    id = Column(String(36), primary_key=True)  # UUID
+    id_carrera = Column(Integer, ForeignKey("carreras.id"), nullable=False, index=True)
+    id_usuario = Column(Integer, ForeignKey("usuarios.id"), nullable=True)
+    status = Column(Enum(JobStatusEnum), nullable=False, default=JobStatusEnum.PENDING)
+    progress = Column(Float, nullable=False, default=0.0)  # 0.0 a 1.0
+    message = Column(Text, nullable=True)
+    request = Column(JSON, nullable=False)  # ScheduleGenerationRequest
+    result = Column(JSON, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    accept_requested = Column(Boolean, nullable=False, default=False)  # Detener y conservar lo encontrado
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Renovado por el proceso que tiene el trabajo mientras está pendiente o en ejecución
+    heartbeat_at = Column(DateTime, nullable=True)
+    
+    # Relaciones
+    carrera = relationship("Carrera")
+    usuario = relationship("Usuario")
+
+class GenerationLease(Base):
+    """
+    Arrendamiento de la generación de horarios de una carrera: una sola generación a la vez
+    por carrera entre todos los procesos de la API; vence si quien lo tiene deja de renovarlo
+    """
+    __tablename__ = "generation_leases"
+    
+    id_carrera = Column(Integer, ForeignKey("carreras.id", ondelete="CASCADE"), primary_key=True)
+    holder = Column(String(36), nullable=False)  # UUID de la generación que lo tiene
+    expires_at = Column(DateTime, nullable=False)
+
+class GenerationJobEvent(Base):
+    """Evento de un trabajo de generación (progreso, soluciones encontradas) para transmitirlo al cliente"""
+    __tablename__ = "generation_job_events"
+    
+    id = Column(Integer, primary_key=True, index=True)  # Orden de los eventos (id del evento SSE)
+    id_job = Column(String(36), ForeignKey("generation_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    tipo = Column(String(20), nullable=False)  # progreso, solucion, estado
+    datos = Column(JSON, nullable=False)
+    creado_en = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class SolverRun(Base):
+    """Telemetría de una resolución de CP-SAT (una versión de una unidad de grupos)"""
+    __tablename__ = "solver_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    id_carrera = Column(Integer, ForeignKey("carreras.id", ondelete="CASCADE"), nullable=False, index=True)
+    grupo_ids = Column(JSON, nullable=False)
+    version_horario = Column(Integer, nullable=False)
+    engine = Column(String(20), nullable=False)  # boolean, interval
+    status = Column(String(20), nullable=False)  # OPTIMAL, FEASIBLE, TIMEOUT, INFEASIBLE...
+    variables = Column(Integer, nullable=False)
+    constraints = Column(Integer, nullable=False)
+    build_time = Column(Float, nullable=False)  # segundos; 0 en versiones que reutilizan el modelo
+    solve_time = Column(Float, nullable=False)  # segundos (tiempo de reloj de CP-SAT)
+    conflicts = Column(Integer, nullable=False)
+    branches = Column(Integer, nullable=False)
+    objective = Column(Float, nullable=True)
+    peak_rss_kb = Column(Integer, nullable=True)  # memoria máxima del proceso que resolvió
+    params = Column(JSON, nullable=False)  # SolverParameters usados
+    creado_en = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    # Relaciones
+    carrera = relationship("Carrera")
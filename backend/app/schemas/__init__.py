@@ -4,10 +4,14 @@ __all__ = [
     "CarreraBase", "CarreraCreate", "CarreraResponse",
     "UsuarioBase", "UsuarioCreate", "UsuarioResponse", "UsuarioLogin", "UsuarioRegister",
     "ProfesorBase", "ProfesorCreate", "ProfesorUpdate", "ProfesorResponse",
-    "MateriaBase", "MateriaCreate", "MateriaResponse",
+    "MateriaBase", "MateriaCreate", "MateriaResponse", "ProfesorMateriasUpdate",
     "GrupoBase", "GrupoCreate", "GrupoResponse",
+    "CuadriculaHorarioBase", "CuadriculaHorarioResponse",
     "HorarioGeneradoBase", "HorarioGeneradoCreate", "HorarioGeneradoResponse",
+    "HorarioPendienteResponse",
     "Token", "TokenData",
-    "ScheduleGenerationRequest", "ScheduleGenerationResponse",
+    "ScheduleGenerationRequest", "ScheduleGenerationResponse", "FeasibilityDiagnostic", "GenerationJobResponse",
+    "UniversityGenerationRequest", "UniversityGenerationResponse",
+    "SolverRunResponse", "SolverMetricsResponse",
     "PasswordChange", "UserProfile"
 ]
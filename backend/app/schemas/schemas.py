@@ -1,7 +1,7 @@
-from typing import Optional, Dict, List
-from pydantic import BaseModel, EmailStr
-from datetime import time
-from app.models.models import RolEnum, TipoProfesorEnum, DiaSemanaEnum
+from typing import Any, Optional, Dict, List, Literal
+from pydantic import BaseModel, EmailStr, Field
+from datetime import time, datetime
+from app.models.models import RolEnum, TipoProfesorEnum, DiaSemanaEnum, TurnoEnum, JobStatusEnum
 
 # Base schemas
 class CarreraBase(BaseModel):
@@ -76,10 +76,14 @@ class MateriaResponse(MateriaBase):
     class Config:
         from_attributes = True
 
+class ProfesorMateriasUpdate(BaseModel):
+    materias: List[int]  # IDs de materias que el profesor puede impartir
+
 # Grupo schemas
 class GrupoBase(BaseModel):
     cuatrimestre: int
     nombre_grupo: Optional[str] = None
+    turno: Optional[TurnoEnum] = None
 
 class GrupoCreate(GrupoBase):
     id_carrera: int
@@ -92,6 +96,23 @@ class GrupoResponse(GrupoBase):
     class Config:
         from_attributes = True
 
+# CuadriculaHorario schemas
+class CuadriculaHorarioBase(BaseModel):
+    turno: Optional[TurnoEnum] = None  # None: cuadrícula de toda la carrera
+    dias: List[DiaSemanaEnum]
+    hora_inicio: time
+    hora_fin: time
+    duracion_bloque: int = Field(60, ge=15, le=240)  # minutos por hora de clase
+    recesos: List[str] = []  # ["10:00-10:30"]
+    max_horas_diarias: Optional[int] = Field(None, ge=1)  # por grupo y día
+
+class CuadriculaHorarioResponse(CuadriculaHorarioBase):
+    id: int
+    id_carrera: int
+    
+    class Config:
+        from_attributes = True
+
 # HorarioGenerado schemas
 class HorarioGeneradoBase(BaseModel):
     dia_semana: DiaSemanaEnum
@@ -113,6 +134,15 @@ class HorarioGeneradoResponse(HorarioGeneradoBase):
     class Config:
         from_attributes = True
 
+class HorarioPendienteResponse(BaseModel):
+    id_grupo: int
+    version_horario: int
+    motivo: Optional[str] = None
+    marcado_en: datetime
+    
+    class Config:
+        from_attributes = True
+
 # Auth schemas
 class Token(BaseModel):
     access_token: str
@@ -125,11 +155,110 @@ class TokenData(BaseModel):
 class ScheduleGenerationRequest(BaseModel):
     id_carrera: int
     cuatrimestre: Optional[int] = None  # Si no se especifica, genera para todos los cuatrimestres
+    # "grupo": un modelo por grupo; "conjunto": todos los grupos en un modelo sin choques de profesores
+    modo: Literal["grupo", "conjunto"] = "grupo"
+    # Parámetros de CP-SAT; si no se especifican se usan los del servidor
+    max_time_in_seconds: Optional[float] = Field(None, gt=0)
+    num_search_workers: Optional[int] = Field(None, ge=1)
+    relative_gap_limit: Optional[float] = Field(None, ge=0)
+    random_seed: Optional[int] = Field(None, ge=0)
+    parallel_workers: Optional[int] = Field(None, ge=1)
+    # Regeneración incremental: partir del horario guardado y (opcional) fijar lo no afectado
+    incremental: bool = False
+    fix_unchanged: bool = False
+    # Resolver solo los horarios marcados como pendientes por cambios en sus datos
+    only_dirty: bool = False
+    # Versiones alternativas por grupo y celdas mínimas en que difieren entre sí
+    num_versions: Optional[int] = Field(None, ge=1, le=10)
+    min_hamming_distance: Optional[int] = Field(None, ge=1)
+    # "boolean": una variable por hora; "interval": materias en bloques de hasta block_hours horas
+    engine: Literal["boolean", "interval"] = "boolean"
+    block_hours: Optional[int] = Field(None, ge=1, le=4)
+    # Ruptura de simetrías entre profesores y grupos intercambiables; None = SCHEDULE_SYMMETRY_BREAKING
+    symmetry_breaking: Optional[bool] = None
+
+class FeasibilityDiagnostic(BaseModel):
+    restriccion: str  # horas_grupo, sin_profesor, ptc_minimo... o la restricción del núcleo infactible
+    mensaje: str
+    grupo_id: Optional[int] = None
+    materia_id: Optional[int] = None
+    profesor_id: Optional[int] = None
 
 class ScheduleGenerationResponse(BaseModel):
     success: bool
     message: str
     generated_schedules: List[int]  # IDs de grupos para los que se generaron horarios
+    solver_status: Optional[str] = None  # Peor estado alcanzado: OPTIMAL, FEASIBLE, TIMEOUT, INFEASIBLE...
+    diagnostics: List[FeasibilityDiagnostic] = []  # Causas de infactibilidad detectadas
+    cached_solutions: int = 0  # Versiones tomadas de la caché (datos sin cambios desde la generación anterior)
+
+class UniversityGenerationRequest(BaseModel):
+    # Presupuesto total (segundos) para resolver todas las carreras y reparar sus choques
+    time_budget_seconds: Optional[float] = Field(None, gt=0)
+    num_search_workers: Optional[int] = Field(None, ge=1)
+    random_seed: Optional[int] = Field(None, ge=0)
+    num_versions: Optional[int] = Field(None, ge=1, le=10)
+    min_hamming_distance: Optional[int] = Field(None, ge=1)
+    engine: Literal["boolean", "interval"] = "boolean"
+    block_hours: Optional[int] = Field(None, ge=1, le=4)
+    symmetry_breaking: Optional[bool] = None
+
+class UniversityGenerationResponse(ScheduleGenerationResponse):
+    professor_conflicts: int = 0  # Choques de profesores entre carreras que quedaron sin reparar
+    lns_iterations: int = 0  # Vecindarios resueltos de nuevo durante la reparación
+
+class SolverRunResponse(BaseModel):
+    id: int
+    id_carrera: int
+    grupo_ids: List[int]
+    version_horario: int
+    engine: str
+    status: str
+    variables: int
+    constraints: int
+    build_time: float
+    solve_time: float
+    conflicts: int
+    branches: int
+    objective: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
+    params: Dict[str, Any]
+    creado_en: datetime
+    
+    class Config:
+        from_attributes = True
+
+class SolverMetricsResponse(BaseModel):
+    id_carrera: int
+    dia: Optional[str] = None  # Solo al agrupar por día
+    runs: int
+    factibles: int
+    estados: Dict[str, int]
+    solve_time_avg: Optional[float] = None
+    solve_time_max: Optional[float] = None
+    build_time_avg: Optional[float] = None
+    variables_avg: Optional[float] = None
+    variables_max: Optional[int] = None
+    constraints_avg: Optional[float] = None
+    conflicts_avg: Optional[float] = None
+    branches_avg: Optional[float] = None
+    peak_rss_kb_max: Optional[int] = None
+    segundos_por_millon_variables: Optional[float] = None
+
+class GenerationJobResponse(BaseModel):
+    id: str
+    id_carrera: int
+    status: JobStatusEnum
+    progress: float  # 0.0 a 1.0
+    message: Optional[str] = None
+    cancel_requested: bool
+    accept_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
 
 # Registration schemas
 class UsuarioRegister(BaseModel):
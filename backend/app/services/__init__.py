@@ -1,12 +1,26 @@
 from .schedule_optimizer import ScheduleOptimizer
+from .solver_parameters import SolverParameters
 from .crud_services import UsuarioService, CarreraService, ProfesorService, HorarioService
 from .excel_service import ExcelImportService
+from .schedule_dependencies import ScheduleDependencyService
+from .generation_jobs import GenerationJobService, run_schedule_request, run_coalesced_request
+from .generation_leases import CareerLease
+from .solver_runs import SolverRunService
+from .cuadriculas import CuadriculaHorarioService
 
 __all__ = [
     "ScheduleOptimizer",
+    "SolverParameters",
     "UsuarioService", 
     "CarreraService",
     "ProfesorService",
     "HorarioService",
-    "ExcelImportService"
+    "ExcelImportService",
+    "ScheduleDependencyService",
+    "GenerationJobService",
+    "run_schedule_request",
+    "run_coalesced_request",
+    "CareerLease",
+    "SolverRunService",
+    "CuadriculaHorarioService"
 ]
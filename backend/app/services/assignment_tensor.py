@@ -0,0 +1,129 @@
+from typing import Optional, Tuple
+import numpy as np
+from ortools.sat.python import cp_model
+
+class AssignmentTensor:
+    """
+    Tensor de variables booleanas del modelo CP-SAT indexado por enteros.
+    
+    Cada celda guarda el índice de la variable dentro del proto del modelo, de modo
+    que las restricciones se construyen por cortes de ejes (numpy) y se escriben
+    directamente en el proto, sin crear objetos ni cadenas por variable.
+    
+    Si se indica una máscara, solo se crean variables en las celdas permitidas;
+    el resto guarda ABSENT y se ignora al construir restricciones.
+    """
+    
+    ABSENT = -1
+    
+    def __init__(self, model: cp_model.CpModel, shape: Tuple[int, ...],
+                 mask: Optional[np.ndarray] = None):
+        self.model = model
+        self._proto = model.Proto()
+        
+        if mask is None:
+            mask = np.ones(shape, dtype=bool)
+        else:
+            mask = np.broadcast_to(np.asarray(mask, dtype=bool), shape)
+        
+        size = int(np.count_nonzero(mask))
+        base = len(self._proto.variables)
+        add_variable = self._proto.variables.add
+        for _ in range(size):
+            add_variable(domain=(0, 1))
+        
+        self.index = np.full(shape, self.ABSENT, dtype=np.int64)
+        self.index[mask] = np.arange(base, base + size, dtype=np.int64)
+        self.mask = self.index != self.ABSENT
+    
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.index.shape
+    
+    @property
+    def size(self) -> int:
+        """Número de variables creadas"""
+        return int(np.count_nonzero(self.mask))
+    
+    @property
+    def dense_size(self) -> int:
+        """Número de celdas del tensor (variables sin poda)"""
+        return self.index.size
+    
+    @staticmethod
+    def _present(literals: np.ndarray) -> np.ndarray:
+        literals = np.asarray(literals).ravel()
+        return literals[literals != AssignmentTensor.ABSENT]
+    
+    def add_sum_between(self, literals: np.ndarray, lower: int, upper: int,
+                        enforcement: Optional[int] = None):
+        """Agrega lower <= sum(literals) <= upper (solo si el literal enforcement es verdadero, si se indica)"""
+        indices = self._present(literals).tolist()
+        constraint = self._proto.constraints.add()
+        if enforcement is not None:
+            constraint.enforcement_literal.append(enforcement)
+        linear = constraint.linear
+        linear.vars.extend(indices)
+        linear.coeffs.extend([1] * len(indices))
+        linear.domain.extend([lower, upper])
+    
+    def add_sum_equal(self, literals: np.ndarray, value: int):
+        """Agrega sum(literals) == value"""
+        self.add_sum_between(literals, value, value)
+    
+    def add_at_most_one_per_row(self, rows: np.ndarray, enforcement: Optional[int] = None):
+        """Agrega una restricción AtMostOne por cada fila de una matriz de índices"""
+        rows = np.asarray(rows)
+        rows = rows.reshape(len(rows), -1)
+        present = rows != self.ABSENT
+        add_constraint = self._proto.constraints.add
+        for row, keep, count in zip(rows, present, present.sum(axis=1).tolist()):
+            if count > 1:
+                if enforcement is None:
+                    add_constraint().at_most_one.literals.extend(row[keep].tolist())
+                else:
+                    # AtMostOne no admite literal de activación: se escribe como suma <= 1
+                    self.add_sum_between(row[keep], 0, 1, enforcement)
+    
+    def add_order(self, lower: np.ndarray, upper: np.ndarray, weights: Optional[np.ndarray] = None):
+        """Agrega sum(weights × lower) <= sum(weights × upper) (pesos 1 si no se indican)"""
+        lower = np.asarray(lower)
+        upper = np.asarray(upper)
+        if weights is None:
+            weights = np.ones(lower.shape, dtype=np.int64)
+        weights = np.broadcast_to(np.asarray(weights, dtype=np.int64), lower.shape)
+        keep_lower = lower != self.ABSENT
+        keep_upper = upper != self.ABSENT
+        linear = self._proto.constraints.add().linear
+        linear.vars.extend(lower[keep_lower].tolist() + upper[keep_upper].tolist())
+        linear.coeffs.extend(weights[keep_lower].tolist() + (-weights[keep_upper]).tolist())
+        linear.domain.extend([-cp_model.INT_MAX, 0])
+    
+    def add_hints(self, values: np.ndarray):
+        """Sugiere a CP-SAT un valor inicial (0/1) para cada variable creada"""
+        values = np.broadcast_to(np.asarray(values), self.shape)
+        hint = self._proto.solution_hint
+        hint.vars.extend(self.index[self.mask].tolist())
+        hint.values.extend(values[self.mask].astype(np.int64).tolist())
+    
+    def fix_true(self, cells: np.ndarray) -> int:
+        """Fija a 1 las variables de las celdas indicadas (filas de coordenadas); devuelve cuántas se fijaron"""
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, self.index.ndim)
+        indices = self._present(self.index[tuple(cells.T)]).tolist()
+        variables = self._proto.variables
+        for index in indices:
+            domain = variables[index].domain
+            del domain[:]
+            domain.extend([1, 1])
+        return len(indices)
+    
+    def add_max_overlap(self, values: np.ndarray, max_shared: int):
+        """Limita a max_shared las variables que repiten una celda en 1 de values (tensor con la forma del modelo)"""
+        self.add_sum_between(self.index[np.asarray(values) == 1], 0, max_shared)
+    
+    def values(self, solver: cp_model.CpSolver) -> np.ndarray:
+        """Lee de una vez los valores de la solución con la forma del tensor (0 en celdas podadas)"""
+        solution = np.asarray(solver.ResponseProto().solution, dtype=np.int8)
+        values = np.zeros(self.shape, dtype=np.int8)
+        values[self.mask] = solution[self.index[self.mask]]
+        return values
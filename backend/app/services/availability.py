@@ -0,0 +1,77 @@
+import copy
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.models import Profesor
+from app.services.schedule_grid import ScheduleGrid
+
+def parse_time(value: str) -> int:
+    """Convierte "HH:MM" (o "HH") a minutos desde la medianoche"""
+    hours, _, minutes = value.strip().partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+def compile_availability(disponibilidad: Optional[dict], grid: ScheduleGrid) -> Tuple[int, ...]:
+    """
+    Compila la disponibilidad {"Lunes": ["07:30-10:00", ...]} a una máscara de bits por día
+    (bit h = bloque h de la cuadrícula). Un bloque está disponible solo si algún rango
+    lo cubre completo, así que los límites a media hora no se redondean hacia afuera.
+    Sin disponibilidad registrada el profesor está disponible en todos los bloques.
+    """
+    if not disponibilidad:
+        return ((1 << grid.n_horas) - 1,) * grid.n_dias
+    
+    slots = [
+        (start.hour * 60 + start.minute, end.hour * 60 + end.minute)
+        for start, end in grid.slot_times
+    ]
+    masks = []
+    for dia in grid.dias_semana:
+        ranges = []
+        for time_range in disponibilidad.get(dia.value, []):
+            start_str, end_str = time_range.split("-")
+            ranges.append((parse_time(start_str), parse_time(end_str)))
+        mask = 0
+        for h_idx, (slot_start, slot_end) in enumerate(slots):
+            if any(start <= slot_start and slot_end <= end for start, end in ranges):
+                mask |= 1 << h_idx
+        masks.append(mask)
+    return tuple(masks)
+
+class AvailabilityCache:
+    """
+    Caché (por proceso) de la disponibilidad compilada de cada profesor.
+    
+    Cada entrada guarda una copia de la disponibilidad de la que se compiló: si el
+    profesor cambió en otro proceso la entrada se recompila al compararla, y
+    ProfesorService la invalida al actualizar la disponibilidad.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[Tuple[int, ScheduleGrid], Tuple[Optional[dict], Tuple[int, ...]]] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, profesor: Profesor, grid: ScheduleGrid) -> Tuple[int, ...]:
+        """Máscaras por día de un profesor (compiladas una vez por cambio de disponibilidad)"""
+        key = (profesor.id, grid)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == profesor.disponibilidad:
+            return entry[1]
+        
+        masks = compile_availability(profesor.disponibilidad, grid)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(profesor.disponibilidad), masks)
+        return masks
+    
+    def mask(self, profesores: List[Profesor], grid: ScheduleGrid) -> np.ndarray:
+        """Máscara profesor × día × hora de los bloques donde cada profesor está disponible"""
+        bits = np.array([self.get(profesor, grid) for profesor in profesores], dtype=np.int64)
+        bits = bits.reshape(len(profesores), grid.n_dias)
+        return ((bits[:, :, None] >> np.arange(grid.n_horas)) & 1).astype(bool)
+    
+    def invalidate(self, profesor_id: int):
+        """Descartar las máscaras de un profesor (tras modificar su disponibilidad)"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == profesor_id]:
+                del self._entries[key]
+
+availability_cache = AvailabilityCache()
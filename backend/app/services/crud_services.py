@@ -1,9 +1,11 @@
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
 from app.models import Usuario, Carrera, Profesor, Materia, Grupo, HorarioGenerado, RolEnum
 from app.schemas import UsuarioCreate, UsuarioResponse
 from app.core.security import get_password_hash, verify_password
+from app.services.availability import availability_cache
+from app.services.schedule_dependencies import ScheduleDependencyService
 
 class UsuarioService:
     """Servicio para gestión de usuarios"""
@@ -92,26 +94,62 @@ class ProfesorService:
     
     def get_profesores_by_carrera(self, carrera_id: int) -> List[Profesor]:
         """Obtener profesores de una carrera"""
-        return self.db.query(Profesor).filter(Profesor.id_carrera == carrera_id).all()
+        return self.db.query(Profesor).options(joinedload(Profesor.carrera)).filter(
+            Profesor.id_carrera == carrera_id
+        ).all()
     
     def update_profesor_availability(self, profesor_id: int, disponibilidad: dict) -> Optional[Profesor]:
         """Actualizar disponibilidad de profesor"""
         profesor = self.db.query(Profesor).filter(Profesor.id == profesor_id).first()
         if profesor:
+            if profesor.disponibilidad != disponibilidad:
+                ScheduleDependencyService(self.db).mark_profesor(profesor_id, "Disponibilidad de profesor modificada")
             profesor.disponibilidad = disponibilidad
             self.db.commit()
+            availability_cache.invalidate(profesor_id)
             self.db.refresh(profesor)
         return profesor
+    
+    def get_materias_profesor(self, profesor_id: int) -> List[Materia]:
+        """Obtener materias que un profesor puede impartir"""
+        return self.db.query(Materia).options(joinedload(Materia.carrera)).join(Materia.profesores).filter(
+            Profesor.id == profesor_id
+        ).all()
+    
+    def set_materias_profesor(self, profesor_id: int, materia_ids: List[int]) -> Optional[List[Materia]]:
+        """Reemplazar las materias que un profesor puede impartir"""
+        profesor = self.db.query(Profesor).filter(Profesor.id == profesor_id).first()
+        if not profesor:
+            return None
+        
+        materias = []
+        if materia_ids:
+            materias = self.db.query(Materia).filter(Materia.id.in_(set(materia_ids))).all()
+        # Cambiar los profesores habilitados de una materia afecta a todos los horarios que la incluyen
+        modificadas = {materia.id for materia in profesor.materias} ^ {materia.id for materia in materias}
+        ScheduleDependencyService(self.db).mark_materias(modificadas, "Profesores habilitados modificados")
+        profesor.materias = materias
+        self.db.commit()
+        # El commit expira las materias: se leen de nuevo en una sola consulta, con su carrera
+        return self.get_materias_profesor(profesor_id)
 
 class HorarioService:
     """Servicio para gestión de horarios"""
     
+    # HorarioGeneradoResponse incluye grupo, materia y profesor, cada uno con su carrera:
+    # todo se carga con JOINs en la misma consulta en lugar de una consulta por relación y fila
+    _eager = (
+        joinedload(HorarioGenerado.grupo).joinedload(Grupo.carrera),
+        joinedload(HorarioGenerado.materia).joinedload(Materia.carrera),
+        joinedload(HorarioGenerado.profesor).joinedload(Profesor.carrera)
+    )
+    
     def __init__(self, db: Session):
         self.db = db
     
     def get_horario_grupo(self, grupo_id: int, version: int = 1) -> List[HorarioGenerado]:
         """Obtener horario de un grupo específico"""
-        return self.db.query(HorarioGenerado).filter(
+        return self.db.query(HorarioGenerado).options(*self._eager).filter(
             and_(
                 HorarioGenerado.id_grupo == grupo_id,
                 HorarioGenerado.version_horario == version
@@ -120,7 +158,7 @@ class HorarioService:
     
     def get_horario_profesor(self, profesor_id: int) -> List[HorarioGenerado]:
         """Obtener horario de un profesor"""
-        return self.db.query(HorarioGenerado).filter(
+        return self.db.query(HorarioGenerado).options(*self._eager).filter(
             HorarioGenerado.id_profesor == profesor_id
         ).all()
     
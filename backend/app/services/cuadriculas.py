@@ -0,0 +1,132 @@
+from datetime import time
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.models import CuadriculaHorario, Grupo
+from app.models.models import DiaSemanaEnum, TurnoEnum
+from app.schemas import CuadriculaHorarioBase
+from app.services.availability import parse_time
+from app.services.schedule_dependencies import ScheduleDependencyService
+from app.services.schedule_grid import ScheduleGrid, build_slot_starts, default_schedule_grid, get_schedule_grid
+
+def _parse_range(value: str) -> Tuple[int, int]:
+    """Convierte "HH:MM-HH:MM" a minutos (inicio, fin)"""
+    start_str, end_str = value.split("-")
+    return parse_time(start_str), parse_time(end_str)
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+def to_schedule_grid(cuadricula: CuadriculaHorario) -> ScheduleGrid:
+    """Esqueleto de tiempo (cacheado) de una cuadrícula guardada"""
+    dias = set(cuadricula.dias)
+    slot_starts = build_slot_starts(
+        _minutes(cuadricula.hora_inicio), _minutes(cuadricula.hora_fin), cuadricula.duracion_bloque,
+        [_parse_range(receso) for receso in cuadricula.recesos or []]
+    )
+    return get_schedule_grid(
+        tuple(dia for dia in DiaSemanaEnum if dia.value in dias), slot_starts,
+        cuadricula.duracion_bloque, cuadricula.max_horas_diarias
+    )
+
+class CuadriculaHorarioService:
+    """
+    Servicio de las cuadrículas de tiempo de cada carrera y turno.
+    
+    Un grupo usa la cuadrícula de su turno si la carrera la define; si no, la de la
+    carrera (turno NULL) y si tampoco existe, la cuadrícula por defecto
+    (default_schedule_grid). El optimizador crea variables solo sobre esos bloques.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_cuadriculas(self, carrera_id: int) -> List[CuadriculaHorario]:
+        """Cuadrículas configuradas de una carrera"""
+        return self.db.query(CuadriculaHorario).filter(
+            CuadriculaHorario.id_carrera == carrera_id
+        ).order_by(CuadriculaHorario.id).all()
+    
+    def get_cuadricula(self, carrera_id: int, turno: Optional[TurnoEnum]) -> Optional[CuadriculaHorario]:
+        """Cuadrícula de un turno de la carrera (turno None: la de toda la carrera)"""
+        query = self.db.query(CuadriculaHorario).filter(CuadriculaHorario.id_carrera == carrera_id)
+        if turno is None:
+            query = query.filter(CuadriculaHorario.turno.is_(None))
+        else:
+            query = query.filter(CuadriculaHorario.turno == turno)
+        return query.first()
+    
+    def get_grid(self, carrera_id: int, turno: Optional[TurnoEnum]) -> ScheduleGrid:
+        """Esqueleto de tiempo que usan los grupos de la carrera en ese turno"""
+        cuadricula = self.get_cuadricula(carrera_id, turno) if turno is not None else None
+        if cuadricula is None:
+            cuadricula = self.get_cuadricula(carrera_id, None)
+        return to_schedule_grid(cuadricula) if cuadricula else default_schedule_grid()
+    
+    def save_cuadricula(self, carrera_id: int, data: CuadriculaHorarioBase) -> Dict[str, Any]:
+        """Crear o reemplazar la cuadrícula de un turno de la carrera"""
+        error = self._validate(data)
+        if error:
+            return {"success": False, "message": error}
+        
+        cuadricula = self.get_cuadricula(carrera_id, data.turno)
+        if cuadricula is None:
+            cuadricula = CuadriculaHorario(id_carrera=carrera_id, turno=data.turno)
+            self.db.add(cuadricula)
+        cuadricula.dias = [dia.value for dia in DiaSemanaEnum if dia in set(data.dias)]
+        cuadricula.hora_inicio = data.hora_inicio
+        cuadricula.hora_fin = data.hora_fin
+        cuadricula.duracion_bloque = data.duracion_bloque
+        cuadricula.recesos = list(data.recesos)
+        cuadricula.max_horas_diarias = data.max_horas_diarias
+        
+        # Los horarios guardados de los grupos que usan esta cuadrícula quedan desactualizados
+        self._mark_grupos(carrera_id, data.turno, "Cuadrícula de horario modificada")
+        self.db.commit()
+        self.db.refresh(cuadricula)
+        return {"success": True, "message": "Cuadrícula guardada", "cuadricula": cuadricula}
+    
+    def delete_cuadricula(self, carrera_id: int, turno: Optional[TurnoEnum]) -> bool:
+        """Eliminar la cuadrícula de un turno (sus grupos vuelven a la de la carrera o a la por defecto)"""
+        cuadricula = self.get_cuadricula(carrera_id, turno)
+        if cuadricula is None:
+            return False
+        
+        self._mark_grupos(carrera_id, turno, "Cuadrícula de horario eliminada")
+        self.db.delete(cuadricula)
+        self.db.commit()
+        return True
+    
+    def _validate(self, data: CuadriculaHorarioBase) -> Optional[str]:
+        """Mensaje de error de una cuadrícula inválida (None si es válida)"""
+        if not data.dias:
+            return "La cuadrícula debe incluir al menos un día"
+        inicio, fin = _minutes(data.hora_inicio), _minutes(data.hora_fin)
+        if fin <= inicio:
+            return "La hora de fin debe ser posterior a la de inicio"
+        recesos = []
+        for receso in data.recesos:
+            try:
+                start, end = _parse_range(receso)
+            except ValueError:
+                return f"Receso inválido: {receso} (formato HH:MM-HH:MM)"
+            if end <= start:
+                return f"Receso inválido: {receso}"
+            recesos.append((start, end))
+        if not build_slot_starts(inicio, fin, data.duracion_bloque, recesos):
+            return "La cuadrícula no tiene ningún bloque completo entre la hora de inicio y la de fin"
+        return None
+    
+    def _mark_grupos(self, carrera_id: int, turno: Optional[TurnoEnum], motivo: str) -> int:
+        """Marcar los horarios de los grupos que usan la cuadrícula de ese turno"""
+        query = self.db.query(Grupo.id).filter(Grupo.id_carrera == carrera_id)
+        if turno is not None:
+            query = query.filter(Grupo.turno == turno)
+        else:
+            # Los grupos sin turno y los de turnos sin cuadrícula propia
+            propios = [
+                cuadricula.turno for cuadricula in self.get_cuadriculas(carrera_id) if cuadricula.turno is not None
+            ]
+            query = query.filter(or_(Grupo.turno.is_(None), Grupo.turno.notin_(propios)))
+        grupo_ids = [grupo_id for grupo_id, in query.all()]
+        return ScheduleDependencyService(self.db).mark_grupos(grupo_ids, motivo)
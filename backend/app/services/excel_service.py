@@ -3,6 +3,7 @@ from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from app.models import Profesor, Materia
 from app.models.models import TipoProfesorEnum
+from app.services.schedule_dependencies import ScheduleDependencyService
 
 class ExcelImportService:
     """Servicio para importación de datos desde Excel"""
@@ -92,6 +93,7 @@ class ExcelImportService:
             
             imported_count = 0
             errors = []
+            cuatrimestres_nuevos = set()
             
             for index, row in df.iterrows():
                 try:
@@ -127,11 +129,17 @@ class ExcelImportService:
                     )
                     
                     self.db.add(materia)
+                    cuatrimestres_nuevos.add(cuatrimestre)
                     imported_count += 1
                     
                 except Exception as e:
                     errors.append(f"Fila {index + 1}: {str(e)}")
             
+            # Los horarios de esos cuatrimestres no incluyen las materias nuevas
+            dependencies = ScheduleDependencyService(self.db)
+            for cuatrimestre in cuatrimestres_nuevos:
+                dependencies.mark_cuatrimestre(carrera_id, cuatrimestre, "Materias nuevas importadas")
+            
             self.db.commit()
             
             return {
@@ -144,3 +152,72 @@ class ExcelImportService:
         except Exception as e:
             self.db.rollback()
             return {"success": False, "message": f"Error al procesar archivo: {str(e)}"}
+    
+    def import_profesor_materias_from_excel(self, file_path: str, carrera_id: int) -> Dict[str, Any]:
+        """
+        Importa las materias que cada profesor puede impartir desde archivo Excel
+        Asume columnas: numero_empleado, nombre_materia, cuatrimestre
+        """
+        try:
+            df = pd.read_excel(file_path)
+            
+            # Validar columnas requeridas
+            required_columns = ['numero_empleado', 'nombre_materia', 'cuatrimestre']
+            if not all(col in df.columns for col in required_columns):
+                return {
+                    "success": False, 
+                    "message": f"Columnas requeridas: {required_columns}"
+                }
+            
+            # Índices en memoria para no consultar por cada fila
+            profesores = {
+                p.numero_empleado: p
+                for p in self.db.query(Profesor).filter(Profesor.id_carrera == carrera_id).all()
+            }
+            materias = {
+                (m.nombre_materia, m.cuatrimestre): m
+                for m in self.db.query(Materia).filter(Materia.id_carrera == carrera_id).all()
+            }
+            
+            imported_count = 0
+            errors = []
+            materias_modificadas = set()
+            
+            for index, row in df.iterrows():
+                try:
+                    numero_empleado = str(row['numero_empleado'])
+                    profesor = profesores.get(numero_empleado)
+                    if not profesor:
+                        errors.append(f"Fila {index + 1}: Profesor no encontrado: {numero_empleado}")
+                        continue
+                    
+                    clave_materia = (str(row['nombre_materia']), int(row['cuatrimestre']))
+                    materia = materias.get(clave_materia)
+                    if not materia:
+                        errors.append(f"Fila {index + 1}: Materia no encontrada: {row['nombre_materia']}")
+                        continue
+                    
+                    if materia in profesor.materias:
+                        errors.append(f"Fila {index + 1}: Asignación ya existe: {numero_empleado} - {row['nombre_materia']}")
+                        continue
+                    
+                    profesor.materias.append(materia)
+                    materias_modificadas.add(materia.id)
+                    imported_count += 1
+                    
+                except Exception as e:
+                    errors.append(f"Fila {index + 1}: {str(e)}")
+            
+            ScheduleDependencyService(self.db).mark_materias(materias_modificadas, "Profesores habilitados modificados")
+            self.db.commit()
+            
+            return {
+                "success": True,
+                "message": f"Importadas {imported_count} asignaciones profesor-materia",
+                "imported_count": imported_count,
+                "errors": errors
+            }
+            
+        except Exception as e:
+            self.db.rollback()
+            return {"success": False, "message": f"Error al procesar archivo: {str(e)}"}
@@ -0,0 +1,257 @@
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import numpy as np
+from ortools.sat.python import cp_model
+from app.services.assignment_tensor import AssignmentTensor
+from app.services.interval_model import split_hours
+
+if TYPE_CHECKING:
+    from app.services.schedule_model import SolveUnit
+
+# Límites de la restricción 5 del modelo (profesores de tiempo completo)
+PTC_MIN_HORAS = 20
+PTC_MAX_HORAS = 40
+
+# Tiempo total (segundos) de la búsqueda del núcleo infactible: con suposiciones CP-SAT
+# no puede usar todo su presolve y probar la infactibilidad puede tardar mucho más
+CORE_TIME_LIMIT = 10.0
+
+def diagnostic(restriccion: str, mensaje: str, **ids: Any) -> Dict[str, Any]:
+    """Diagnóstico de factibilidad: tipo de restricción, mensaje y ids involucrados"""
+    return {"restriccion": restriccion, "mensaje": mensaje, **ids}
+
+def grupo_nombre(unit: "SolveUnit", g_idx: int) -> str:
+    return unit.grupo_nombres[g_idx] if unit.grupo_nombres else f"grupo {unit.grupo_ids[g_idx]}"
+
+def clase_nombre(unit: "SolveUnit", c_idx: int) -> str:
+    materia = unit.clase_nombres[c_idx] if unit.clase_nombres else f"materia {unit.clase_materia[c_idx]}"
+    return f"{materia} ({grupo_nombre(unit, unit.clase_grupo[c_idx])})"
+
+def profesor_nombre(unit: "SolveUnit", p_idx: int) -> str:
+    return unit.profesor_nombres[p_idx] if unit.profesor_nombres else f"profesor {unit.profesor_ids[p_idx]}"
+
+def screen_unit(unit: "SolveUnit") -> List[Dict[str, Any]]:
+    """
+    Revisión previa al modelo: detecta con conteos sobre las máscaras de la unidad
+    las causas evidentes de infactibilidad, sin construir ni resolver el modelo.
+    Una lista vacía no garantiza que la unidad sea factible.
+    """
+    grid = unit.grid
+    diagnostics = []
+    clase_grupo = np.asarray(unit.clase_grupo, dtype=np.int64)
+    horas = np.asarray(unit.clase_horas, dtype=np.int64)
+    grupos = ", ".join(grupo_nombre(unit, g_idx) for g_idx in range(len(unit.grupo_ids)))
+    
+    # Horas de cada grupo contra los bloques de la semana (y el límite diario de la cuadrícula)
+    capacidad = grid.n_dias * grid.horas_por_dia
+    for g_idx, grupo_id in enumerate(unit.grupo_ids):
+        total = int(horas[clase_grupo == g_idx].sum())
+        if total > capacidad:
+            if grid.daily_cap is None:
+                mensaje = f"la semana tiene {grid.n_slots} bloques"
+            else:
+                mensaje = f"con {grid.daily_cap} horas diarias la semana admite {capacidad}"
+            diagnostics.append(diagnostic(
+                "horas_grupo",
+                f"{grupo_nombre(unit, g_idx)} requiere {total} horas semanales y {mensaje}",
+                grupo_id=grupo_id
+            ))
+    
+    # Celdas (día, hora) en que cada profesor habilitado puede dar cada clase
+    usable = unit.eligibility[:, :, None, None] & unit.availability[None, :, :, :]
+    profesor_clase = usable.any(axis=(2, 3))    # clase × profesor con alguna hora posible
+    clase_slots = usable.any(axis=1).sum(axis=(1, 2))
+    windows = {}
+    
+    for c_idx, horas_clase in enumerate(unit.clase_horas):
+        ids = {"grupo_id": unit.grupo_ids[unit.clase_grupo[c_idx]], "materia_id": unit.clase_materia[c_idx]}
+        if not unit.eligibility[c_idx].any():
+            diagnostics.append(diagnostic(
+                "sin_profesor", f"{clase_nombre(unit, c_idx)} no tiene profesores habilitados", **ids
+            ))
+        elif not profesor_clase[c_idx].any():
+            diagnostics.append(diagnostic(
+                "sin_disponibilidad",
+                f"Ningún profesor habilitado para {clase_nombre(unit, c_idx)} tiene horas disponibles", **ids
+            ))
+        elif clase_slots[c_idx] < horas_clase:
+            diagnostics.append(diagnostic(
+                "horas_disponibles",
+                f"{clase_nombre(unit, c_idx)} requiere {horas_clase} horas y sus profesores habilitados "
+                f"solo cubren {int(clase_slots[c_idx])}", **ids
+            ))
+        elif unit.engine == "interval":
+            # Cada bloque necesita horas seguidas de un mismo profesor en un mismo día
+            for length in sorted(set(split_hours(horas_clase, unit.block_hours)), reverse=True):
+                if length not in windows:
+                    windows[length] = _has_window(unit.availability, length)
+                if not (windows[length] & unit.eligibility[c_idx]).any():
+                    diagnostics.append(diagnostic(
+                        "bloque_sin_hueco",
+                        f"Ningún profesor habilitado para {clase_nombre(unit, c_idx)} tiene {length} horas "
+                        f"seguidas disponibles en un mismo día", **ids
+                    ))
+                    break
+    
+    # Carga de cada profesor: horas que solo él puede dar contra sus horas disponibles
+    only_option = profesor_clase & (profesor_clase.sum(axis=1) == 1)[:, None]
+    bounded_ptc = set(unit.bounded_ptc)
+    for p_idx, profesor_id in enumerate(unit.profesor_ids):
+        disponibles = int(unit.availability[p_idx].sum())
+        forzadas = int(horas[only_option[:, p_idx]].sum())
+        if forzadas > disponibles:
+            diagnostics.append(diagnostic(
+                "carga_profesor",
+                f"{profesor_nombre(unit, p_idx)} es el único profesor posible para materias que suman "
+                f"{forzadas} horas en {grupos} y solo tiene {disponibles} horas disponibles",
+                profesor_id=profesor_id
+            ))
+        
+        if p_idx in bounded_ptc:
+            minimo, maximo = unit.ptc_range(p_idx)
+            alcanzables = min(disponibles, int(horas[profesor_clase[:, p_idx]].sum()))
+            if alcanzables < minimo:
+                diagnostics.append(diagnostic(
+                    "ptc_minimo",
+                    f"{profesor_nombre(unit, p_idx)} (tiempo completo) puede impartir a lo más {alcanzables} "
+                    f"horas en {grupos} y el mínimo es {minimo}",
+                    profesor_id=profesor_id
+                ))
+            elif forzadas > maximo:
+                diagnostics.append(diagnostic(
+                    "ptc_maximo",
+                    f"{profesor_nombre(unit, p_idx)} (tiempo completo) es el único profesor posible para "
+                    f"{forzadas} horas en {grupos} y el máximo es {maximo}",
+                    profesor_id=profesor_id
+                ))
+    
+    return diagnostics
+
+def infeasible_core(unit: "SolveUnit") -> List[Dict[str, Any]]:
+    """
+    Núcleo de restricciones en conflicto de una unidad infactible.
+    
+    Construye el modelo booleano con un literal por restricción (horas de cada clase,
+    choques y horas diarias de cada grupo, choques de cada profesor, rango de cada PTC),
+    toma como núcleo inicial las suposiciones que CP-SAT reporta como suficientes para
+    la infactibilidad (o todas, si no las obtiene a tiempo) y lo reduce quitando una a
+    la vez las restricciones que no hacen falta, todo dentro de CORE_TIME_LIMIT segundos.
+    Con el motor de intervalos el modelo booleano es una relajación: si resulta
+    factible no hay núcleo que reportar.
+    """
+    grid = unit.grid
+    model = cp_model.CpModel()
+    mask = unit.eligibility[:, :, None, None] & unit.availability[None, :, :, :]
+    assignments = AssignmentTensor(model, (unit.n_clases, unit.n_profesores, grid.n_dias, grid.n_horas), mask=mask)
+    index = assignments.index
+    constraints: Dict[int, Dict[str, Any]] = {}
+    
+    def assume(entry: Dict[str, Any]) -> int:
+        literal = model.NewBoolVar(entry["restriccion"]).Index()
+        constraints[literal] = entry
+        return literal
+    
+    for c_idx, horas in enumerate(unit.clase_horas):
+        assignments.add_sum_between(index[c_idx], horas, horas, assume(diagnostic(
+            "horas_clase", f"{clase_nombre(unit, c_idx)} debe cumplir {horas} horas semanales",
+            grupo_id=unit.grupo_ids[unit.clase_grupo[c_idx]], materia_id=unit.clase_materia[c_idx]
+        )))
+    
+    bounded_ptc = set(unit.bounded_ptc)
+    for p_idx, profesor_id in enumerate(unit.profesor_ids):
+        rows = index[:, p_idx].transpose(1, 2, 0).reshape(grid.n_slots, -1)
+        assignments.add_at_most_one_per_row(rows, assume(diagnostic(
+            "choque_profesor", f"{profesor_nombre(unit, p_idx)} no puede dar dos clases a la misma hora",
+            profesor_id=profesor_id
+        )))
+        if p_idx in bounded_ptc:
+            minimo, maximo = unit.ptc_range(p_idx)
+            assignments.add_sum_between(index[:, p_idx], minimo, maximo, assume(diagnostic(
+                "horas_ptc",
+                f"{profesor_nombre(unit, p_idx)} (tiempo completo) debe impartir entre "
+                f"{minimo} y {maximo} horas",
+                profesor_id=profesor_id
+            )))
+    
+    clase_grupo = np.asarray(unit.clase_grupo)
+    for g_idx, grupo_id in enumerate(unit.grupo_ids):
+        rows = np.flatnonzero(clase_grupo == g_idx)
+        if rows.size:
+            assignments.add_at_most_one_per_row(
+                index[rows].transpose(2, 3, 0, 1).reshape(grid.n_slots, -1),
+                assume(diagnostic(
+                    "choque_grupo", f"{grupo_nombre(unit, g_idx)} no puede tener dos materias a la misma hora",
+                    grupo_id=grupo_id
+                ))
+            )
+            if grid.daily_cap is not None:
+                literal = assume(diagnostic(
+                    "horas_diarias",
+                    f"{grupo_nombre(unit, g_idx)} puede tener a lo más {grid.daily_cap} horas por día",
+                    grupo_id=grupo_id
+                ))
+                for dia_idx in range(grid.n_dias):
+                    assignments.add_sum_between(index[rows][:, :, dia_idx], 0, grid.daily_cap, literal)
+    
+    proto = model.Proto()
+    deadline = perf_counter() + CORE_TIME_LIMIT
+    
+    def run(time_limit: float):
+        solver = cp_model.CpSolver()
+        unit.params.apply(solver)
+        # Las suposiciones suficientes solo se reportan de forma fiable con un trabajador
+        solver.parameters.num_search_workers = 1
+        solver.parameters.max_time_in_seconds = min(solver.parameters.max_time_in_seconds, time_limit)
+        return solver.Solve(model), solver
+    
+    # Con suposiciones CP-SAT reporta de una vez un subconjunto suficiente, pero sin todo
+    # su presolve puede no lograrlo a tiempo: recibe una parte del tiempo
+    proto.assumptions.extend(constraints)
+    status, solver = run(CORE_TIME_LIMIT / 10)
+    del proto.assumptions[:]
+    if status == cp_model.INFEASIBLE:
+        core = list(solver.SufficientAssumptionsForInfeasibility())
+    else:
+        core = list(constraints)
+    
+    def infeasible(literals: List[int]) -> Optional[bool]:
+        """Si la unidad es infactible con solo esas restricciones (None: sin respuesta a tiempo)"""
+        remaining = deadline - perf_counter()
+        if remaining <= 0:
+            return None
+        # Restricciones activas o descartadas fijando su literal: el presolve las aprovecha
+        active = set(literals)
+        for literal in constraints:
+            domain = proto.variables[literal].domain
+            del domain[:]
+            domain.extend([1, 1] if literal in active else [0, 0])
+        status, _ = run(remaining)
+        if status == cp_model.INFEASIBLE:
+            return True
+        return False if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None
+    
+    if not infeasible(core):
+        # Factible (relajación del motor de intervalos) o sin respuesta en el tiempo límite
+        return []
+    
+    # Eliminación: se descarta cada restricción sin la cual el resto sigue siendo infactible;
+    # si se acaba el tiempo el núcleo queda sin reducir del todo, pero sigue siendo infactible
+    for literal in list(core):
+        reduced = [other for other in core if other != literal]
+        answer = infeasible(reduced)
+        if answer is None:
+            break
+        if answer:
+            core = reduced
+    
+    return [constraints[literal] for literal in core]
+
+def _has_window(availability: np.ndarray, length: int) -> np.ndarray:
+    """Por profesor, si tiene length horas seguidas disponibles en algún día"""
+    n_horas = availability.shape[2]
+    if length > n_horas:
+        return np.zeros(availability.shape[0], dtype=bool)
+    window = np.ones(availability.shape[:2] + (n_horas - length + 1,), dtype=bool)
+    for offset in range(length):
+        window &= availability[:, :, offset:n_horas - length + 1 + offset]
+    return window.any(axis=(1, 2))
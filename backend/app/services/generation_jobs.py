@@ -0,0 +1,456 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import GenerationJob, GenerationJobEvent, JobStatusEnum, Usuario
+from app.schemas import ScheduleGenerationRequest
+from app.services.generation_leases import CareerLease
+from app.services.schedule_optimizer import ScheduleOptimizer
+from app.services.solver_parameters import SolverParameters
+
+logger = logging.getLogger(__name__)
+
+# Pool de trabajadores de este proceso; el estado de cada trabajo vive en la base de datos
+_executor = ThreadPoolExecutor(max_workers=settings.GENERATION_JOB_WORKERS, thread_name_prefix="schedule-job")
+
+# Trabajos pendientes o en ejecución de este proceso: un hilo renueva su heartbeat_at para que
+# cualquier proceso distinga los vivos de los que quedaron sin proceso (reinicio o caída)
+_owned_jobs: Set[str] = set()
+_owned_jobs_lock = threading.Lock()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+def _own_job(job_id: str):
+    global _heartbeat_thread
+    with _owned_jobs_lock:
+        _owned_jobs.add(job_id)
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_renew_heartbeats, daemon=True, name="schedule-job-heartbeat")
+            _heartbeat_thread.start()
+
+def _disown_job(job_id: str):
+    with _owned_jobs_lock:
+        _owned_jobs.discard(job_id)
+
+def _renew_heartbeats():
+    while True:
+        time.sleep(settings.GENERATION_JOB_STALE_SECONDS / 3)
+        with _owned_jobs_lock:
+            job_ids = list(_owned_jobs)
+        if not job_ids:
+            continue
+        db = SessionLocal()
+        try:
+            db.query(GenerationJob).filter(GenerationJob.id.in_(job_ids)).update(
+                {"heartbeat_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        except Exception:
+            # Un fallo pasajero se reintenta en la siguiente renovación
+            db.rollback()
+        finally:
+            db.close()
+
+# Buscar e insertar un trabajo es atómico dentro del proceso (entre procesos lo cubre el reúso
+# del resultado al tomar el arrendamiento, ver run_generation_job)
+_create_lock = threading.Lock()
+
+def run_schedule_request(optimizer: ScheduleOptimizer, request: ScheduleGenerationRequest,
+                         lease_timeout: Optional[float] = None,
+                         reuse: Optional[Callable[[], Optional[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+    """
+    Ejecuta una petición de generación con el optimizador indicado
+    Antes toma el arrendamiento de la carrera (CareerLease): las generaciones de una misma
+    carrera se ejecutan una tras otra aunque vengan de distintos procesos. Si no se obtiene
+    en lease_timeout segundos (None = esperar sin límite) el resultado lleva busy=True.
+    Ya con el arrendamiento, si reuse devuelve un resultado se usa en lugar de resolver.
+    """
+    lease = CareerLease([request.id_carrera])
+    if not lease.acquire(timeout=lease_timeout, stop=optimizer.cancel_event.is_set):
+        if optimizer.cancel_event.is_set():
+            return {"success": False, "message": "Generación cancelada mientras esperaba a otra de la carrera",
+                    "cancelled": True}
+        return {"success": False, "message": "Otra generación de la carrera sigue en curso", "busy": True}
+    
+    try:
+        reused = reuse() if reuse else None
+        if reused is not None:
+            return reused
+        
+        solver_params = SolverParameters.from_settings(
+            max_time_in_seconds=request.max_time_in_seconds,
+            num_search_workers=request.num_search_workers,
+            relative_gap_limit=request.relative_gap_limit,
+            random_seed=request.random_seed
+        )
+        return optimizer.generate_schedule_for_career(
+            request.id_carrera, request.cuatrimestre,
+            joint=request.modo == "conjunto", solver_params=solver_params,
+            parallel_workers=request.parallel_workers,
+            incremental=request.incremental,
+            fix_unchanged=request.fix_unchanged,
+            only_dirty=request.only_dirty,
+            num_versions=request.num_versions,
+            min_hamming_distance=request.min_hamming_distance,
+            engine=request.engine,
+            block_hours=request.block_hours,
+            symmetry_breaking=request.symmetry_breaking
+        )
+    finally:
+        lease.release()
+
+def run_coalesced_request(db: Session, request: ScheduleGenerationRequest,
+                          user: Optional[Usuario] = None) -> Dict[str, Any]:
+    """
+    Generación síncrona, registrada como trabajo para que ningún proceso la repita: si hay
+    un trabajo vivo con la misma petición (en cualquier proceso) se espera su resultado; si
+    no, se crea uno y se ejecuta en este hilo, esperando el arrendamiento de la carrera a lo
+    más GENERATION_LEASE_WAIT_SECONDS (busy=True si no se obtiene)
+    """
+    job_service = GenerationJobService(db)
+    job, created = job_service.find_or_insert_job(request, user)
+    job_id = job.id
+    if created:
+        run_generation_job(job_id, lease_timeout=settings.GENERATION_LEASE_WAIT_SECONDS)
+    
+    poll_db = SessionLocal()
+    try:
+        while True:
+            job = poll_db.query(GenerationJob).filter(GenerationJob.id == job_id).one()
+            if job.status not in (JobStatusEnum.PENDING, JobStatusEnum.RUNNING):
+                return job.result or {"success": False, "message": job.message}
+            poll_db.rollback()
+            time.sleep(settings.GENERATION_JOB_POLL_SECONDS)
+            # Si el proceso del trabajo murió, se marca como fallido y la espera termina
+            GenerationJobService(poll_db)._fail_stale_jobs(request.id_carrera)
+    finally:
+        poll_db.close()
+
+class GenerationJobService:
+    """Servicio para gestión de trabajos de generación de horarios en segundo plano"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def create_job(self, request: ScheduleGenerationRequest, user: Optional[Usuario] = None) -> GenerationJob:
+        """
+        Registrar un trabajo pendiente y enviarlo al pool de trabajadores
+        Si ya hay uno vivo (con heartbeat reciente) pendiente o en ejecución con la misma
+        petición, en cualquier proceso, se devuelve ese en lugar de crear otro
+        """
+        job, created = self.find_or_insert_job(request, user)
+        if created:
+            _executor.submit(run_generation_job, job.id)
+        return job
+    
+    def find_or_insert_job(self, request: ScheduleGenerationRequest,
+                           user: Optional[Usuario] = None) -> Tuple[GenerationJob, bool]:
+        """
+        Trabajo vivo con la misma petición o uno nuevo pendiente, propiedad de este proceso
+        (que debe ejecutarlo); devuelve el trabajo y si se creó
+        """
+        with _create_lock:
+            self._fail_stale_jobs(request.id_carrera)
+            active = self.db.query(GenerationJob).filter(
+                GenerationJob.id_carrera == request.id_carrera,
+                GenerationJob.status.in_([JobStatusEnum.PENDING, JobStatusEnum.RUNNING]),
+                GenerationJob.cancel_requested.is_(False),
+                GenerationJob.accept_requested.is_(False)
+            ).order_by(GenerationJob.created_at).all()
+            # La petición se compara ya leída: no todas las bases comparan columnas JSON
+            for job in active:
+                if job.request == request.model_dump(mode="json"):
+                    return job, False
+            
+            job = GenerationJob(
+                id=str(uuid.uuid4()),
+                id_carrera=request.id_carrera,
+                id_usuario=user.id if user else None,
+                status=JobStatusEnum.PENDING,
+                progress=0.0,
+                request=request.model_dump(),
+                heartbeat_at=datetime.utcnow()
+            )
+            self.db.add(job)
+            self.db.commit()
+            self.db.refresh(job)
+            
+            _own_job(job.id)
+            return job, True
+    
+    def _fail_stale_jobs(self, id_carrera: int):
+        """
+        Marca como fallidos los trabajos pendientes o en ejecución de la carrera cuyo proceso
+        dejó de renovar heartbeat_at (los trabajos no se recuperan tras reiniciar el servidor)
+        """
+        stale_filter = (
+            GenerationJob.id_carrera == id_carrera,
+            GenerationJob.status.in_([JobStatusEnum.PENDING, JobStatusEnum.RUNNING]),
+            or_(
+                GenerationJob.heartbeat_at.is_(None),
+                GenerationJob.heartbeat_at < datetime.utcnow() - timedelta(seconds=settings.GENERATION_JOB_STALE_SECONDS)
+            )
+        )
+        message = "El proceso que ejecutaba el trabajo dejó de responder"
+        for job_id, in self.db.query(GenerationJob.id).filter(*stale_filter).all():
+            # Condicional: pudo renovarse o terminar entre la consulta y la actualización
+            failed = self.db.query(GenerationJob).filter(GenerationJob.id == job_id, *stale_filter).update({
+                "status": JobStatusEnum.FAILED,
+                "message": message,
+                "finished_at": datetime.utcnow()
+            }, synchronize_session=False)
+            if failed:
+                # Evento final para que terminen las transmisiones abiertas del trabajo
+                self.db.add(GenerationJobEvent(
+                    id_job=job_id, tipo="estado", datos={"status": JobStatusEnum.FAILED.value, "message": message}
+                ))
+        self.db.commit()
+    
+    def get_job(self, job_id: str) -> Optional[GenerationJob]:
+        """Obtener trabajo por ID"""
+        return self.db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+    
+    def request_cancel(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Solicitar la cancelación de un trabajo
+        Un trabajo pendiente se cancela de inmediato; uno en ejecución lo detiene su trabajador
+        """
+        job = self.get_job(job_id)
+        if not job:
+            return None
+        
+        # Actualizaciones condicionales: el trabajador puede cambiar el estado en paralelo
+        cancelled = self.db.query(GenerationJob).filter(
+            GenerationJob.id == job_id,
+            GenerationJob.status == JobStatusEnum.PENDING
+        ).update({
+            "status": JobStatusEnum.CANCELLED,
+            "message": "Trabajo cancelado antes de iniciar",
+            "finished_at": datetime.utcnow()
+        }, synchronize_session=False)
+        if not cancelled:
+            self.db.query(GenerationJob).filter(
+                GenerationJob.id == job_id,
+                GenerationJob.status == JobStatusEnum.RUNNING
+            ).update({"cancel_requested": True}, synchronize_session=False)
+        
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+    
+    def request_accept(self, job_id: str) -> Optional[GenerationJob]:
+        """
+        Solicitar que un trabajo en ejecución se detenga conservando las soluciones encontradas
+        (la búsqueda en curso devuelve su mejor solución y el trabajo termina como completado)
+        """
+        job = self.get_job(job_id)
+        if not job:
+            return None
+        
+        self.db.query(GenerationJob).filter(
+            GenerationJob.id == job_id,
+            GenerationJob.status == JobStatusEnum.RUNNING
+        ).update({"accept_requested": True}, synchronize_session=False)
+        
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+    
+    @staticmethod
+    async def stream_events(job_id: str, after: int = 0) -> AsyncIterator[str]:
+        """
+        Eventos del trabajo en formato SSE a partir del evento after (encabezado Last-Event-ID)
+        Consulta la base de datos cada GENERATION_JOB_POLL_SECONDS (en el pool de hilos, sin
+        bloquear el bucle de eventos) y termina cuando el trabajo terminó
+        """
+        while True:
+            job_status, events = await run_in_threadpool(_poll_events, job_id, after)
+            for event_id, tipo, datos in events:
+                after = event_id
+                yield f"id: {event_id}\nevent: {tipo}\ndata: {json.dumps(datos)}\n\n"
+            
+            if job_status not in (JobStatusEnum.PENDING, JobStatusEnum.RUNNING):
+                return
+            await asyncio.sleep(settings.GENERATION_JOB_POLL_SECONDS)
+
+def _poll_events(job_id: str, after: int) -> Tuple[Optional[JobStatusEnum], List[Tuple[int, str, Any]]]:
+    """Estado del trabajo y sus eventos (id, tipo, datos) posteriores a after, en una sesión corta"""
+    db = SessionLocal()
+    try:
+        # El estado se lee antes que los eventos: el evento final se guarda junto con él
+        job_status = db.query(GenerationJob.status).filter(GenerationJob.id == job_id).scalar()
+        events = db.query(GenerationJobEvent.id, GenerationJobEvent.tipo, GenerationJobEvent.datos).filter(
+            GenerationJobEvent.id_job == job_id,
+            GenerationJobEvent.id > after
+        ).order_by(GenerationJobEvent.id).all()
+        return job_status, [tuple(event) for event in events]
+    finally:
+        db.close()
+
+class _JobWatcher(threading.Thread):
+    """
+    Consulta periódicamente la base de datos: guarda los eventos pendientes del trabajo
+    y detiene el optimizador si se solicitó cancelar o aceptar las soluciones actuales
+    """
+    
+    def __init__(self, job_id: str, optimizer: ScheduleOptimizer, events: queue.SimpleQueue):
+        super().__init__(daemon=True, name=f"schedule-job-watch-{job_id[:8]}")
+        self.job_id = job_id
+        self.optimizer = optimizer
+        self.events = events
+        # Eventos ya sacados de la cola cuyo guardado falló; se reintentan en orden
+        self.unsaved: List[Tuple[str, Any]] = []
+        self.stopped = threading.Event()
+    
+    def run(self):
+        stopping = False
+        while not self.stopped.wait(settings.GENERATION_JOB_POLL_SECONDS):
+            db = SessionLocal()
+            try:
+                _flush_events(db, self.job_id, self.events, self.unsaved)
+                cancel_requested, accept_requested = db.query(
+                    GenerationJob.cancel_requested, GenerationJob.accept_requested
+                ).filter(GenerationJob.id == self.job_id).one()
+            except Exception:
+                # Un fallo pasajero no detiene al vigilante: se reintenta en la siguiente consulta
+                db.rollback()
+                logger.exception("Error al vigilar el trabajo de generación %s", self.job_id)
+                continue
+            finally:
+                db.close()
+            
+            # Tras detenerlo se sigue guardando eventos hasta que termine el trabajo
+            if stopping:
+                continue
+            if accept_requested:
+                self.optimizer.accept_incumbent()
+                stopping = True
+            elif cancel_requested:
+                self.optimizer.cancel()
+                stopping = True
+
+def _flush_events(db: Session, job_id: str, events: queue.SimpleQueue, pending: List[Tuple[str, Any]]):
+    """
+    Guarda los eventos (tipo, datos) acumulados por los callbacks del optimizador, después de
+    los de pending; si el guardado falla quedan todos en pending
+    """
+    while True:
+        try:
+            pending.append(events.get_nowait())
+        except queue.Empty:
+            break
+    if pending:
+        db.add_all(GenerationJobEvent(id_job=job_id, tipo=tipo, datos=datos) for tipo, datos in pending)
+        db.commit()
+        pending.clear()
+
+def _update_job(db: Session, job_id: str, **values: Any):
+    db.query(GenerationJob).filter(GenerationJob.id == job_id).update(values, synchronize_session=False)
+    db.commit()
+
+def _finished_duplicate(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Resultado de un trabajo con la misma petición que se completó después de crearse este
+    (mientras esperaba el arrendamiento de la carrera, quizá en otro proceso)
+    """
+    db = SessionLocal()
+    try:
+        job = db.query(GenerationJob).filter(GenerationJob.id == job_id).one()
+        finished = db.query(GenerationJob).filter(
+            GenerationJob.id_carrera == job.id_carrera,
+            GenerationJob.id != job_id,
+            GenerationJob.status == JobStatusEnum.COMPLETED,
+            GenerationJob.finished_at >= job.created_at
+        ).order_by(GenerationJob.finished_at.desc()).all()
+        for other in finished:
+            if other.request == job.request:
+                return {**other.result, "reused_job": other.id}
+        return None
+    finally:
+        db.close()
+
+def run_generation_job(job_id: str, lease_timeout: Optional[float] = None):
+    """
+    Ejecuta un trabajo pendiente (en un hilo del pool, o en el de la petición para
+    /schedule/generate con lease_timeout)
+    """
+    # Sesión propia para el estado del trabajo; el optimizador usa otra para los horarios
+    status_db = SessionLocal()
+    db = SessionLocal()
+    try:
+        # Tomar el trabajo solo si sigue pendiente (pudo cancelarse mientras esperaba)
+        claimed = status_db.query(GenerationJob).filter(
+            GenerationJob.id == job_id,
+            GenerationJob.status == JobStatusEnum.PENDING
+        ).update({"status": JobStatusEnum.RUNNING, "started_at": datetime.utcnow()}, synchronize_session=False)
+        status_db.commit()
+        if not claimed:
+            return
+        
+        job = status_db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+        request = ScheduleGenerationRequest(**job.request)
+        
+        # Los callbacks del solver corren en otros hilos: sus eventos se encolan y los guarda el vigilante
+        events = queue.SimpleQueue()
+        
+        def on_progress(done: int, total: int):
+            _update_job(status_db, job_id, progress=done / total if total else 1.0)
+            events.put(("progreso", {"done": done, "total": total}))
+        
+        def on_incumbent(incumbent: Dict[str, Any]):
+            events.put(("solucion", incumbent))
+        
+        optimizer = ScheduleOptimizer(db, progress_callback=on_progress, incumbent_callback=on_incumbent)
+        watcher = _JobWatcher(job_id, optimizer, events)
+        watcher.start()
+        try:
+            result = run_schedule_request(
+                optimizer, request, lease_timeout=lease_timeout, reuse=lambda: _finished_duplicate(job_id)
+            )
+        finally:
+            watcher.stopped.set()
+            watcher.join()
+        _flush_events(status_db, job_id, events, watcher.unsaved)
+        
+        if result.get("cancelled"):
+            status = JobStatusEnum.CANCELLED
+        elif result["success"]:
+            status = JobStatusEnum.COMPLETED
+        else:
+            status = JobStatusEnum.FAILED
+        
+        values = {"status": status, "message": result["message"], "result": result, "finished_at": datetime.utcnow()}
+        if status == JobStatusEnum.COMPLETED:
+            values["progress"] = 1.0
+        # El evento final se confirma junto con el estado del trabajo
+        status_db.add(GenerationJobEvent(
+            id_job=job_id, tipo="estado", datos={"status": status.value, "message": result["message"]}
+        ))
+        _update_job(status_db, job_id, **values)
+    
+    except Exception as e:
+        status_db.rollback()
+        message = f"Error en la generación: {str(e)}"
+        status_db.add(GenerationJobEvent(
+            id_job=job_id, tipo="estado", datos={"status": JobStatusEnum.FAILED.value, "message": message}
+        ))
+        _update_job(
+            status_db, job_id,
+            status=JobStatusEnum.FAILED,
+            message=message,
+            finished_at=datetime.utcnow()
+        )
+    finally:
+        _disown_job(job_id)
+        db.close()
+        status_db.close()
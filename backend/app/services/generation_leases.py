@@ -0,0 +1,120 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import GenerationLease
+
+class CareerLease:
+    """
+    Arrendamiento en la base de datos de la generación de una o varias carreras
+    
+    Cada carrera tiene a lo más una fila en generation_leases. Tomarla es una sola sentencia
+    condicional (UPDATE de una fila vencida o INSERT que falla si ya existe), así que entre
+    procesos de la API solo una generación la obtiene. Mientras se tiene, un hilo la renueva
+    cada tercio de ttl; si el proceso muere, vence sola. Con varias carreras (generación de
+    universidad) se toman todas o ninguna, en orden de id.
+    Usa sesiones propias y cortas: no interfiere con la transacción del optimizador.
+    """
+    
+    def __init__(self, carreras: Iterable[int], ttl: Optional[float] = None,
+                 session_factory: Callable[[], Session] = SessionLocal):
+        self.carreras = sorted(set(carreras))
+        self.ttl = ttl or settings.GENERATION_LEASE_TTL_SECONDS
+        self.session_factory = session_factory
+        self.holder = str(uuid.uuid4())
+        self._renewal_stop = threading.Event()
+        self._renewal: Optional[threading.Thread] = None
+    
+    def acquire(self, timeout: Optional[float] = None, stop: Callable[[], bool] = lambda: False) -> bool:
+        """
+        Espera hasta tener el arrendamiento de todas las carreras; devuelve False si pasan
+        timeout segundos (None = sin límite) o stop() devuelve True antes de obtenerlo
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_acquire():
+            if stop():
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(settings.GENERATION_JOB_POLL_SECONDS if remaining is None
+                       else min(settings.GENERATION_JOB_POLL_SECONDS, remaining))
+        
+        self._renewal_stop.clear()
+        self._renewal = threading.Thread(target=self._renew, daemon=True, name=f"generation-lease-{self.holder[:8]}")
+        self._renewal.start()
+        return True
+    
+    def release(self):
+        """Libera las carreras (solo las filas que siguen siendo de este arrendamiento)"""
+        if self._renewal:
+            self._renewal_stop.set()
+            self._renewal.join()
+            self._renewal = None
+        db = self.session_factory()
+        try:
+            self._delete(db)
+            db.commit()
+        finally:
+            db.close()
+    
+    def _try_acquire(self) -> bool:
+        db = self.session_factory()
+        try:
+            for id_carrera in self.carreras:
+                if not self._take(db, id_carrera):
+                    # Todas o ninguna: se sueltan las ya tomadas en este intento
+                    self._delete(db)
+                    db.commit()
+                    return False
+            return True
+        finally:
+            db.close()
+    
+    def _take(self, db: Session, id_carrera: int) -> bool:
+        """Toma la fila de la carrera si está vencida o no existe (cada caso confirmado por separado)"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        taken = db.query(GenerationLease).filter(
+            GenerationLease.id_carrera == id_carrera,
+            or_(GenerationLease.expires_at < now, GenerationLease.holder == self.holder)
+        ).update({"holder": self.holder, "expires_at": expires_at}, synchronize_session=False)
+        if taken:
+            db.commit()
+            return True
+        
+        db.add(GenerationLease(id_carrera=id_carrera, holder=self.holder, expires_at=expires_at))
+        try:
+            db.commit()
+            return True
+        except IntegrityError:
+            # Otra generación tiene la carrera
+            db.rollback()
+            return False
+    
+    def _renew(self):
+        while not self._renewal_stop.wait(self.ttl / 3):
+            db = self.session_factory()
+            try:
+                db.query(GenerationLease).filter(
+                    GenerationLease.id_carrera.in_(self.carreras),
+                    GenerationLease.holder == self.holder
+                ).update({"expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)}, synchronize_session=False)
+                db.commit()
+            except Exception:
+                # Un fallo pasajero no detiene la generación; se reintenta en la siguiente renovación
+                db.rollback()
+            finally:
+                db.close()
+    
+    def _delete(self, db: Session):
+        db.query(GenerationLease).filter(
+            GenerationLease.id_carrera.in_(self.carreras),
+            GenerationLease.holder == self.holder
+        ).delete(synchronize_session=False)
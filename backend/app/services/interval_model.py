@@ -0,0 +1,220 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+import numpy as np
+from ortools.sat.python import cp_model
+from app.services.symmetry import professor_precedence
+
+Domain = cp_model.Domain
+
+def split_hours(horas: int, block_hours: int) -> List[int]:
+    """Divide las horas semanales en bloques de a lo más block_hours (p. ej. 5 → 2 + 2 + 1)"""
+    blocks = [block_hours] * (horas // block_hours)
+    if horas % block_hours:
+        blocks.append(horas % block_hours)
+    return blocks
+
+class IntervalSchedule:
+    """
+    Formulación por bloques de varias horas con variables de intervalo.
+    
+    El tiempo se numera t = día × n_horas + hora. Cada clase se divide en bloques
+    (split_hours), cada bloque tiene un inicio entero dentro de un mismo día y cada
+    clase elige un solo profesor. Los choques se evitan con AddNoOverlap por grupo
+    y por profesor (intervalos opcionales presentes si el profesor es el elegido); las
+    horas no disponibles de cada profesor entran a su NoOverlap como intervalos fijos.
+    
+    Expone la misma interfaz que AssignmentTensor para el resto del flujo: la
+    solución se lee como tensor clase × profesor × día × hora.
+    """
+    
+    def __init__(self, unit, model: cp_model.CpModel, block_hours: int):
+        grid = unit.grid
+        self.model = model
+        self.n_horas = grid.n_horas
+        self.availability = unit.availability
+        self.shape = (unit.n_clases, unit.n_profesores, grid.n_dias, grid.n_horas)
+        first_variable = len(model.Proto().variables)
+        # Sin los profesores que solo renombran a otros intercambiables (un profesor por clase).
+        # Los grupos intercambiables no se ordenan: fijar el orden de sus inicios hizo más
+        # lenta la búsqueda en los benchmarks (compite con el orden de bloques de cada materia)
+        eligibility = professor_precedence(unit, [1] * unit.n_clases) if unit.symmetry_breaking else unit.eligibility
+        
+        # Inicios válidos por duración: las L horas disponibles y dentro del mismo día
+        lengths = sorted({length for horas in unit.clase_horas for length in split_hours(horas, block_hours)})
+        valid_starts = {length: self._valid_starts(unit.availability, length) for length in lengths}
+        
+        self.choice: Dict[Tuple[int, int], cp_model.IntVar] = {}
+        self.blocks: List[Tuple[int, int, cp_model.IntVar]] = []  # (clase, duración, inicio)
+        profesor_intervals = defaultdict(list)
+        grupo_intervals = defaultdict(list)
+        grupo_dia_horas = defaultdict(list)
+        profesor_horas = defaultdict(list)
+        
+        for c_idx, horas in enumerate(unit.clase_horas):
+            clase_lengths = split_hours(horas, block_hours)
+            # Profesores habilitados con algún inicio válido para cada bloque
+            eligible = [
+                p_idx for p_idx in np.flatnonzero(eligibility[c_idx]).tolist()
+                if all(valid_starts[length][p_idx] for length in clase_lengths)
+            ]
+            choices = {p_idx: model.NewBoolVar(f"y_c{c_idx}_p{p_idx}") for p_idx in eligible}
+            # Sin profesores posibles la restricción vacía vuelve la unidad infactible
+            model.AddExactlyOne(choices.values())
+            if not choices:
+                continue
+            for p_idx, choice in choices.items():
+                self.choice[c_idx, p_idx] = choice
+                profesor_horas[p_idx].append((horas, choice))
+            
+            days = []
+            previous = None
+            for b_idx, length in enumerate(clase_lengths):
+                starts = sorted({t for p_idx in eligible for t in valid_starts[length][p_idx]})
+                start = model.NewIntVarFromDomain(Domain.FromValues(starts), f"s_c{c_idx}_b{b_idx}")
+                for p_idx, choice in choices.items():
+                    profesor_intervals[p_idx].append(
+                        model.NewOptionalFixedSizeIntervalVar(start, length, choice, f"i_c{c_idx}_b{b_idx}_p{p_idx}")
+                    )
+                grupo_intervals[unit.clase_grupo[c_idx]].append(
+                    model.NewFixedSizeIntervalVar(start, length, f"i_c{c_idx}_b{b_idx}")
+                )
+                
+                day = model.NewIntVar(0, grid.n_dias - 1, f"d_c{c_idx}_b{b_idx}")
+                model.AddDivisionEquality(day, start, grid.n_horas)
+                days.append(day)
+                if grid.daily_cap is not None:
+                    # Día del bloque como literales, para sumar las horas del grupo por día
+                    on_day = [model.NewBoolVar(f"d_c{c_idx}_b{b_idx}_{dia_idx}") for dia_idx in range(grid.n_dias)]
+                    model.AddExactlyOne(on_day)
+                    model.Add(day == sum(dia_idx * literal for dia_idx, literal in enumerate(on_day)))
+                    for dia_idx, literal in enumerate(on_day):
+                        grupo_dia_horas[unit.clase_grupo[c_idx], dia_idx].append(length * literal)
+                
+                # Bloques de igual duración son intercambiables: se ordenan por inicio
+                if previous is not None and previous[0] == length:
+                    model.Add(previous[1] < start)
+                previous = (length, start)
+                self.blocks.append((c_idx, length, start))
+            
+            # Los bloques de una misma materia van en días distintos (si caben en la semana)
+            if 1 < len(days) <= grid.n_dias:
+                model.AddAllDifferent(days)
+        
+        # Un profesor no puede estar en dos lugares al mismo tiempo ni fuera de su disponibilidad
+        for p_idx, intervals in profesor_intervals.items():
+            for start, length in self._unavailable_runs(unit.availability[p_idx]):
+                intervals.append(model.NewFixedSizeIntervalVar(start, length, f"off_p{p_idx}_{start}"))
+            model.AddNoOverlap(intervals)
+        
+        # El grupo no puede tener dos materias al mismo tiempo ni más de max_horas_diarias horas al día
+        for intervals in grupo_intervals.values():
+            model.AddNoOverlap(intervals)
+        for horas in grupo_dia_horas.values():
+            model.Add(sum(horas) <= grid.daily_cap)
+        
+        # Optimización para PTC: mínimo 20 horas, máximo 40 horas (los que pueden dar clase en la unidad)
+        for p_idx in unit.bounded_ptc:
+            model.AddLinearConstraint(
+                sum(horas * choice for horas, choice in profesor_horas[p_idx]), *unit.ptc_range(p_idx)
+            )
+        
+        self._size = len(model.Proto().variables) - first_variable
+    
+    def _valid_starts(self, availability: np.ndarray, length: int) -> List[List[int]]:
+        """Por profesor, los inicios t donde las length horas siguientes están disponibles en el mismo día"""
+        n_profesores, n_dias, n_horas = availability.shape
+        if length > n_horas:
+            return [[] for _ in range(n_profesores)]
+        window = np.ones((n_profesores, n_dias, n_horas - length + 1), dtype=bool)
+        for offset in range(length):
+            window &= availability[:, :, offset:n_horas - length + 1 + offset]
+        profesores, dias, horas = np.nonzero(window)
+        starts = [[] for _ in range(n_profesores)]
+        for p_idx, t in zip(profesores.tolist(), (dias * n_horas + horas).tolist()):
+            starts[p_idx].append(t)
+        return starts
+    
+    def _unavailable_runs(self, availability: np.ndarray) -> List[Tuple[int, int]]:
+        """Tramos (inicio t, duración) de horas no disponibles de un profesor, sin cruzar de día"""
+        runs = []
+        for dia_idx, horas in enumerate(availability):
+            h_idx = 0
+            while h_idx < len(horas):
+                if horas[h_idx]:
+                    h_idx += 1
+                    continue
+                end = h_idx
+                while end < len(horas) and not horas[end]:
+                    end += 1
+                runs.append((dia_idx * self.n_horas + h_idx, end - h_idx))
+                h_idx = end
+        return runs
+    
+    @property
+    def size(self) -> int:
+        """Número de variables creadas"""
+        return self._size
+    
+    @property
+    def dense_size(self) -> int:
+        """Número de celdas del tensor booleano equivalente (variables sin poda)"""
+        return int(np.prod(self.shape))
+    
+    def _chosen(self, solver: cp_model.CpSolver) -> Dict[int, int]:
+        return {c_idx: p_idx for (c_idx, p_idx), choice in self.choice.items() if solver.BooleanValue(choice)}
+    
+    def values(self, solver: cp_model.CpSolver) -> np.ndarray:
+        """Solución como tensor clase × profesor × día × hora (1 en cada hora de cada bloque)"""
+        values = np.zeros(self.shape, dtype=np.int8)
+        chosen = self._chosen(solver)
+        for c_idx, length, start in self.blocks:
+            dia_idx, h_idx = divmod(solver.Value(start), self.n_horas)
+            values[c_idx, chosen[c_idx], dia_idx, h_idx:h_idx + length] = 1
+        return values
+    
+    def add_hints(self, values: np.ndarray):
+        """Sugiere como profesor de cada clase el que tenía en values"""
+        taught = np.asarray(values).any(axis=(2, 3))
+        for (c_idx, p_idx), choice in self.choice.items():
+            self.model.AddHint(choice, int(taught[c_idx, p_idx]))
+    
+    def fix_true(self, cells: np.ndarray) -> int:
+        """
+        Fija el profesor de las clases cuyas celdas indicadas tienen un único profesor,
+        disponible aún en todas ellas; devuelve cuántas clases se fijaron
+        """
+        profesores = defaultdict(set)
+        unavailable = set()
+        for c_idx, p_idx, dia_idx, h_idx in np.asarray(cells, dtype=np.int64).reshape(-1, 4).tolist():
+            profesores[c_idx].add(p_idx)
+            if not self.availability[p_idx, dia_idx, h_idx]:
+                unavailable.add(c_idx)
+        fixed = 0
+        for c_idx, p_idxs in profesores.items():
+            choice = self.choice.get((c_idx, next(iter(p_idxs))))
+            if len(p_idxs) == 1 and choice is not None and c_idx not in unavailable:
+                self.model.Add(choice == 1)
+                fixed += 1
+        return fixed
+    
+    def add_max_overlap(self, values: np.ndarray, max_shared: int):
+        """
+        Limita a max_shared las horas de bloques que quedan, con el mismo profesor, dentro de
+        horas que la clase ya tenía en values (tensor clase × profesor × día × hora, como
+        una solución anterior o un horario guardado)
+        """
+        values = np.asarray(values, dtype=bool)
+        kept = []
+        for c_idx, length, start in self.blocks:
+            for p_idx in np.flatnonzero(values[c_idx].any(axis=(1, 2))).tolist():
+                choice = self.choice.get((c_idx, p_idx))
+                starts = self._valid_starts(values[c_idx, p_idx][None], length)[0]
+                if choice is None or not starts:
+                    continue
+                same = self.model.NewBoolVar("")
+                # same debe ser 1 si el bloque empieza donde sus length horas ya eran de la clase con este profesor
+                self.model.AddLinearExpressionInDomain(start, Domain.FromValues(starts).Complement()).OnlyEnforceIf(
+                    [same.Not(), choice]
+                )
+                kept.append(length * same)
+        self.model.Add(sum(kept) <= max_shared)
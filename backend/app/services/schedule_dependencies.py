@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models import Grupo, HorarioGenerado, HorarioPendiente
+
+class ScheduleDependencyService:
+    """
+    Servicio que marca como pendientes los horarios afectados por un cambio.
+    
+    Las dependencias de cada (grupo, versión) son los profesores y materias de sus
+    filas en horarios_generados (indexadas por id_profesor e id_materia). Las marcas
+    se agregan a la sesión sin confirmar: se guardan en la misma transacción que el cambio.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def mark_profesor(self, profesor_id: int, motivo: str) -> int:
+        """Marcar los horarios en los que imparte clase un profesor"""
+        pairs = self.db.query(HorarioGenerado.id_grupo, HorarioGenerado.version_horario).filter(
+            HorarioGenerado.id_profesor == profesor_id
+        ).distinct().all()
+        return self._mark(pairs, motivo)
+    
+    def mark_materias(self, materia_ids: Iterable[int], motivo: str) -> int:
+        """Marcar los horarios que incluyen alguna de las materias"""
+        materia_ids = set(materia_ids)
+        if not materia_ids:
+            return 0
+        pairs = self.db.query(HorarioGenerado.id_grupo, HorarioGenerado.version_horario).filter(
+            HorarioGenerado.id_materia.in_(materia_ids)
+        ).distinct().all()
+        return self._mark(pairs, motivo)
+    
+    def mark_grupos(self, grupo_ids: Iterable[int], motivo: str) -> int:
+        """Marcar los horarios guardados de los grupos (p. ej. al cambiar su cuadrícula)"""
+        grupo_ids = set(grupo_ids)
+        if not grupo_ids:
+            return 0
+        pairs = self.db.query(HorarioGenerado.id_grupo, HorarioGenerado.version_horario).filter(
+            HorarioGenerado.id_grupo.in_(grupo_ids)
+        ).distinct().all()
+        return self._mark(pairs, motivo)
+    
+    def mark_cuatrimestre(self, carrera_id: int, cuatrimestre: int, motivo: str) -> int:
+        """Marcar los horarios de los grupos de un cuatrimestre (p. ej. al agregar una materia)"""
+        pairs = self.db.query(HorarioGenerado.id_grupo, HorarioGenerado.version_horario).join(
+            Grupo, Grupo.id == HorarioGenerado.id_grupo
+        ).filter(
+            Grupo.id_carrera == carrera_id,
+            Grupo.cuatrimestre == cuatrimestre
+        ).distinct().all()
+        return self._mark(pairs, motivo)
+    
+    def get_pendientes(self, carrera_id: int, cuatrimestre: Optional[int] = None) -> List[HorarioPendiente]:
+        """Obtener los horarios pendientes de una carrera"""
+        query = self.db.query(HorarioPendiente).join(Grupo).filter(Grupo.id_carrera == carrera_id)
+        if cuatrimestre:
+            query = query.filter(Grupo.cuatrimestre == cuatrimestre)
+        return query.order_by(HorarioPendiente.id_grupo, HorarioPendiente.version_horario).all()
+    
+    def _mark(self, pairs: Iterable[Tuple[int, int]], motivo: str) -> int:
+        pairs = set(pairs)
+        if not pairs:
+            return 0
+        
+        # Las marcas ya existentes se leen en una sola consulta, no una por grupo y versión
+        existing = {
+            (pendiente.id_grupo, pendiente.version_horario): pendiente
+            for pendiente in self.db.query(HorarioPendiente).filter(
+                HorarioPendiente.id_grupo.in_({id_grupo for id_grupo, _ in pairs})
+            )
+        }
+        marcado_en = datetime.utcnow()
+        count = 0
+        for id_grupo, version in pairs:
+            pendiente = existing.get((id_grupo, version))
+            if pendiente is None:
+                pendiente = HorarioPendiente(id_grupo=id_grupo, version_horario=version)
+                self.db.add(pendiente)
+            pendiente.motivo = motivo
+            pendiente.marcado_en = marcado_en
+            count += 1
+        return count
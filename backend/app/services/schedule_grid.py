@@ -0,0 +1,101 @@
+from dataclasses import dataclass, field
+from datetime import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from app.models.models import DiaSemanaEnum
+
+DEFAULT_HORAS_INICIO = (7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20)  # 7:00 AM a 8:00 PM
+DEFAULT_SLOT_MINUTES = 60
+DEFAULT_MAX_HORAS_DIARIAS = 8
+
+@dataclass(frozen=True)
+class ScheduleGrid:
+    """
+    Esqueleto de tiempo del modelo (días, bloques y sus índices).
+    
+    Es inmutable y se comparte entre resoluciones: cada modelo CP-SAT es nuevo,
+    pero la estructura día × bloque sobre la que se indexa no cambia. Cada bloque
+    es una "hora" de clase de slot_minutes minutos; los recesos quedan fuera de los
+    bloques. max_horas_diarias limita los bloques de cada grupo por día (None: sin límite).
+    """
+    dias_semana: Tuple[DiaSemanaEnum, ...]
+    slot_starts: Tuple[int, ...]    # minutos desde la medianoche en que inicia cada bloque
+    slot_minutes: int = DEFAULT_SLOT_MINUTES
+    max_horas_diarias: Optional[int] = None
+    dia_index: Dict[DiaSemanaEnum, int] = field(init=False, repr=False, compare=False)
+    slot_index: Dict[time, int] = field(init=False, repr=False, compare=False)
+    slot_times: Tuple[Tuple[time, time], ...] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "dia_index", {dia: idx for idx, dia in enumerate(self.dias_semana)})
+        object.__setattr__(self, "slot_times", tuple(
+            (_to_time(start), _to_time(start + self.slot_minutes)) for start in self.slot_starts
+        ))
+        object.__setattr__(self, "slot_index", {inicio: idx for idx, (inicio, _) in enumerate(self.slot_times)})
+    
+    @property
+    def n_dias(self) -> int:
+        return len(self.dias_semana)
+    
+    @property
+    def n_horas(self) -> int:
+        return len(self.slot_starts)
+    
+    @property
+    def n_slots(self) -> int:
+        return self.n_dias * self.n_horas
+    
+    @property
+    def daily_cap(self) -> Optional[int]:
+        """Límite diario por grupo solo si restringe algo (menor que los bloques del día)"""
+        if self.max_horas_diarias is None or self.max_horas_diarias >= self.n_horas:
+            return None
+        return self.max_horas_diarias
+    
+    @property
+    def horas_por_dia(self) -> int:
+        """Bloques que un grupo puede ocupar en un día"""
+        return self.n_horas if self.daily_cap is None else self.daily_cap
+    
+    def overlapping_slots(self, inicio: time, fin: time) -> List[int]:
+        """Índices de los bloques que se traslapan con el rango [inicio, fin)"""
+        start = inicio.hour * 60 + inicio.minute
+        end = fin.hour * 60 + fin.minute
+        return [
+            h_idx for h_idx, slot_start in enumerate(self.slot_starts)
+            if slot_start < end and start < slot_start + self.slot_minutes
+        ]
+
+def _to_time(minutes: int) -> time:
+    return time(minutes // 60, minutes % 60)
+
+def build_slot_starts(inicio: int, fin: int, slot_minutes: int,
+                      recesos: Sequence[Tuple[int, int]] = ()) -> Tuple[int, ...]:
+    """
+    Inicios (minutos) de los bloques de slot_minutes entre inicio y fin; un bloque que
+    se traslaparía con un receso empieza al terminar el receso
+    """
+    starts = []
+    start = inicio
+    while start + slot_minutes <= fin:
+        receso = next((r for r in sorted(recesos) if r[0] < start + slot_minutes and start < r[1]), None)
+        if receso is not None:
+            start = receso[1]
+            continue
+        starts.append(start)
+        start += slot_minutes
+    return tuple(starts)
+
+@lru_cache(maxsize=32)
+def get_schedule_grid(dias_semana: Tuple[DiaSemanaEnum, ...], slot_starts: Tuple[int, ...],
+                      slot_minutes: int = DEFAULT_SLOT_MINUTES,
+                      max_horas_diarias: Optional[int] = None) -> ScheduleGrid:
+    """Devuelve el esqueleto de tiempo cacheado para una configuración de días y bloques"""
+    return ScheduleGrid(dias_semana, slot_starts, slot_minutes, max_horas_diarias)
+
+def default_schedule_grid() -> ScheduleGrid:
+    """Cuadrícula de las carreras sin configuración propia: lunes a sábado, de 7:00 a 21:00 en horas"""
+    return get_schedule_grid(
+        tuple(DiaSemanaEnum), tuple(hora * 60 for hora in DEFAULT_HORAS_INICIO),
+        DEFAULT_SLOT_MINUTES, DEFAULT_MAX_HORAS_DIARIAS
+    )
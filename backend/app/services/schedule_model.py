@@ -0,0 +1,297 @@
+import math
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from ortools.sat.python import cp_model
+from app.services.assignment_tensor import AssignmentTensor
+from app.services.feasibility import PTC_MAX_HORAS, PTC_MIN_HORAS, infeasible_core
+from app.services.interval_model import IntervalSchedule
+from app.services.schedule_grid import ScheduleGrid
+from app.services.solver_parameters import SolverParameters, solver_status_name
+from app.services.symmetry import equivalent_groups, professor_precedence
+
+try:
+    import resource
+except ImportError:  # Windows: sin getrusage no se reporta la memoria máxima
+    resource = None
+
+@dataclass
+class SolveUnit:
+    """
+    Datos en memoria de una unidad de resolución (grupos × versiones).
+    
+    No guarda objetos ORM ni depende de la sesión de base de datos, por lo que
+    puede resolverse en otro proceso. Cada clase es un par (grupo, materia).
+    """
+    versions: List[int]             # versiones a obtener del mismo modelo
+    grid: ScheduleGrid
+    carrera_id: int
+    grupo_ids: List[int]
+    clase_grupo: List[int]          # índice en grupo_ids del grupo de cada clase
+    clase_materia: List[int]        # id de la materia de cada clase
+    clase_horas: List[int]          # horas semanales de cada clase
+    profesor_ids: List[int]
+    profesor_ptc: List[bool]        # profesor de tiempo completo
+    eligibility: np.ndarray         # clase × profesor
+    availability: np.ndarray        # profesor × día × hora
+    params: SolverParameters = field(default_factory=SolverParameters)
+    # "boolean": una variable por hora; "interval": bloques de hasta block_hours horas
+    engine: str = "boolean"
+    block_hours: int = 2
+    # Celdas (clase, profesor, día, hora) en que debe diferir cada versión de las anteriores
+    min_hamming_distance: int = 2
+    # Ordenar profesores y grupos intercambiables (ver app.services.symmetry)
+    symmetry_breaking: bool = True
+    # Rango (mínimo, máximo) de horas de cada PTC en la unidad; None = 20 a 40 para todos
+    ptc_horas: Optional[List[Tuple[int, int]]] = None
+    # Arranque en caliente (una sola versión): filas (clase, profesor, día, hora) del horario guardado
+    hints: Optional[np.ndarray] = None
+    # Subconjunto de hints que se fija a 1 (asignaciones no afectadas por el cambio)
+    fixed: Optional[np.ndarray] = None
+    # Horarios guardados de otras versiones de los grupos, de los que cada versión debe diferir
+    # como de las anteriores: filas (referencia, clase, profesor, día, hora)
+    references: Optional[np.ndarray] = None
+    # Nombres para los diagnósticos de factibilidad (por grupo, por clase y por profesor)
+    grupo_nombres: List[str] = field(default_factory=list)
+    clase_nombres: List[str] = field(default_factory=list)
+    profesor_nombres: List[str] = field(default_factory=list)
+    
+    @property
+    def n_clases(self) -> int:
+        return len(self.clase_materia)
+    
+    @property
+    def n_profesores(self) -> int:
+        return len(self.profesor_ids)
+    
+    def ptc_range(self, p_idx: int) -> Tuple[int, int]:
+        """Horas (mínimo, máximo) que debe impartir en la unidad el PTC p_idx"""
+        return self.ptc_horas[p_idx] if self.ptc_horas is not None else (PTC_MIN_HORAS, PTC_MAX_HORAS)
+    
+    @property
+    def bounded_ptc(self) -> List[int]:
+        """
+        PTC a los que se aplica su rango de horas (ptc_range): los que tienen alguna celda en
+        la unidad (una clase habilitada y una hora disponible). Un PTC que no puede impartir
+        ninguna materia de estos grupos no tiene variables y su carga se cumple en otros.
+        """
+        usable = self.eligibility.any(axis=0) & self.availability.any(axis=(1, 2))
+        return [p_idx for p_idx, is_ptc in enumerate(self.profesor_ptc) if is_ptc and usable[p_idx]]
+
+@dataclass
+class UnitSolution:
+    """Resultado de resolver una SolveUnit"""
+    version: int
+    grupo_ids: List[int]
+    status: str
+    feasible: bool
+    assignments: np.ndarray         # filas (clase, profesor, día, hora) asignadas
+    build_time: float
+    solve_time: float
+    variables: Dict[str, int]
+    fixed: int = 0                  # asignaciones fijadas del horario anterior
+    # Telemetría de la resolución (tamaño del modelo al resolver esta versión y estadísticas de CP-SAT)
+    num_variables: int = 0
+    num_constraints: int = 0
+    num_conflicts: int = 0
+    num_branches: int = 0
+    objective: Optional[float] = None
+    peak_rss_kb: Optional[int] = None
+    # Restricciones en conflicto si la unidad resultó infactible (núcleo de suposiciones)
+    conflicts: List[Dict[str, Any]] = field(default_factory=list)
+    # Soluciones que reportó CP-SAT durante la búsqueda (ver IncumbentRecorder)
+    incumbents: List[Dict[str, Any]] = field(default_factory=list)
+    # Tomada de la caché de soluciones en lugar de resolver (ver SolutionCache)
+    cached: bool = False
+
+class IncumbentRecorder(cp_model.CpSolverSolutionCallback):
+    """
+    Registra cada solución que CP-SAT encuentra durante la búsqueda (incumbente) con su
+    objetivo y tiempo, y la reporta a on_incumbent en cuanto ocurre.
+    
+    Se invoca desde los hilos del solver: on_incumbent no debe usar la sesión de base de datos.
+    Sin función objetivo (modelo de factibilidad) el objetivo se reporta como None y la
+    búsqueda termina con la primera solución.
+    """
+    
+    def __init__(self, version: int, grupo_ids: List[int], has_objective: bool,
+                 on_incumbent: Optional[Callable[[Dict[str, Any]], None]] = None):
+        super().__init__()
+        self.version = version
+        self.grupo_ids = grupo_ids
+        self.has_objective = has_objective
+        self.on_incumbent = on_incumbent
+        self.incumbents: List[Dict[str, Any]] = []
+    
+    def on_solution_callback(self):
+        incumbent = {
+            "version": self.version,
+            "grupo_ids": self.grupo_ids,
+            "objective": self.ObjectiveValue() if self.has_objective else None,
+            "best_bound": self.BestObjectiveBound() if self.has_objective else None,
+            "wall_time": self.WallTime(),
+            "timestamp": datetime.utcnow().isoformat()
+        }
+        self.incumbents.append(incumbent)
+        if self.on_incumbent:
+            self.on_incumbent(incumbent)
+
+def peak_rss_kb() -> Optional[int]:
+    """Memoria residente máxima de este proceso en KB (None si la plataforma no la reporta)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS la reporta en bytes; Linux en KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def build_model(unit: SolveUnit, model: cp_model.CpModel) -> AssignmentTensor:
+    """Crea las variables y restricciones de la unidad en el modelo"""
+    grid = unit.grid
+    shape = (unit.n_clases, unit.n_profesores, grid.n_dias, grid.n_horas)
+    
+    # Variables de decisión: solo pares materia-profesor habilitados y en horarios disponibles
+    # (sin los que solo renombran profesores intercambiables, ver app.services.symmetry)
+    eligibility = professor_precedence(unit, unit.clase_horas) if unit.symmetry_breaking else unit.eligibility
+    mask = eligibility[:, :, None, None] & unit.availability[None, :, :, :]
+    assignments = AssignmentTensor(model, shape, mask=mask)
+    index = assignments.index
+    
+    # Restricción 1: Cada materia de cada grupo debe cumplir sus horas semanales
+    for c_idx, horas in enumerate(unit.clase_horas):
+        assignments.add_sum_equal(index[c_idx], horas)
+    
+    # Restricción 2: Un profesor no puede estar en dos lugares al mismo tiempo
+    # filas (profesor, día, hora) → clases de todos los grupos del modelo
+    assignments.add_at_most_one_per_row(index.transpose(1, 2, 3, 0).reshape(-1, unit.n_clases))
+    
+    # Restricción 3: El grupo no puede tener dos materias al mismo tiempo
+    # filas (día, hora) → clases del grupo × profesores
+    # y, si la cuadrícula lo limita, a lo más max_horas_diarias horas por día
+    clase_grupo = np.asarray(unit.clase_grupo)
+    for g_idx in range(len(unit.grupo_ids)):
+        rows = np.flatnonzero(clase_grupo == g_idx)
+        if rows.size:
+            assignments.add_at_most_one_per_row(index[rows].transpose(2, 3, 0, 1).reshape(grid.n_slots, -1))
+            if grid.daily_cap is not None:
+                for dia_idx in range(grid.n_dias):
+                    assignments.add_sum_between(index[rows][:, :, dia_idx], 0, grid.daily_cap)
+    
+    # Restricción 4: Disponibilidad de profesores
+    # (implícita: las celdas no disponibles no tienen variable)
+    
+    # Restricción 5: Optimización para PTC (40 horas semanales)
+    # Mínimo 20 horas, máximo 40 horas (solo los PTC que pueden dar clase en la unidad)
+    for p_idx in unit.bounded_ptc:
+        assignments.add_sum_between(index[:, p_idx], *unit.ptc_range(p_idx))
+    
+    # Ruptura de simetrías: los grupos intercambiables se ordenan por el horario (suma
+    # de bloques t = día × n_horas + hora) de su primera materia
+    if unit.symmetry_breaking:
+        slot = np.arange(grid.n_slots).reshape(grid.n_dias, grid.n_horas)
+        for members in equivalent_groups(unit):
+            for clases, next_clases in zip(members, members[1:]):
+                assignments.add_order(index[clases[0]], index[next_clases[0]], slot)
+    
+    return assignments
+
+def build_schedule(unit: SolveUnit, model: cp_model.CpModel):
+    """Construye la unidad con el motor indicado (AssignmentTensor o IntervalSchedule) y agrega los hints"""
+    if unit.engine == "interval":
+        schedule = IntervalSchedule(unit, model, unit.block_hours)
+    else:
+        schedule = build_model(unit, model)
+    
+    if unit.hints is not None and len(unit.hints):
+        hinted = np.zeros(schedule.shape, dtype=np.int8)
+        hinted[tuple(unit.hints.T)] = 1
+        schedule.add_hints(hinted)
+    
+    return schedule
+
+def solve_unit(unit: SolveUnit,
+               on_solver: Optional[Callable[[cp_model.CpSolver], bool]] = None,
+               on_incumbent: Optional[Callable[[Dict[str, Any]], None]] = None,
+               diagnose: bool = True) -> List[UnitSolution]:
+    """
+    Construye el modelo de la unidad una sola vez y obtiene una solución por versión
+    on_solver recibe cada solver antes de resolver (p. ej. para poder detenerlo); si
+    devuelve False no se resuelven más versiones
+    on_incumbent recibe cada solución encontrada durante la búsqueda (IncumbentRecorder)
+    Si fijar las asignaciones anteriores vuelve el modelo infactible, se resuelve
+    de nuevo solo con hints; si aun así es infactible se busca el núcleo de
+    restricciones en conflicto (salvo con diagnose=False)
+    """
+    solutions = _solve_versions(unit, on_solver, on_incumbent, fix=unit.fixed is not None)
+    if solutions and solutions[0].fixed and solutions[0].status == "INFEASIBLE":
+        solutions = _solve_versions(unit, on_solver, on_incumbent, fix=False)
+    if diagnose and solutions and solutions[0].status == "INFEASIBLE":
+        solutions[0].conflicts = infeasible_core(unit)
+    return solutions
+
+def _solve_versions(unit: SolveUnit, on_solver: Optional[Callable[[cp_model.CpSolver], bool]],
+                    on_incumbent: Optional[Callable[[Dict[str, Any]], None]], fix: bool) -> List[UnitSolution]:
+    model = cp_model.CpModel()
+    build_start = perf_counter()
+    assignments = build_schedule(unit, model)
+    fixed = assignments.fix_true(unit.fixed) if fix else 0
+    build_time = perf_counter() - build_start
+    variables = {"dense": assignments.dense_size, "created": assignments.size}
+    
+    # Dos horarios de a y b horas con c celdas en común difieren en a + b - 2c celdas (con
+    # intervalos: horas de bloques movidos); entre soluciones del modelo a = b = total
+    total = sum(unit.clase_horas)
+    max_shared = total - math.ceil(unit.min_hamming_distance / 2)
+    if unit.references is not None:
+        for ref_idx in np.unique(unit.references[:, 0]).tolist():
+            cells = unit.references[unit.references[:, 0] == ref_idx, 1:]
+            reference = np.zeros(assignments.shape, dtype=np.int8)
+            reference[tuple(cells.T)] = 1
+            assignments.add_max_overlap(reference, (total + len(cells) - unit.min_hamming_distance) // 2)
+    
+    solutions = []
+    for version in unit.versions:
+        solver = cp_model.CpSolver()
+        unit.params.apply(solver)
+        if unit.engine == "interval":
+            # Con miles de intervalos opcionales el sondeo del presolve cuesta más que la búsqueda
+            solver.parameters.cp_model_probing_level = 0
+        # StopSearch() antes de Solve() no tiene efecto: la detención se decide aquí
+        if on_solver and on_solver(solver) is False:
+            break
+        has_objective = model.Proto().HasField("objective")
+        recorder = IncumbentRecorder(version, unit.grupo_ids, has_objective, on_incumbent)
+        status = solver.Solve(model, recorder)
+        
+        feasible = status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+        values = assignments.values(solver) if feasible else None
+        
+        # El modelo se construyó una vez: su tamaño se reporta solo con la primera versión
+        first = not solutions
+        solutions.append(UnitSolution(
+            version=version,
+            grupo_ids=unit.grupo_ids,
+            status=solver_status_name(status, solver),
+            feasible=feasible,
+            assignments=np.argwhere(values == 1) if feasible else np.empty((0, 4), dtype=np.int64),
+            build_time=build_time if first else 0.0,
+            solve_time=solver.WallTime(),
+            variables=variables if first else {},
+            fixed=fixed if first else 0,
+            incumbents=recorder.incumbents,
+            num_variables=len(model.Proto().variables),
+            num_constraints=len(model.Proto().constraints),
+            num_conflicts=solver.NumConflicts(),
+            num_branches=solver.NumBranches(),
+            objective=solver.ObjectiveValue() if has_objective and feasible else None,
+            peak_rss_kb=peak_rss_kb()
+        ))
+        if not feasible:
+            break
+        
+        # Corte de diversidad: las versiones siguientes comparten a lo sumo max_shared celdas con esta
+        assignments.add_max_overlap(values, max_shared)
+    
+    return solutions
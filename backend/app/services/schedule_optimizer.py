@@ -1,27 +1,98 @@
-from typing import List, Optional, Dict, Any
-from datetime import time, datetime, timedelta
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Callable
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
+import os
+import threading
+from dataclasses import replace
+from time import monotonic
+import numpy as np
 from ortools.sat.python import cp_model
+from sqlalchemy import insert, or_, select, tuple_
 from sqlalchemy.orm import Session
-from app.models import Grupo, Materia, Profesor, HorarioGenerado
-from app.models.models import DiaSemanaEnum, TipoProfesorEnum
+from app.core.config import settings
+from app.models import Grupo, Materia, Profesor, HorarioGenerado, HorarioPendiente, profesores_materias
+from app.models.models import TipoProfesorEnum, TurnoEnum
+from app.services.availability import availability_cache
+from app.services.feasibility import diagnostic, profesor_nombre, screen_unit
+from app.services.cuadriculas import CuadriculaHorarioService
+from app.services.schedule_grid import ScheduleGrid, default_schedule_grid
+from app.services.schedule_model import SolveUnit, UnitSolution, solve_unit
+from app.services.solution_cache import fingerprint, solution_cache
+from app.services.solver_runs import SolverRunService
+from app.services.solver_parameters import SolverParameters, worst_solver_status
+from app.services.university_lns import Conflict, UniversityRepair
+
+# Pools de procesos reutilizados entre generaciones (uno por número de trabajadores)
+_process_pools: Dict[int, ProcessPoolExecutor] = {}
+_process_pools_lock = threading.Lock()
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Devuelve (creándolo la primera vez) el pool de procesos para resolver unidades en paralelo"""
+    with _process_pools_lock:
+        pool = _process_pools.get(workers)
+        if pool is None:
+            # spawn: no heredar hilos ni conexiones del proceso de la API
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _process_pools[workers] = pool
+        return pool
 
 class ScheduleOptimizer:
     """Motor de optimización de horarios usando Google OR-Tools CP-SAT"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, progress_callback: Optional[Callable[[int, int], None]] = None,
+                 incumbent_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
         self.db = db
-        self.model = cp_model.CpModel()
-        self.solver = cp_model.CpSolver()
         
-        # Configuración de tiempo
-        self.dias_semana = list(DiaSemanaEnum)
-        self.horas_inicio = [7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]  # 7:00 AM a 8:00 PM
-        self.max_horas_diarias = 8
+        # progress_callback(unidades_terminadas, total_unidades) tras cada resolución
+        self.progress_callback = progress_callback
+        # incumbent_callback(solución) por cada solución de CP-SAT (desde los hilos del solver;
+        # en el pool de procesos, al terminar cada unidad)
+        self.incumbent_callback = incumbent_callback
+        self.cancel_event = threading.Event()
+        # accept_incumbent(): detener como cancel() pero conservar el resultado como exitoso
+        self.accepted = False
+        
+        # Solver de la resolución en curso en este proceso (para poder detenerlo)
+        self.solver: Optional[cp_model.CpSolver] = None
+        
+        # Configuración de tiempo: cuadrícula por defecto y las de cada (carrera, turno) ya consultadas
+        # (esqueletos cacheados y compartidos entre resoluciones)
+        self.grid: ScheduleGrid = default_schedule_grid()
+        self._grids: Dict[Tuple[int, Optional[TurnoEnum]], ScheduleGrid] = {}
         
-    def generate_schedule_for_career(self, id_carrera: int, cuatrimestre: Optional[int] = None) -> Dict[str, Any]:
+        # Tiempo (segundos) de construcción y tamaño del último modelo
+        self.last_build_time: Optional[float] = None
+        self.last_variable_counts: Dict[str, int] = {}
+    
+    def generate_schedule_for_career(self, id_carrera: int, cuatrimestre: Optional[int] = None,
+                                     joint: bool = False,
+                                     solver_params: Optional[SolverParameters] = None,
+                                     parallel_workers: Optional[int] = None,
+                                     incremental: bool = False,
+                                     fix_unchanged: bool = False,
+                                     only_dirty: bool = False,
+                                     num_versions: Optional[int] = None,
+                                     min_hamming_distance: Optional[int] = None,
+                                     engine: str = "boolean",
+                                     block_hours: Optional[int] = None,
+                                     symmetry_breaking: Optional[bool] = None) -> Dict[str, Any]:
         """
         Genera horarios para una carrera específica
-        Returns: Dict con success, message y horarios generados
+        joint=True resuelve todos los grupos (de la carrera o del cuatrimestre) en un solo
+        modelo, de modo que un profesor nunca quede asignado a dos grupos a la misma hora
+        (un modelo por cuadrícula si los turnos de la carrera tienen cuadrículas distintas;
+        cada uno respeta las horas ya guardadas de los demás)
+        solver_params: parámetros de CP-SAT (por defecto los del servidor)
+        parallel_workers > 1 resuelve las unidades independientes en un pool de procesos
+        incremental=True usa el horario guardado como punto de partida (hints de CP-SAT);
+        con fix_unchanged=True además fija las asignaciones que el cambio no afecta
+        only_dirty=True resuelve solo las unidades con algún horario pendiente (HorarioPendiente)
+        num_versions: versiones alternativas por grupo, obtenidas de un mismo modelo y separadas
+        por al menos min_hamming_distance celdas (clase, profesor, día, hora)
+        engine: "boolean" (una variable por hora) o "interval" (bloques de hasta block_hours
+        horas con variables de intervalo y un solo profesor por materia de cada grupo)
+        symmetry_breaking: ordenar profesores y grupos intercambiables (por defecto, según el servidor)
+        Returns: Dict con success, message, horarios generados y estado del solver
         """
         try:
             # Obtener grupos de la carrera
@@ -33,197 +104,717 @@ class ScheduleOptimizer:
             if not grupos:
                 return {"success": False, "message": "No se encontraron grupos para procesar"}
             
-            results = []
-            for grupo in grupos:
-                # Generar 2 versiones de horario para cada grupo
-                for version in [1, 2]:
-                    schedule_result = self._generate_schedule_for_group(grupo, version)
-                    if schedule_result["success"]:
-                        results.append(grupo.id)
+            if solver_params is None:
+                solver_params = SolverParameters.from_settings()
             
-            return {
-                "success": True,
-                "message": f"Horarios generados exitosamente para {len(results)} grupos",
-                "generated_schedules": results
+            # Unidades de resolución: todos los grupos juntos o uno por uno
+            if joint:
+                units_by_grid: Dict[ScheduleGrid, List[Grupo]] = {}
+                for grupo in grupos:
+                    units_by_grid.setdefault(self._grid_for(grupo), []).append(grupo)
+                units = list(units_by_grid.values())
+                if solver_params.max_time_in_seconds is None:
+                    solver_params = solver_params.merged(max_time_in_seconds=settings.SCHEDULE_JOINT_TIME_LIMIT)
+            else:
+                units = [[grupo] for grupo in grupos]
+            
+            # Versiones de horario para cada grupo (por defecto 2)
+            versions = list(range(1, (num_versions or settings.SCHEDULE_NUM_VERSIONS) + 1))
+            if incremental or fix_unchanged:
+                # Cada versión parte de su propio horario guardado: un modelo por versión
+                solve_units = [(unit, [version]) for unit in units for version in versions]
+            else:
+                # Un modelo por unidad; las versiones se enumeran con cortes de diversidad
+                solve_units = [(unit, versions) for unit in units]
+            
+            if only_dirty:
+                pendientes = set(self.db.query(HorarioPendiente.id_grupo, HorarioPendiente.version_horario).filter(
+                    HorarioPendiente.id_grupo.in_([grupo.id for grupo in grupos])
+                ).all())
+                solve_units = [
+                    (unit, [version for version in unit_versions if any((grupo.id, version) in pendientes for grupo in unit)])
+                    for unit, unit_versions in solve_units
+                ]
+                solve_units = [(unit, unit_versions) for unit, unit_versions in solve_units if unit_versions]
+            
+            unit_options = {
+                "shared_professors": joint,
+                "warm_start": incremental,
+                "fix_unchanged": fix_unchanged,
+                "min_hamming_distance": min_hamming_distance or settings.SCHEDULE_MIN_HAMMING_DISTANCE,
+                "engine": engine,
+                "block_hours": block_hours or settings.SCHEDULE_BLOCK_HOURS,
+                "symmetry_breaking": (
+                    settings.SCHEDULE_SYMMETRY_BREAKING if symmetry_breaking is None else symmetry_breaking
+                ),
+                # Con only_dirty las versiones no pendientes se conservan: las nuevas difieren de ellas
+                "reference_versions": versions if only_dirty else ()
             }
             
+            parallel_workers = parallel_workers or settings.SOLVER_PROCESS_WORKERS
+            if parallel_workers > 1 and len(solve_units) > 1:
+                unit_results = self._generate_in_process_pool(solve_units, solver_params, parallel_workers, unit_options)
+            else:
+                unit_results = []
+                for done, (unit, unit_versions) in enumerate(solve_units):
+                    if self.cancel_event.is_set():
+                        break
+                    
+                    version_results = self._generate_schedule_for_groups(
+                        unit, unit_versions, solver_params=solver_params, **unit_options
+                    )
+                    unit_results.extend((unit, schedule_result) for schedule_result in version_results)
+                    
+                    if self.progress_callback:
+                        self.progress_callback(done + 1, len(solve_units))
+            
+            return self._collect_results(unit_results, solver_params)
+        
         except Exception as e:
             return {"success": False, "message": f"Error en la generación: {str(e)}"}
     
-    def _generate_schedule_for_group(self, grupo: Grupo, version: int) -> Dict[str, Any]:
-        """Genera un horario específico para un grupo"""
+    def generate_schedule_for_university(self, time_budget: Optional[float] = None,
+                                         solver_params: Optional[SolverParameters] = None,
+                                         num_versions: Optional[int] = None,
+                                         min_hamming_distance: Optional[int] = None,
+                                         engine: str = "boolean",
+                                         block_hours: Optional[int] = None,
+                                         symmetry_breaking: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Genera los horarios de todas las carreras sin choques de profesores entre ellas
+        Primero resuelve cada carrera (un modelo por cuadrícula, como el modo conjunto) por
+        separado y en memoria; un profesor habilitado en materias de varias carreras puede
+        quedar en dos grupos a la misma hora. Después repara esos choques con búsqueda de
+        vecindario amplio (UniversityRepair), resolviendo de nuevo solo grupos alrededor de
+        cada profesor en choque. Todo dentro de time_budget segundos (por defecto
+        UNIVERSITY_TIME_BUDGET); al final se guardan todas las unidades.
+        Las soluciones no se toman ni se guardan en la caché: dependen de las demás carreras.
+        Returns: Dict como generate_schedule_for_career más professor_conflicts (choques que
+        quedaron sin reparar al agotar el tiempo) y lns_iterations
+        """
         try:
-            # Limpiar horarios existentes para esta versión
-            self.db.query(HorarioGenerado).filter(
-                HorarioGenerado.id_grupo == grupo.id,
-                HorarioGenerado.version_horario == version
-            ).delete()
-            
-            # Obtener materias del cuatrimestre
-            materias = self.db.query(Materia).filter(
-                Materia.id_carrera == grupo.id_carrera,
-                Materia.cuatrimestre == grupo.cuatrimestre
-            ).all()
-            
-            # Obtener profesores disponibles
-            profesores = self.db.query(Profesor).filter(
-                Profesor.id_carrera == grupo.id_carrera
-            ).all()
-            
-            if not materias or not profesores:
-                return {"success": False, "message": "Datos insuficientes"}
-            
-            # Crear variables de decisión
-            assignments = self._create_decision_variables(materias, profesores)
-            
-            # Agregar restricciones
-            self._add_constraints(assignments, materias, profesores, grupo)
-            
-            # Resolver el modelo
-            status = self.solver.Solve(self.model)
-            
-            if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-                self._save_solution(assignments, materias, profesores, grupo, version)
-                return {"success": True, "message": "Horario generado exitosamente"}
-            else:
-                return {"success": False, "message": "No se pudo encontrar una solución factible"}
+            start = monotonic()
+            budget = time_budget or settings.UNIVERSITY_TIME_BUDGET
+            deadline = start + budget
+            
+            grupos = self.db.query(Grupo).order_by(Grupo.id_carrera, Grupo.id).all()
+            if not grupos:
+                return {"success": False, "message": "No se encontraron grupos para procesar"}
+            
+            if solver_params is None:
+                solver_params = SolverParameters.from_settings()
+            versions = list(range(1, (num_versions or settings.SCHEDULE_NUM_VERSIONS) + 1))
+            unit_options = {
+                "min_hamming_distance": min_hamming_distance or settings.SCHEDULE_MIN_HAMMING_DISTANCE,
+                "engine": engine,
+                "block_hours": block_hours or settings.SCHEDULE_BLOCK_HOURS,
+                "symmetry_breaking": (
+                    settings.SCHEDULE_SYMMETRY_BREAKING if symmetry_breaking is None else symmetry_breaking
+                )
+            }
+            
+            # Descomposición: un modelo por carrera y cuadrícula, con su parte del presupuesto
+            units_by_key: Dict[Tuple[int, ScheduleGrid], List[Grupo]] = {}
+            for grupo in grupos:
+                units_by_key.setdefault((grupo.id_carrera, self._grid_for(grupo)), []).append(grupo)
+            decomposition_deadline = start + budget * settings.UNIVERSITY_DECOMPOSITION_SHARE
+            total_steps = len(units_by_key) + len(versions)
+            
+            unit_results = []
+            solved: List[Tuple[List[Grupo], SolveUnit, List[UnitSolution]]] = []
+            for position, unit_grupos in enumerate(units_by_key.values()):
+                if self.cancel_event.is_set():
+                    break
+                time_limit = max(1.0, (decomposition_deadline - monotonic()) / (len(units_by_key) - position))
+                if solver_params.max_time_in_seconds is not None:
+                    time_limit = min(time_limit, solver_params.max_time_in_seconds)
+                unit_params = solver_params.merged(max_time_in_seconds=time_limit)
+                
+                unit = self._prepare_unit(unit_grupos, versions, unit_params, **unit_options)
+                if unit is None:
+                    unit_results.append((unit_grupos, {"success": False, "message": "Datos insuficientes"}))
+                else:
+                    screened = self._screen_unit(unit)
+                    if screened:
+                        unit_results.append((unit_grupos, screened))
+                    else:
+                        self._end_transaction()
+                        solved.append((unit_grupos, unit, self._solve_in_process(unit)))
+                if self.progress_callback:
+                    self.progress_callback(position + 1, total_steps)
+            
+            # Reparación de choques entre carreras, versión por versión (cada una con su parte del tiempo restante)
+            repairs = []
+            remaining_conflicts = []
+            for position, version in enumerate(versions):
+                members = [
+                    (s_idx, v_idx)
+                    for s_idx, (_, _, solutions) in enumerate(solved)
+                    for v_idx, solution in enumerate(solutions)
+                    if solution.version == version and solution.feasible
+                ]
+                repair = UniversityRepair(
+                    [solved[s_idx][1] for s_idx, _ in members],
+                    [solved[s_idx][2][v_idx].assignments for s_idx, v_idx in members],
+                    version, seed=solver_params.random_seed
+                )
+                version_deadline = monotonic() + max(0.0, deadline - monotonic()) / (len(versions) - position)
+                conflicts = repair.repair(
+                    lambda unit: self._solve_in_process(unit, diagnose=False), version_deadline,
+                    settings.UNIVERSITY_NEIGHBORHOOD_TIME, stop=self.cancel_event.is_set
+                )
+                remaining_conflicts.extend((repair, conflict) for conflict in conflicts)
+                repairs.append(repair)
                 
+                for (s_idx, v_idx), rows in zip(members, repair.assignments):
+                    solutions = solved[s_idx][2]
+                    solutions[v_idx] = replace(solutions[v_idx], assignments=rows)
+                if self.progress_callback:
+                    self.progress_callback(len(units_by_key) + position + 1, total_steps)
+            
+            # Escritura al final en una sola transacción, con la telemetría de los vecindarios:
+            # las consultas ven el horario anterior de toda la universidad hasta el commit
+            run_service = SolverRunService(self.db)
+            for repair in repairs:
+                for unit, solution in repair.runs:
+                    run_service.record(unit, solution)
+            for unit_grupos, unit, solutions in solved:
+                unit_results.extend(
+                    (unit_grupos, result) for result in self._apply_solutions(unit, solutions, commit=False)
+                )
+            self._end_transaction()
+            
+            result = self._collect_results(unit_results, solver_params)
+            result["diagnostics"].extend(self._conflict_diagnostics(remaining_conflicts))
+            result["professor_conflicts"] = len(remaining_conflicts)
+            result["lns_iterations"] = sum(repair.iterations for repair in repairs)
+            if remaining_conflicts:
+                result["message"] += f"; quedaron {len(remaining_conflicts)} choques de profesores entre carreras sin reparar"
+            elif repairs:
+                result["message"] += (
+                    f"; {sum(repair.repaired for repair in repairs)} vecindarios resueltos de nuevo "
+                    f"para eliminar los choques entre carreras"
+                )
+            return result
+        
         except Exception as e:
-            return {"success": False, "message": f"Error: {str(e)}"}
+            return {"success": False, "message": f"Error en la generación: {str(e)}"}
     
-    def _create_decision_variables(self, materias: List[Materia], profesores: List[Profesor]) -> Dict:
-        """Crea las variables de decisión del modelo"""
-        assignments = {}
+    def _collect_results(self, unit_results: List[Tuple[List[Grupo], Dict[str, Any]]],
+                         solver_params: SolverParameters) -> Dict[str, Any]:
+        """Resultado de una generación a partir de los resultados por unidad y versión"""
+        results = []
+        statuses = []
+        # Variables sin poda (dense) vs. creadas tras podar por disponibilidad (created)
+        variables = {"dense": 0, "created": 0}
+        fixed = 0
+        cached = 0
+        diagnostics = []
+        for unit, schedule_result in unit_results:
+            if schedule_result["success"]:
+                results.extend(grupo.id for grupo in unit)
+            if schedule_result.get("status"):
+                statuses.append(schedule_result["status"])
+            for key, count in schedule_result.get("variables", {}).items():
+                variables[key] += count
+            fixed += schedule_result.get("fixed", 0)
+            cached += schedule_result.get("cached", False)
+            diagnostics.extend(schedule_result.get("diagnostics", []))
         
-        for materia in materias:
-            for profesor in profesores:
-                for dia_idx, dia in enumerate(self.dias_semana):
-                    for hora in self.horas_inicio:
-                        # Variable: materia m, profesor p, día d, hora h está asignada
-                        var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                        assignments[var_name] = self.model.NewBoolVar(var_name)
+        cancelled = self.cancel_event.is_set() and not self.accepted
+        if cancelled:
+            message = f"Generación cancelada; horarios generados para {len(results)} grupos"
+        elif self.accepted:
+            message = f"Generación detenida al aceptar las soluciones encontradas; horarios generados para {len(results)} grupos"
+        else:
+            message = f"Horarios generados exitosamente para {len(results)} grupos"
+        if cached:
+            message += f" ({cached} soluciones sin cambios en los datos tomadas de la caché)"
+        if diagnostics:
+            message += f"; se detectaron {len(diagnostics)} problemas de factibilidad"
+        
+        return {
+            "success": not cancelled,
+            "message": message,
+            "cancelled": cancelled,
+            "accepted": self.accepted,
+            "generated_schedules": results,
+            "solver_status": worst_solver_status(statuses),
+            "solver_params": solver_params.as_dict(),
+            "variables": variables,
+            "fixed_assignments": fixed,
+            "cached_solutions": cached,
+            "diagnostics": diagnostics
+        }
+    
+    def _conflict_diagnostics(self, conflicts: List[Tuple[UniversityRepair, Conflict]]) -> List[Dict[str, Any]]:
+        """Un diagnóstico por profesor y versión con choques entre carreras sin reparar"""
+        diagnostics = {}
+        for repair, conflict in conflicts:
+            key = (conflict.profesor_id, repair.version)
+            if key in diagnostics:
+                continue
+            unit = repair.units[conflict.unit_a]
+            p_idx = unit.profesor_ids.index(conflict.profesor_id)
+            diagnostics[key] = diagnostic(
+                "choque_profesor",
+                f"{profesor_nombre(unit, p_idx)} tiene clases a la misma hora en grupos de distintas "
+                f"carreras (versión {repair.version})",
+                profesor_id=conflict.profesor_id
+            )
+        return list(diagnostics.values())
+    
+    def cancel(self):
+        """Solicita detener la generación: interrumpe la búsqueda en curso y omite las unidades restantes"""
+        self.cancel_event.set()
+        solver = self.solver
+        if solver is not None:
+            solver.StopSearch()
+    
+    def accept_incumbent(self):
+        """
+        Acepta las soluciones encontradas hasta ahora: detiene la búsqueda como cancel()
+        (CP-SAT devuelve su mejor solución, que se guarda) y la generación termina con éxito
+        """
+        self.accepted = True
+        self.cancel()
+    
+    def _generate_schedule_for_groups(self, grupos: List[Grupo], versions: List[int],
+                                      solver_params: Optional[SolverParameters] = None,
+                                      **unit_options: Any) -> List[Dict[str, Any]]:
+        """
+        Genera en un solo modelo las versiones del horario de uno o varios grupos
+        unit_options: opciones de _prepare_unit (shared_professors, warm_start, fix_unchanged...)
+        Returns: un resultado por versión
+        """
+        try:
+            unit = self._prepare_unit(grupos, versions, solver_params, **unit_options)
+            if unit is None:
+                return [{"success": False, "message": "Datos insuficientes"}]
+            
+            # Mismos datos que una generación anterior: se reutilizan sus soluciones
+            key = fingerprint(unit)
+            cached = solution_cache.get(key)
+            if cached:
+                return self._apply_solutions(unit, cached)
+            
+            screened = self._screen_unit(unit)
+            if screened:
+                return [screened]
+            
+            # La unidad ya es una copia en memoria: CP-SAT resuelve sin conexión tomada del pool
+            self._end_transaction()
+            solutions = self._solve_in_process(unit)
+            self._cache_solutions(key, solutions)
+            return self._apply_solutions(unit, solutions)
         
-        return assignments
+        except Exception as e:
+            return [{"success": False, "message": f"Error: {str(e)}"}]
     
-    def _add_constraints(self, assignments: Dict, materias: List[Materia], 
-                        profesores: List[Profesor], grupo: Grupo):
-        """Agrega todas las restricciones al modelo"""
+    def _generate_in_process_pool(self, solve_units: List[Tuple[List[Grupo], List[int]]],
+                                  solver_params: SolverParameters, workers: int,
+                                  unit_options: Dict[str, Any]) -> List[Tuple[List[Grupo], Dict[str, Any]]]:
+        """
+        Resuelve unidades independientes en un pool de procesos y guarda las soluciones
+        al final, todas desde este proceso y en una sola transacción
+        """
+        # Repartir los hilos de búsqueda de CP-SAT entre los procesos
+        total_threads = solver_params.num_search_workers or os.cpu_count() or 1
+        unit_params = solver_params.merged(num_search_workers=max(1, total_threads // workers))
         
-        # Restricción 1: Cada materia debe cumplir sus horas semanales
-        for materia in materias:
-            materia_assignments = []
-            for profesor in profesores:
-                for dia_idx in range(len(self.dias_semana)):
-                    for hora in self.horas_inicio:
-                        var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                        if var_name in assignments:
-                            materia_assignments.append(assignments[var_name])
-            
-            self.model.Add(sum(materia_assignments) == materia.horas_semanales)
-        
-        # Restricción 2: Un profesor no puede estar en dos lugares al mismo tiempo
-        for profesor in profesores:
-            for dia_idx in range(len(self.dias_semana)):
-                for hora in self.horas_inicio:
-                    profesor_hour_assignments = []
-                    for materia in materias:
-                        var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                        if var_name in assignments:
-                            profesor_hour_assignments.append(assignments[var_name])
-                    
-                    self.model.Add(sum(profesor_hour_assignments) <= 1)
-        
-        # Restricción 3: El grupo no puede tener dos materias al mismo tiempo
-        for dia_idx in range(len(self.dias_semana)):
-            for hora in self.horas_inicio:
-                group_hour_assignments = []
-                for materia in materias:
-                    for profesor in profesores:
-                        var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                        if var_name in assignments:
-                            group_hour_assignments.append(assignments[var_name])
-                
-                self.model.Add(sum(group_hour_assignments) <= 1)
+        prepared = []
+        cached_units = []
+        unit_results = []
+        for grupos, versions in solve_units:
+            unit = self._prepare_unit(grupos, versions, unit_params, **unit_options)
+            if unit is None:
+                unit_results.append((grupos, {"success": False, "message": "Datos insuficientes"}))
+                continue
+            
+            key = fingerprint(unit)
+            cached = solution_cache.get(key)
+            if cached:
+                cached_units.append((grupos, unit, cached))
+                continue
+            
+            screened = self._screen_unit(unit)
+            if screened:
+                unit_results.append((grupos, screened))
+            else:
+                prepared.append((grupos, unit, key))
+        
+        # Unidades resueltas sin CP-SAT (caché, datos insuficientes o revisión de factibilidad)
+        skipped = len(solve_units) - len(prepared)
+        self._end_transaction()
+        pool = _get_process_pool(workers)
+        futures = {pool.submit(solve_unit, unit): position for position, (_, unit, _) in enumerate(prepared)}
+        solutions: Dict[int, List[UnitSolution]] = {}
+        pending = set(futures)
+        while pending:
+            finished, pending = wait(pending, timeout=settings.GENERATION_JOB_POLL_SECONDS,
+                                     return_when=FIRST_COMPLETED)
+            for future in finished:
+                if not future.cancelled():
+                    solutions[futures[future]] = future.result()
+                    if self.incumbent_callback:
+                        # Los procesos del pool no comparten el callback: se reportan al terminar
+                        for solution in solutions[futures[future]]:
+                            for incumbent in solution.incumbents:
+                                self.incumbent_callback(incumbent)
+            
+            if self.cancel_event.is_set():
+                # Las unidades aún en cola no se inician; las que corren terminan en su límite de tiempo
+                for future in pending:
+                    future.cancel()
+            
+            if self.progress_callback:
+                self.progress_callback(skipped + len(solutions), len(solve_units))
         
-        # Restricción 4: Disponibilidad de profesores
-        self._add_availability_constraints(assignments, materias, profesores)
+        # Escrituras a la base de datos en un solo lugar y una sola transacción, tras todas las resoluciones
+        for grupos, unit, cached in cached_units:
+            unit_results.extend((grupos, result) for result in self._apply_solutions(unit, cached, commit=False))
+        for position, (grupos, unit, key) in enumerate(prepared):
+            self._cache_solutions(key, solutions.get(position, []))
+            for result in self._apply_solutions(unit, solutions.get(position, []), commit=False):
+                unit_results.append((grupos, result))
+        self._end_transaction()
         
-        # Restricción 5: Optimización para PTC (40 horas semanales)
-        self._add_ptc_optimization(assignments, materias, profesores)
+        return unit_results
     
-    def _add_availability_constraints(self, assignments: Dict, materias: List[Materia], 
-                                    profesores: List[Profesor]):
-        """Agrega restricciones de disponibilidad de profesores"""
-        for profesor in profesores:
-            if not profesor.disponibilidad:
-                continue
-                
-            for dia_idx, dia in enumerate(self.dias_semana):
-                dia_name = dia.value
-                if dia_name not in profesor.disponibilidad:
-                    # Profesor no disponible este día
-                    for hora in self.horas_inicio:
-                        for materia in materias:
-                            var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                            if var_name in assignments:
-                                self.model.Add(assignments[var_name] == 0)
-                else:
-                    # Verificar rangos horarios disponibles
-                    available_hours = self._parse_availability(profesor.disponibilidad[dia_name])
-                    for hora in self.horas_inicio:
-                        if hora not in available_hours:
-                            for materia in materias:
-                                var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                                if var_name in assignments:
-                                    self.model.Add(assignments[var_name] == 0)
-    
-    def _parse_availability(self, time_ranges: List[str]) -> List[int]:
-        """Convierte rangos de tiempo a lista de horas disponibles"""
-        available_hours = []
-        for time_range in time_ranges:
-            start_str, end_str = time_range.split("-")
-            start_hour = int(start_str.split(":")[0])
-            end_hour = int(end_str.split(":")[0])
-            available_hours.extend(range(start_hour, end_hour))
-        return available_hours
-    
-    def _add_ptc_optimization(self, assignments: Dict, materias: List[Materia], 
-                            profesores: List[Profesor]):
-        """Optimización para profesores de tiempo completo (40 horas)"""
-        for profesor in profesores:
-            if profesor.tipo_profesor == TipoProfesorEnum.PTC:
-                total_hours = []
-                for materia in materias:
-                    for dia_idx in range(len(self.dias_semana)):
-                        for hora in self.horas_inicio:
-                            var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                            if var_name in assignments:
-                                total_hours.append(assignments[var_name])
-                
-                # Objetivo: acercarse a 40 horas (ajustable según necesidades)
-                if total_hours:
-                    self.model.Add(sum(total_hours) >= 20)  # Mínimo 20 horas
-                    self.model.Add(sum(total_hours) <= 40)  # Máximo 40 horas
-    
-    def _save_solution(self, assignments: Dict, materias: List[Materia], 
-                      profesores: List[Profesor], grupo: Grupo, version: int):
-        """Guarda la solución en la base de datos"""
+    def _prepare_unit(self, grupos: List[Grupo], versions: List[int],
+                      solver_params: Optional[SolverParameters] = None,
+                      shared_professors: bool = False, warm_start: bool = False,
+                      fix_unchanged: bool = False, min_hamming_distance: int = 2,
+                      engine: str = "boolean", block_hours: int = 2,
+                      symmetry_breaking: bool = True,
+                      reference_versions: Sequence[int] = ()) -> Optional[SolveUnit]:
+        """
+        Carga de la base de datos los datos de una unidad de resolución (None si son insuficientes)
+        shared_professors=True respeta además los horarios ya guardados de los demás
+        grupos de la carrera como horas ocupadas de cada profesor (en cualquiera de las versiones)
+        warm_start=True incluye el horario guardado de la unidad como hints;
+        fix_unchanged=True fija las clases cuyas horas semanales no cambiaron
+        (ambos con una sola versión por unidad)
+        reference_versions: versiones cuyo horario guardado se conserva; las que se resuelven
+        difieren de él en al menos min_hamming_distance celdas
+        """
+        grupo_ids = [grupo.id for grupo in grupos]
+        grid = self._grid_for(grupos[0])
+        
+        # Obtener clases (grupo, materia) de los cuatrimestres involucrados
+        clases = self._load_clases(grupos)
+        
+        # Obtener profesores disponibles: los de la carrera y los de otras carreras habilitados en sus materias
+        carreras = {grupo.id_carrera for grupo in grupos}
+        habilitados = select(profesores_materias.c.id_profesor).where(
+            profesores_materias.c.id_materia.in_({materia.id for _, materia in clases})
+        )
+        profesores = self.db.query(Profesor).filter(
+            or_(Profesor.id_carrera.in_(carreras), Profesor.id.in_(habilitados))
+        ).order_by(Profesor.id).all()
+        
+        if not clases or not profesores:
+            return None
+        
+        availability = availability_cache.mask(profesores, grid)
+        if shared_professors:
+            availability &= ~self._occupied_mask(profesores, grupo_ids, versions, grid)
+        
+        hints = fixed = None
+        if warm_start or fix_unchanged:
+            hints = self._previous_assignments(clases, profesores, versions[0], grid)
+            if fix_unchanged:
+                # Una clase cuyas horas cambiaron se resuelve de nuevo; las demás conservan
+                # sus asignaciones salvo en celdas que ya no existen (disponibilidad o habilitación)
+                clase_horas = np.array([materia.horas_semanales for _, materia in clases])
+                horas_previas = np.bincount(hints[:, 0], minlength=len(clases))
+                fixed = hints[(clase_horas == horas_previas)[hints[:, 0]]]
+        
+        references = [
+            self._previous_assignments(clases, profesores, version, grid)
+            for version in reference_versions if version not in versions
+        ]
+        references = [
+            np.column_stack([np.full(len(rows), ref_idx), rows])
+            for ref_idx, rows in enumerate(ref for ref in references if len(ref))
+        ]
+        
+        grupo_index = {grupo_id: idx for idx, grupo_id in enumerate(grupo_ids)}
+        return SolveUnit(
+            versions=versions,
+            grid=grid,
+            carrera_id=grupos[0].id_carrera,
+            grupo_ids=grupo_ids,
+            clase_grupo=[grupo_index[grupo.id] for grupo, _ in clases],
+            clase_materia=[materia.id for _, materia in clases],
+            clase_horas=[materia.horas_semanales for _, materia in clases],
+            profesor_ids=[profesor.id for profesor in profesores],
+            # Las 20-40 horas de un PTC se cuentan en su carrera, no en las que imparte como invitado
+            profesor_ptc=[
+                profesor.tipo_profesor == TipoProfesorEnum.PTC and profesor.id_carrera in carreras
+                for profesor in profesores
+            ],
+            eligibility=self._eligibility_mask([materia for _, materia in clases], profesores),
+            availability=availability,
+            params=solver_params or SolverParameters(),
+            engine=engine,
+            block_hours=block_hours,
+            min_hamming_distance=min_hamming_distance,
+            symmetry_breaking=symmetry_breaking,
+            hints=hints,
+            fixed=fixed,
+            references=np.concatenate(references) if references else None,
+            grupo_nombres=[grupo.nombre_grupo or f"Grupo {grupo.id}" for grupo in grupos],
+            clase_nombres=[materia.nombre_materia for _, materia in clases],
+            profesor_nombres=[profesor.nombre_completo for profesor in profesores]
+        )
+    
+    def _screen_unit(self, unit: SolveUnit) -> Optional[Dict[str, Any]]:
+        """Revisión de factibilidad previa al modelo; devuelve el resultado fallido si encontró problemas"""
+        diagnostics = screen_unit(unit)
+        if not diagnostics:
+            return None
+        return {
+            "success": False,
+            "message": f"Instancia infactible: {diagnostics[0]['mensaje']}",
+            "status": "INFEASIBLE",
+            "diagnostics": diagnostics
+        }
+    
+    def _solve_in_process(self, unit: SolveUnit, diagnose: bool = True) -> List[UnitSolution]:
+        """Resuelve la unidad en este proceso, exponiendo el solver para poder cancelarlo"""
+        def attach(solver: cp_model.CpSolver) -> bool:
+            self.solver = solver
+            return not self.cancel_event.is_set()
+        
+        try:
+            return solve_unit(unit, on_solver=attach, on_incumbent=self.incumbent_callback, diagnose=diagnose)
+        finally:
+            self.solver = None
+    
+    def _cache_solutions(self, key: str, solutions: List[UnitSolution]):
+        """Guarda en la caché las soluciones de una resolución que no fue interrumpida"""
+        if not self.cancel_event.is_set():
+            solution_cache.put(key, solutions)
+    
+    def _apply_solutions(self, unit: SolveUnit, solutions: List[UnitSolution],
+                         commit: bool = True) -> List[Dict[str, Any]]:
+        """
+        Guarda las versiones resueltas de la unidad en una sola transacción y arma un resultado por versión
+        commit=False deja la escritura en la transacción en curso (para guardar varias unidades juntas)
+        """
+        # La telemetría se confirma junto con los horarios (o sola si no hubo solución);
+        # las soluciones tomadas de la caché no son resoluciones nuevas
+        run_service = SolverRunService(self.db)
+        for solution in solutions:
+            if not solution.cached:
+                run_service.record(unit, solution)
+        self._save_solutions(unit, [solution for solution in solutions if solution.feasible])
+        if commit:
+            self._end_transaction()
+        return [self._solution_result(solution) for solution in solutions]
+    
+    def _end_transaction(self):
+        """
+        Confirma la transacción en curso para que la sesión devuelva su conexión al pool
+        No expira los objetos cargados: los grupos se siguen usando (ids, cuadrícula) sin
+        volver a consultarlos, lo que abriría otra transacción durante la resolución
+        """
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self.db.commit()
+        finally:
+            self.db.expire_on_commit = expire_on_commit
+    
+    def _solution_result(self, solution: UnitSolution) -> Dict[str, Any]:
+        """Resultado de una versión de la unidad"""
+        if solution.variables:
+            self.last_build_time = solution.build_time
+            self.last_variable_counts = solution.variables
+        
+        if solution.feasible:
+            return {
+                "success": True,
+                "message": "Horario generado exitosamente",
+                "status": solution.status,
+                "variables": solution.variables,
+                "fixed": solution.fixed,
+                "cached": solution.cached
+            }
+        elif solution.status == "TIMEOUT":
+            return {
+                "success": False,
+                "message": "Se agotó el tiempo límite sin encontrar una solución",
+                "status": solution.status,
+                "variables": solution.variables
+            }
+        else:
+            message = "No se pudo encontrar una solución factible"
+            if solution.conflicts:
+                message += ". Restricciones en conflicto: " + "; ".join(
+                    conflict["mensaje"] for conflict in solution.conflicts
+                )
+            return {
+                "success": False,
+                "message": message,
+                "status": solution.status,
+                "variables": solution.variables,
+                "diagnostics": solution.conflicts
+            }
+    
+    def _grid_for(self, grupo: Grupo) -> ScheduleGrid:
+        """Cuadrícula del grupo (la de su turno, la de su carrera o la por defecto)"""
+        key = (grupo.id_carrera, grupo.turno)
+        if key not in self._grids:
+            self._grids[key] = CuadriculaHorarioService(self.db).get_grid(grupo.id_carrera, grupo.turno)
+        return self._grids[key]
+    
+    def _load_clases(self, grupos: List[Grupo]) -> List[Tuple[Grupo, Materia]]:
+        """Obtiene las clases (grupo, materia) a programar: las materias del cuatrimestre de cada grupo"""
+        claves = {(grupo.id_carrera, grupo.cuatrimestre) for grupo in grupos}
+        materias = self.db.query(Materia).filter(
+            tuple_(Materia.id_carrera, Materia.cuatrimestre).in_(list(claves))
+        ).order_by(Materia.id).all()
+        
+        materias_por_clave: Dict[Tuple[int, int], List[Materia]] = {}
         for materia in materias:
-            for profesor in profesores:
-                for dia_idx, dia in enumerate(self.dias_semana):
-                    for hora in self.horas_inicio:
-                        var_name = f"assign_{materia.id}_{profesor.id}_{dia_idx}_{hora}"
-                        if var_name in assignments and self.solver.Value(assignments[var_name]) == 1:
-                            # Crear registro de horario
-                            horario = HorarioGenerado(
-                                id_grupo=grupo.id,
-                                id_materia=materia.id,
-                                id_profesor=profesor.id,
-                                dia_semana=dia,
-                                hora_inicio=time(hora, 0),
-                                hora_fin=time(hora + 1, 0),  # Asumiendo clases de 1 hora
-                                version_horario=version
-                            )
-                            self.db.add(horario)
-        
-        self.db.commit()
+            materias_por_clave.setdefault((materia.id_carrera, materia.cuatrimestre), []).append(materia)
+        
+        return [
+            (grupo, materia)
+            for grupo in grupos
+            for materia in materias_por_clave.get((grupo.id_carrera, grupo.cuatrimestre), [])
+        ]
+    
+    def _occupied_mask(self, profesores: List[Profesor], grupo_ids: List[int], versions: List[int],
+                       grid: ScheduleGrid) -> np.ndarray:
+        """
+        Máscara profesor × día × hora de las horas ya asignadas a otros grupos en alguna de las versiones
+        (los otros grupos pueden usar otra cuadrícula: se marcan los bloques que se traslapan)
+        """
+        occupied = np.zeros((len(profesores), grid.n_dias, grid.n_horas), dtype=bool)
+        profesor_index = {profesor.id: idx for idx, profesor in enumerate(profesores)}
+        
+        rows = self.db.query(
+            HorarioGenerado.id_profesor, HorarioGenerado.dia_semana,
+            HorarioGenerado.hora_inicio, HorarioGenerado.hora_fin
+        ).filter(
+            HorarioGenerado.id_profesor.in_(list(profesor_index)),
+            HorarioGenerado.id_grupo.notin_(grupo_ids),
+            HorarioGenerado.version_horario.in_(versions)
+        ).all()
+        
+        for id_profesor, dia, hora_inicio, hora_fin in rows:
+            dia_idx = grid.dia_index.get(dia)
+            if dia_idx is None:
+                continue
+            occupied[profesor_index[id_profesor], dia_idx, grid.overlapping_slots(hora_inicio, hora_fin)] = True
+        
+        return occupied
+    
+    def _previous_assignments(self, clases: List[Tuple[Grupo, Materia]], profesores: List[Profesor],
+                              version: int, grid: ScheduleGrid) -> np.ndarray:
+        """Horario guardado de las clases como filas (clase, profesor, día, hora) del tensor"""
+        clase_index = {(grupo.id, materia.id): idx for idx, (grupo, materia) in enumerate(clases)}
+        profesor_index = {profesor.id: idx for idx, profesor in enumerate(profesores)}
+        
+        rows = self.db.query(
+            HorarioGenerado.id_grupo, HorarioGenerado.id_materia, HorarioGenerado.id_profesor,
+            HorarioGenerado.dia_semana, HorarioGenerado.hora_inicio
+        ).filter(
+            HorarioGenerado.id_grupo.in_({grupo.id for grupo, _ in clases}),
+            HorarioGenerado.version_horario == version
+        ).all()
+        
+        # Se descartan filas que ya no caben en el modelo (materia, profesor u hora eliminados,
+        # o bloques de una cuadrícula anterior)
+        previous = []
+        for id_grupo, id_materia, id_profesor, dia, hora_inicio in rows:
+            c_idx = clase_index.get((id_grupo, id_materia))
+            p_idx = profesor_index.get(id_profesor)
+            d_idx = grid.dia_index.get(dia)
+            h_idx = grid.slot_index.get(hora_inicio)
+            if None not in (c_idx, p_idx, d_idx, h_idx):
+                previous.append((c_idx, p_idx, d_idx, h_idx))
+        
+        return np.array(previous, dtype=np.int64).reshape(-1, 4)
+    
+    def _eligibility_mask(self, materias: List[Materia], profesores: List[Profesor]) -> np.ndarray:
+        """
+        Máscara materia × profesor de los pares habilitados en profesores_materias.
+        Una materia sin ningún profesor registrado puede ser impartida por cualquier
+        profesor de su carrera.
+        La lista de materias puede repetir materias (una fila por clase).
+        """
+        mask = np.zeros((len(materias), len(profesores)), dtype=bool)
+        materia_rows: Dict[int, List[int]] = {}
+        materia_carrera: Dict[int, int] = {}
+        for idx, materia in enumerate(materias):
+            materia_rows.setdefault(materia.id, []).append(idx)
+            materia_carrera[materia.id] = materia.id_carrera
+        profesor_index = {profesor.id: idx for idx, profesor in enumerate(profesores)}
+        
+        rows = self.db.query(profesores_materias.c.id_materia, profesores_materias.c.id_profesor).filter(
+            profesores_materias.c.id_materia.in_(list(materia_rows))
+        ).all()
+        
+        registered = set()
+        for id_materia, id_profesor in rows:
+            registered.add(id_materia)
+            p_idx = profesor_index.get(id_profesor)
+            if p_idx is not None:
+                mask[materia_rows[id_materia], p_idx] = True
+        
+        profesor_carrera = np.array([profesor.id_carrera for profesor in profesores])
+        for id_materia, m_rows in materia_rows.items():
+            if id_materia not in registered:
+                mask[m_rows] = profesor_carrera == materia_carrera[id_materia]
+        
+        return mask
+    
+    def _save_solutions(self, unit: SolveUnit, solutions: List[UnitSolution]):
+        """
+        Reemplaza en la sesión el horario de los grupos de la unidad por las soluciones (sin confirmar)
+        El borrado de las versiones anteriores y la inserción van en la misma transacción:
+        quien consulte ve el horario anterior completo hasta el commit y después el nuevo
+        """
+        versions = [solution.version for solution in solutions]
+        if not versions:
+            return
+        
+        self.db.query(HorarioGenerado).filter(
+            HorarioGenerado.id_grupo.in_(unit.grupo_ids),
+            HorarioGenerado.version_horario.in_(versions)
+        ).delete(synchronize_session=False)
+        self.db.query(HorarioPendiente).filter(
+            HorarioPendiente.id_grupo.in_(unit.grupo_ids),
+            HorarioPendiente.version_horario.in_(versions)
+        ).delete(synchronize_session=False)
+        
+        rows = [row for solution in solutions for row in self._solution_rows(unit, solution)]
+        if rows:
+            # executemany de Core sobre la tabla (sin el paso por objetos del ORM): pymysql lo envía como
+            # INSERT de varias filas y SQLAlchemy hace lo mismo en PostgreSQL (insertmanyvalues)
+            self.db.execute(insert(HorarioGenerado.__table__), rows)
+    
+    def _solution_rows(self, unit: SolveUnit, solution: UnitSolution) -> List[Dict[str, Any]]:
+        """Filas de horarios_generados de una solución, a partir de sus asignaciones verdaderas"""
+        c_idx, p_idx, dia_idx, h_idx = solution.assignments.T
+        grupo_ids = np.asarray(unit.grupo_ids)[np.asarray(unit.clase_grupo)[c_idx]]
+        materia_ids = np.asarray(unit.clase_materia)[c_idx]
+        profesor_ids = np.asarray(unit.profesor_ids)[p_idx]
+        return [
+            {
+                "id_grupo": grupo_id,
+                "id_materia": materia_id,
+                "id_profesor": profesor_id,
+                "dia_semana": unit.grid.dias_semana[dia],
+                "hora_inicio": unit.grid.slot_times[hora][0],
+                "hora_fin": unit.grid.slot_times[hora][1],
+                "version_horario": solution.version
+            }
+            for grupo_id, materia_id, profesor_id, dia, hora in zip(
+                grupo_ids.tolist(), materia_ids.tolist(), profesor_ids.tolist(), dia_idx.tolist(), h_idx.tolist()
+            )
+        ]
@@ -0,0 +1,83 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields, replace
+from typing import List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+from app.services.schedule_model import SolveUnit, UnitSolution
+
+# Estados que se obtendrían de nuevo con los mismos datos; TIMEOUT, UNKNOWN, etc. no se guardan
+CACHEABLE_STATUSES = {"OPTIMAL", "FEASIBLE", "INFEASIBLE"}
+
+def fingerprint(unit: SolveUnit) -> str:
+    """
+    Huella de los datos de entrada de una unidad: grupos, materias y horas, profesores,
+    habilitación, disponibilidad (con las horas ocupadas en modo conjunto), cuadrícula,
+    parámetros del solver, opciones del modelo y horario de partida
+    """
+    digest = hashlib.sha256()
+    for unit_field in fields(unit):
+        value = getattr(unit, unit_field.name)
+        digest.update(unit_field.name.encode() + b"\0")
+        if isinstance(value, np.ndarray):
+            digest.update(f"{value.dtype}{value.shape}".encode())
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+class SolutionCache:
+    """
+    Caché (por proceso) de las soluciones de cada unidad según la huella de sus datos.
+    
+    Volver a generar sin cambios devuelve las soluciones guardadas sin ejecutar CP-SAT.
+    Las entradas vencen a los ttl_seconds y se conservan a lo más max_entries (se
+    descartan primero las usadas hace más tiempo); con cualquiera de los dos en 0 la
+    caché queda desactivada.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, List[UnitSolution]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+    
+    def get(self, key: str) -> Optional[List[UnitSolution]]:
+        """Soluciones guardadas para la huella (marcadas como cached) o None si no hay o vencieron"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return [replace(solution, cached=True) for solution in entry[1]]
+    
+    def put(self, key: str, solutions: List[UnitSolution]):
+        """Guarda las soluciones de una resolución completa (todas las versiones con estado reproducible)"""
+        if not self.enabled or not solutions:
+            return
+        if any(solution.status not in CACHEABLE_STATUSES for solution in solutions):
+            return
+        
+        # Las soluciones intermedias no se necesitan al devolverlas de la caché
+        stored = [replace(solution, incumbents=[]) for solution in solutions]
+        with self._lock:
+            self._entries[key] = (time.monotonic(), stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+solution_cache = SolutionCache(settings.SOLUTION_CACHE_MAX_ENTRIES, settings.SOLUTION_CACHE_TTL_SECONDS)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass, asdict, replace
+from typing import Any, Dict, Optional
+from ortools.sat.python import cp_model
+from app.core.config import settings
+
+@dataclass(frozen=True)
+class SolverParameters:
+    """Parámetros de búsqueda de CP-SAT para una generación (None = valor por defecto de CP-SAT)"""
+    max_time_in_seconds: Optional[float] = None
+    num_search_workers: Optional[int] = None
+    relative_gap_limit: Optional[float] = None
+    random_seed: Optional[int] = None
+    
+    @classmethod
+    def from_settings(cls, **overrides: Any) -> "SolverParameters":
+        """Parámetros del servidor, reemplazados por los valores no nulos de overrides"""
+        params = cls(
+            max_time_in_seconds=settings.SOLVER_MAX_TIME_SECONDS,
+            num_search_workers=settings.SOLVER_NUM_SEARCH_WORKERS,
+            relative_gap_limit=settings.SOLVER_RELATIVE_GAP_LIMIT,
+            random_seed=settings.SOLVER_RANDOM_SEED,
+        )
+        return params.merged(**overrides)
+    
+    def merged(self, **overrides: Any) -> "SolverParameters":
+        """Copia con los valores no nulos de overrides"""
+        return replace(self, **{key: value for key, value in overrides.items() if value is not None})
+    
+    def apply(self, solver: cp_model.CpSolver):
+        """Copia los parámetros definidos a solver.parameters"""
+        if self.max_time_in_seconds is not None:
+            solver.parameters.max_time_in_seconds = self.max_time_in_seconds
+        if self.num_search_workers is not None:
+            solver.parameters.num_search_workers = self.num_search_workers
+        if self.relative_gap_limit is not None:
+            solver.parameters.relative_gap_limit = self.relative_gap_limit
+        if self.random_seed is not None:
+            solver.parameters.random_seed = self.random_seed
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+# Estados reportados, de mejor a peor; TIMEOUT = se agotó el tiempo sin solución
+SOLVER_STATUS_ORDER = ["OPTIMAL", "FEASIBLE", "TIMEOUT", "UNKNOWN", "INFEASIBLE", "MODEL_INVALID"]
+
+def solver_status_name(status: int, solver: cp_model.CpSolver) -> str:
+    """Nombre del estado alcanzado, distinguiendo un UNKNOWN por límite de tiempo"""
+    if status == cp_model.UNKNOWN:
+        max_time = solver.parameters.max_time_in_seconds
+        if solver.WallTime() >= max_time * 0.99:
+            return "TIMEOUT"
+    return solver.StatusName(status)
+
+def worst_solver_status(statuses) -> Optional[str]:
+    """Estado agregado de varias resoluciones: el peor de ellos"""
+    ranked = [status for status in statuses if status in SOLVER_STATUS_ORDER]
+    if not ranked:
+        return None
+    return max(ranked, key=SOLVER_STATUS_ORDER.index)
@@ -0,0 +1,114 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.models import SolverRun
+from app.services.schedule_model import SolveUnit, UnitSolution
+
+class SolverRunService:
+    """
+    Servicio de telemetría de las resoluciones de CP-SAT (tabla solver_runs).
+    
+    Cada versión resuelta de una unidad deja un registro con el tamaño del modelo,
+    tiempos, estadísticas de búsqueda y parámetros, para seguir el rendimiento por
+    carrera y detectar regresiones de escala con el tiempo.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def record(self, unit: SolveUnit, solution: UnitSolution) -> SolverRun:
+        """Agrega a la sesión el registro de una resolución (se confirma junto con su horario)"""
+        run = SolverRun(
+            id_carrera=unit.carrera_id,
+            grupo_ids=unit.grupo_ids,
+            version_horario=solution.version,
+            engine=unit.engine,
+            status=solution.status,
+            variables=solution.num_variables,
+            constraints=solution.num_constraints,
+            build_time=solution.build_time,
+            solve_time=solution.solve_time,
+            conflicts=solution.num_conflicts,
+            branches=solution.num_branches,
+            objective=solution.objective,
+            peak_rss_kb=solution.peak_rss_kb,
+            params=unit.params.as_dict()
+        )
+        self.db.add(run)
+        return run
+    
+    def get_runs(self, carrera_id: Optional[int] = None, limit: int = 100) -> List[SolverRun]:
+        """Últimas resoluciones registradas (de la carrera indicada o de todas)"""
+        query = self.db.query(SolverRun)
+        if carrera_id is not None:
+            query = query.filter(SolverRun.id_carrera == carrera_id)
+        return query.order_by(SolverRun.id.desc()).limit(limit).all()
+    
+    def get_metrics(self, carrera_id: Optional[int] = None, desde: Optional[datetime] = None,
+                    por_dia: bool = False) -> List[Dict[str, Any]]:
+        """
+        Agregados por carrera (y por día si por_dia=True) de las resoluciones registradas
+        segundos_por_millon_variables relaciona el tiempo de resolución con el tamaño del
+        modelo: si crece con el tiempo en modelos de tamaño similar hay una regresión
+        """
+        keys = [SolverRun.id_carrera]
+        if por_dia:
+            keys.append(func.date(SolverRun.creado_en).label("dia"))
+        
+        query = self.db.query(
+            *keys,
+            func.count(SolverRun.id).label("runs"),
+            func.sum(case((SolverRun.status.in_(["OPTIMAL", "FEASIBLE"]), 1), else_=0)).label("factibles"),
+            func.avg(SolverRun.solve_time).label("solve_time_avg"),
+            func.max(SolverRun.solve_time).label("solve_time_max"),
+            # Solo las versiones que construyeron el modelo
+            func.avg(case((SolverRun.build_time > 0, SolverRun.build_time))).label("build_time_avg"),
+            func.avg(SolverRun.variables).label("variables_avg"),
+            func.max(SolverRun.variables).label("variables_max"),
+            func.avg(SolverRun.constraints).label("constraints_avg"),
+            func.avg(SolverRun.conflicts).label("conflicts_avg"),
+            func.avg(SolverRun.branches).label("branches_avg"),
+            func.max(SolverRun.peak_rss_kb).label("peak_rss_kb_max"),
+            func.sum(SolverRun.solve_time).label("solve_time_total"),
+            func.sum(SolverRun.variables).label("variables_total")
+        )
+        if carrera_id is not None:
+            query = query.filter(SolverRun.id_carrera == carrera_id)
+        if desde is not None:
+            query = query.filter(SolverRun.creado_en >= desde)
+        rows = query.group_by(*keys).order_by(*keys).all()
+        
+        # Conteo de estados por grupo de agregación
+        status_query = self.db.query(*keys, SolverRun.status, func.count(SolverRun.id))
+        if carrera_id is not None:
+            status_query = status_query.filter(SolverRun.id_carrera == carrera_id)
+        if desde is not None:
+            status_query = status_query.filter(SolverRun.creado_en >= desde)
+        statuses: Dict[tuple, Dict[str, int]] = {}
+        for *key, status, count in status_query.group_by(*keys, SolverRun.status).all():
+            statuses.setdefault(tuple(key), {})[status] = count
+        
+        metrics = []
+        for row in rows:
+            key = tuple(row[:len(keys)])
+            metrics.append({
+                "id_carrera": row.id_carrera,
+                "dia": str(row.dia) if por_dia else None,
+                "runs": row.runs,
+                "factibles": int(row.factibles or 0),
+                "estados": statuses.get(key, {}),
+                "solve_time_avg": row.solve_time_avg,
+                "solve_time_max": row.solve_time_max,
+                "build_time_avg": row.build_time_avg,
+                "variables_avg": row.variables_avg,
+                "variables_max": row.variables_max,
+                "constraints_avg": row.constraints_avg,
+                "conflicts_avg": row.conflicts_avg,
+                "branches_avg": row.branches_avg,
+                "peak_rss_kb_max": row.peak_rss_kb_max,
+                "segundos_por_millon_variables": (
+                    row.solve_time_total / row.variables_total * 1e6 if row.variables_total else None
+                )
+            })
+        return metrics
@@ -0,0 +1,71 @@
+from typing import TYPE_CHECKING, Dict, List, Sequence, Set
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.services.schedule_model import SolveUnit
+
+def _hinted(unit: "SolveUnit", column: int) -> Set[int]:
+    """Índices (de clase o profesor) que aparecen en el horario de partida"""
+    if unit.hints is None or not len(unit.hints):
+        return set()
+    return set(np.unique(unit.hints[:, column]).tolist())
+
+def equivalent_professors(unit: "SolveUnit") -> List[List[int]]:
+    """
+    Clases de profesores intercambiables: misma habilitación en todas las clases, misma
+    disponibilidad (ya sin las horas ocupadas en otros grupos), mismo tipo y mismo rango de
+    horas. Cualquier permutación de ellos transforma una solución en otra. Se excluyen los
+    profesores del horario de partida, cuyas asignaciones no son intercambiables con las
+    de los demás.
+    """
+    excluded = _hinted(unit, 1)
+    classes: Dict[bytes, List[int]] = {}
+    for p_idx in range(unit.n_profesores):
+        if p_idx in excluded:
+            continue
+        key = (
+            np.packbits(unit.eligibility[:, p_idx]).tobytes()
+            + np.packbits(unit.availability[p_idx]).tobytes()
+            + bytes([unit.profesor_ptc[p_idx]])
+            + np.asarray(unit.ptc_range(p_idx), dtype=np.int64).tobytes()
+        )
+        classes.setdefault(key, []).append(p_idx)
+    return [members for members in classes.values() if len(members) > 1]
+
+def professor_precedence(unit: "SolveUnit", profesores_por_clase: Sequence[int]) -> np.ndarray:
+    """
+    Habilitación clase × profesor sin las asignaciones que solo renombran profesores
+    equivalentes. Si los profesores de una clase de equivalencia se numeran en el orden
+    en que aparecen al recorrer las clases, la i-ésima clase que pueden impartir usa solo
+    los primeros (profesores por clase acumulados hasta ella); profesores_por_clase es
+    cuántos profesores distintos puede tener cada clase (sus horas en el modelo booleano,
+    1 en el de intervalos).
+    """
+    eligibility = unit.eligibility.copy()
+    for members in equivalent_professors(unit):
+        clases = np.flatnonzero(unit.eligibility[:, members[0]])
+        usados = np.cumsum(np.asarray(profesores_por_clase)[clases])
+        for c_idx, count in zip(clases.tolist(), usados.tolist()):
+            if count >= len(members):
+                break
+            eligibility[c_idx, members[count:]] = False
+    return eligibility
+
+def equivalent_groups(unit: "SolveUnit") -> List[List[List[int]]]:
+    """
+    Clases de grupos intercambiables de la unidad: grupos con la misma lista de materias
+    (y horas). Cada grupo se representa con sus índices de clase en el mismo orden de
+    materias, así que intercambiar dos grupos intercambia clase por clase.
+    """
+    excluded = {unit.clase_grupo[c_idx] for c_idx in _hinted(unit, 0)}
+    clases_grupo: Dict[int, List[int]] = {}
+    for c_idx, g_idx in enumerate(unit.clase_grupo):
+        clases_grupo.setdefault(g_idx, []).append(c_idx)
+    
+    classes: Dict[tuple, List[List[int]]] = {}
+    for g_idx, clases in clases_grupo.items():
+        if g_idx in excluded:
+            continue
+        key = tuple((unit.clase_materia[c_idx], unit.clase_horas[c_idx]) for c_idx in clases)
+        classes.setdefault(key, []).append(clases)
+    return [members for members in classes.values() if len(members) > 1]
@@ -0,0 +1,199 @@
+import random
+from collections import Counter
+from dataclasses import replace
+from time import monotonic
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from app.models.models import DiaSemanaEnum
+from app.services.schedule_model import SolveUnit, UnitSolution
+
+# Orden global de los días: las unidades de distintas cuadrículas se comparan en minutos por día
+DIA_ORDEN = {dia: idx for idx, dia in enumerate(DiaSemanaEnum)}
+
+class Conflict(NamedTuple):
+    """Dos horas del mismo profesor que se traslapan (unidad y fila de asignación de cada una)"""
+    profesor_id: int
+    unit_a: int
+    row_a: int
+    unit_b: int
+    row_b: int
+
+def assignment_times(unit: SolveUnit, assignments: np.ndarray) -> np.ndarray:
+    """Filas (profesor_id, día, inicio, fin) en minutos de las asignaciones (clase, profesor, día, hora) de la unidad"""
+    grid = unit.grid
+    if not len(assignments):
+        return np.empty((0, 4), dtype=np.int64)
+    dias = np.array([DIA_ORDEN[dia] for dia in grid.dias_semana], dtype=np.int64)
+    starts = np.asarray(grid.slot_starts, dtype=np.int64)[assignments[:, 3]]
+    return np.column_stack([
+        np.asarray(unit.profesor_ids, dtype=np.int64)[assignments[:, 1]],
+        dias[assignments[:, 2]],
+        starts,
+        starts + grid.slot_minutes
+    ])
+
+def find_conflicts(units: Sequence[SolveUnit], assignments: Sequence[np.ndarray]) -> List[Conflict]:
+    """
+    Choques entre las asignaciones de todas las unidades (una versión): cada hora que se
+    traslapa con otra anterior del mismo profesor y día se reporta contra la que termina más tarde
+    """
+    tables = []
+    for u_idx, (unit, rows) in enumerate(zip(units, assignments)):
+        times = assignment_times(unit, rows)
+        tables.append(np.column_stack([times, np.full(len(times), u_idx), np.arange(len(times))]))
+    table = np.concatenate(tables) if tables else np.empty((0, 6), dtype=np.int64)
+    if not len(table):
+        return []
+    
+    table = table[np.lexsort((table[:, 2], table[:, 1], table[:, 0]))]
+    conflicts = []
+    latest = None
+    for profesor_id, dia, inicio, fin, u_idx, row in table.tolist():
+        if latest is not None and latest[0] == (profesor_id, dia) and inicio < latest[1]:
+            conflicts.append(Conflict(profesor_id, latest[2], latest[3], u_idx, row))
+        if latest is None or latest[0] != (profesor_id, dia) or fin > latest[1]:
+            latest = ((profesor_id, dia), fin, u_idx, row)
+    return conflicts
+
+class UniversityRepair:
+    """
+    Reparación por búsqueda de vecindario amplio (LNS) de los choques entre carreras.
+    
+    Cada unidad (carrera y cuadrícula) se resolvió por separado, así que un profesor
+    habilitado en varias carreras puede quedar en dos grupos a la misma hora. En cada
+    iteración se toma un choque, se elige uno de sus lados y se vuelven a resolver solo
+    algunos grupos de esa unidad (el del choque, los demás donde da clase ese profesor y,
+    tras cada fallo con el mismo profesor, uno más al azar) con el resto de la universidad
+    fijo: sus horas ocupan la disponibilidad de los profesores. El horario actual entra
+    como hints. Un vecindario resuelto ya no choca con nada, así que los choques solo
+    disminuyen. Trabaja sobre una versión y solo en memoria.
+    """
+    
+    def __init__(self, units: List[SolveUnit], assignments: List[np.ndarray], version: int,
+                 seed: Optional[int] = None):
+        self.units = units
+        self.assignments = [np.asarray(rows, dtype=np.int64).reshape(-1, 4) for rows in assignments]
+        self.version = version
+        self.rng = random.Random(seed)
+        self.iterations = 0
+        self.repaired = 0
+        # Resoluciones de los vecindarios (para la telemetría)
+        self.runs: List[Tuple[SolveUnit, UnitSolution]] = []
+    
+    def conflicts(self) -> List[Conflict]:
+        return find_conflicts(self.units, self.assignments)
+    
+    def repair(self, solve: Callable[[SolveUnit], List[UnitSolution]], deadline: float,
+               neighborhood_time: float, stop: Callable[[], bool] = lambda: False) -> List[Conflict]:
+        """
+        Repara choques hasta eliminarlos, llegar a deadline (time.monotonic) o que stop()
+        devuelva True; solve resuelve cada vecindario. Devuelve los choques restantes.
+        """
+        failures: Counter = Counter()
+        conflicts = self.conflicts()
+        while conflicts and not stop():
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            
+            conflict = self.rng.choice(conflicts)
+            u_idx, row = self.rng.choice([(conflict.unit_a, conflict.row_a), (conflict.unit_b, conflict.row_b)])
+            grupos = self._neighborhood(u_idx, row, 1 + failures[conflict.profesor_id])
+            unit, clases = self._subunit(u_idx, grupos, min(neighborhood_time, remaining))
+            
+            solutions = solve(unit)
+            self.iterations += 1
+            if solutions:
+                self.runs.append((unit, solutions[0]))
+            if solutions and solutions[0].feasible:
+                self._replace(u_idx, clases, solutions[0].assignments)
+                self.repaired += 1
+                failures.pop(conflict.profesor_id, None)
+            else:
+                failures[conflict.profesor_id] += 1
+            conflicts = self.conflicts()
+        return conflicts
+    
+    def _neighborhood(self, u_idx: int, row: int, size: int) -> List[int]:
+        """Grupos (índices de la unidad) a resolver de nuevo alrededor de una hora en choque"""
+        unit = self.units[u_idx]
+        rows = self.assignments[u_idx]
+        clase_grupo = np.asarray(unit.clase_grupo)
+        c_idx, p_idx = rows[row, 0], rows[row, 1]
+        
+        grupos = [int(clase_grupo[c_idx])]
+        # Los demás grupos de la unidad donde da clase el profesor en choque, luego el resto al azar
+        del_profesor = sorted(set(clase_grupo[rows[rows[:, 1] == p_idx, 0]].tolist()) - set(grupos))
+        resto = sorted(set(range(len(unit.grupo_ids))) - set(grupos) - set(del_profesor))
+        self.rng.shuffle(del_profesor)
+        self.rng.shuffle(resto)
+        return (grupos + del_profesor + resto)[:max(size, 1)]
+    
+    def _occupied(self, u_idx: int, clases: np.ndarray) -> np.ndarray:
+        """Horas profesor × día × bloque de la unidad ocupadas por todo lo que no se vuelve a resolver"""
+        unit = self.units[u_idx]
+        grid = unit.grid
+        occupied = np.zeros((unit.n_profesores, grid.n_dias, grid.n_horas), dtype=bool)
+        profesor_index = {profesor_id: idx for idx, profesor_id in enumerate(unit.profesor_ids)}
+        dia_index = {DIA_ORDEN[dia]: idx for idx, dia in enumerate(grid.dias_semana)}
+        starts = np.asarray(grid.slot_starts, dtype=np.int64)
+        
+        for other_idx, (other, rows) in enumerate(zip(self.units, self.assignments)):
+            if other_idx == u_idx:
+                rows = rows[~np.isin(rows[:, 0], clases)]
+            for profesor_id, dia, inicio, fin in assignment_times(other, rows).tolist():
+                p_idx = profesor_index.get(profesor_id)
+                d_idx = dia_index.get(dia)
+                if p_idx is None or d_idx is None:
+                    continue
+                occupied[p_idx, d_idx] |= (starts < fin) & (inicio < starts + grid.slot_minutes)
+        return occupied
+    
+    def _subunit(self, u_idx: int, grupos: List[int], time_limit: float):
+        """
+        Unidad con solo las clases de los grupos del vecindario, sobre la disponibilidad que
+        deja el resto de la universidad; devuelve también los índices de clase originales
+        """
+        unit = self.units[u_idx]
+        clase_grupo = np.asarray(unit.clase_grupo)
+        clases = np.flatnonzero(np.isin(clase_grupo, grupos))
+        clase_map = np.full(unit.n_clases, -1, dtype=np.int64)
+        clase_map[clases] = np.arange(len(clases))
+        grupo_map = {g_idx: idx for idx, g_idx in enumerate(grupos)}
+        
+        rows = self.assignments[u_idx]
+        en_vecindario = np.isin(rows[:, 0], clases)
+        hints = rows[en_vecindario].copy()
+        hints[:, 0] = clase_map[hints[:, 0]]
+        # Las horas de cada PTC fuera del vecindario quedan fijas: el vecindario cubre el resto de su rango
+        fuera = np.bincount(rows[~en_vecindario, 1], minlength=unit.n_profesores)
+        ptc_horas = [
+            (max(minimo - int(horas), 0), max(maximo - int(horas), 0))
+            for (minimo, maximo), horas in zip(map(unit.ptc_range, range(unit.n_profesores)), fuera)
+        ]
+        
+        subunit = replace(
+            unit,
+            versions=[self.version],
+            grupo_ids=[unit.grupo_ids[g_idx] for g_idx in grupos],
+            clase_grupo=[grupo_map[int(clase_grupo[c_idx])] for c_idx in clases],
+            clase_materia=[unit.clase_materia[c_idx] for c_idx in clases],
+            clase_horas=[unit.clase_horas[c_idx] for c_idx in clases],
+            ptc_horas=ptc_horas,
+            eligibility=unit.eligibility[clases],
+            availability=unit.availability & ~self._occupied(u_idx, clases),
+            params=unit.params.merged(max_time_in_seconds=time_limit),
+            hints=hints,
+            fixed=None,
+            references=None,
+            grupo_nombres=[unit.grupo_nombres[g_idx] for g_idx in grupos] if unit.grupo_nombres else [],
+            clase_nombres=[unit.clase_nombres[c_idx] for c_idx in clases] if unit.clase_nombres else []
+        )
+        return subunit, clases
+    
+    def _replace(self, u_idx: int, clases: np.ndarray, assignments: np.ndarray):
+        """Sustituye las asignaciones de las clases del vecindario por las de su nueva solución"""
+        rows = self.assignments[u_idx]
+        new_rows = np.asarray(assignments, dtype=np.int64).reshape(-1, 4).copy()
+        new_rows[:, 0] = clases[new_rows[:, 0]]
+        self.assignments[u_idx] = np.concatenate([rows[~np.isin(rows[:, 0], clases)], new_rows])
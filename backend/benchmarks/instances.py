@@ -0,0 +1,100 @@
+import random
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models import Base, Carrera, Profesor, Materia, Grupo
+from app.models.models import DiaSemanaEnum, TipoProfesorEnum
+from app.services.schedule_grid import DEFAULT_HORAS_INICIO
+
+@dataclass(frozen=True)
+class InstanceSpec:
+    """Parámetros de una instancia sintética (por carrera)"""
+    carreras: int = 1
+    cuatrimestres: int = 2
+    grupos_por_cuatrimestre: int = 1
+    materias_por_cuatrimestre: int = 5
+    profesores: int = 10
+    # Fracción de las horas de cada día en que un profesor está disponible (en los días que trabaja)
+    densidad_disponibilidad: float = 0.6
+    dias_por_profesor: int = 5
+    ptc_ratio: float = 0.0
+    # Disponibilidades distintas que se reparten entre los profesores (0: una por profesor)
+    perfiles_disponibilidad: int = 0
+    # Profesores habilitados en profesores_materias por materia (0: cualquiera puede impartirla)
+    profesores_por_materia: int = 4
+    horas_por_materia: Tuple[int, ...] = (3, 4, 5)
+    seed: int = 1
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Parámetros serializables a JSON (listas en lugar de tuplas, para comparar con resultados guardados)"""
+        return {**asdict(self), "horas_por_materia": list(self.horas_por_materia)}
+
+def create_session() -> Session:
+    """Sesión sobre una base de datos SQLite en memoria con el esquema de la aplicación"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine, autoflush=False)()
+
+def _random_disponibilidad(rng: random.Random, dias: List[str], dias_por_profesor: int,
+                           horas_disponibles: int) -> Dict[str, List[str]]:
+    """Un rango continuo por día trabajado, en una posición aleatoria del día"""
+    n_horas = len(DEFAULT_HORAS_INICIO)
+    disponibilidad = {}
+    for dia in rng.sample(dias, min(dias_por_profesor, len(dias))):
+        inicio = DEFAULT_HORAS_INICIO[rng.randrange(n_horas - horas_disponibles + 1)]
+        disponibilidad[dia] = [f"{inicio:02d}:00-{inicio + horas_disponibles:02d}:00"]
+    return disponibilidad
+
+def create_instance(spec: InstanceSpec) -> Tuple[Session, List[int]]:
+    """Crea la instancia en una base de datos en memoria; devuelve la sesión y los ids de las carreras"""
+    rng = random.Random(spec.seed)
+    db = create_session()
+    dias = [dia.value for dia in DiaSemanaEnum]
+    n_horas = len(DEFAULT_HORAS_INICIO)
+    horas_disponibles = max(1, round(spec.densidad_disponibilidad * n_horas))
+    
+    carrera_ids = []
+    for c_idx in range(spec.carreras):
+        carrera = Carrera(nombre=f"Carrera {c_idx + 1}")
+        db.add(carrera)
+        db.flush()
+        carrera_ids.append(carrera.id)
+        
+        perfiles = [
+            _random_disponibilidad(rng, dias, spec.dias_por_profesor, horas_disponibles)
+            for _ in range(spec.perfiles_disponibilidad)
+        ]
+        profesores = []
+        for p_idx in range(spec.profesores):
+            if perfiles:
+                disponibilidad = dict(perfiles[p_idx % len(perfiles)])
+            else:
+                disponibilidad = _random_disponibilidad(rng, dias, spec.dias_por_profesor, horas_disponibles)
+            profesor = Profesor(
+                numero_empleado=f"{c_idx + 1}-{p_idx + 1}",
+                nombre_completo=f"Profesor {c_idx + 1}-{p_idx + 1}",
+                id_carrera=carrera.id,
+                tipo_profesor=TipoProfesorEnum.PTC if rng.random() < spec.ptc_ratio else TipoProfesorEnum.PA,
+                disponibilidad=disponibilidad
+            )
+            db.add(profesor)
+            profesores.append(profesor)
+        
+        for cuatrimestre in range(1, spec.cuatrimestres + 1):
+            for m_idx in range(spec.materias_por_cuatrimestre):
+                materia = Materia(
+                    nombre_materia=f"Materia {cuatrimestre}-{m_idx + 1}",
+                    id_carrera=carrera.id,
+                    cuatrimestre=cuatrimestre,
+                    horas_semanales=rng.choice(spec.horas_por_materia)
+                )
+                if spec.profesores_por_materia:
+                    materia.profesores = rng.sample(profesores, min(spec.profesores_por_materia, len(profesores)))
+                db.add(materia)
+            for g_idx in range(spec.grupos_por_cuatrimestre):
+                db.add(Grupo(id_carrera=carrera.id, cuatrimestre=cuatrimestre, nombre_grupo=f"{cuatrimestre}{chr(65 + g_idx)}"))
+    
+    db.commit()
+    return db, carrera_ids
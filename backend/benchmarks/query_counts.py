@@ -0,0 +1,147 @@
+"""
+Consultas SQL por endpoint de lectura, para detectar consultas N+1.
+
+Uso (desde backend/):
+    python -m benchmarks.query_counts
+
+Crea una instancia sintética en SQLite en memoria, genera sus horarios y llama a cada
+endpoint como un jefe de carrera autenticado (TestClient de FastAPI, una sesión nueva
+por petición), contando las sentencias que llegan a la base de datos. Los presupuestos no
+dependen del tamaño de la respuesta: una relación que se carga de forma perezosa por
+cada fila los rebasa en cuanto la respuesta tiene varias filas distintas. El comando
+termina con código 1 si algún endpoint pasa de su presupuesto o no responde 200.
+"""
+import os
+
+# La aplicación crea su motor de base de datos al importarse: se usa SQLite en memoria
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import sys
+from typing import Callable, Dict, List, Tuple
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from app.core import get_db
+from app.core.security import create_access_token
+from app.main import app
+from app.models import Grupo, Profesor, RolEnum, Usuario
+from app.services.schedule_optimizer import ScheduleOptimizer
+from app.services.solver_parameters import SolverParameters
+from benchmarks.instances import InstanceSpec, create_instance
+
+SPEC = InstanceSpec(cuatrimestres=2, grupos_por_cuatrimestre=2, materias_por_cuatrimestre=5, profesores=12)
+
+# Método, ruta y cuerpo (a partir de la sesión y la carrera) y presupuesto de sentencias
+Endpoint = Tuple[str, Callable[[Session, int], str], Callable[[Session, int], dict], int]
+
+def _grupo(db: Session, id_carrera: int) -> Grupo:
+    return db.query(Grupo).filter(Grupo.id_carrera == id_carrera).order_by(Grupo.id).first()
+
+def _profesor(db: Session, id_carrera: int) -> Profesor:
+    return db.query(Profesor).filter(Profesor.id_carrera == id_carrera).order_by(Profesor.id).first()
+
+# La autenticación (búsqueda del usuario) cuenta una sentencia en todos
+ENDPOINTS: Dict[str, Endpoint] = {
+    "GET /schedule/profesores/{carrera_id}": (
+        "GET", lambda db, c: f"/schedule/profesores/{c}", lambda db, c: None, 2
+    ),
+    "GET /schedule/profesor/{profesor_id}/materias": (
+        "GET", lambda db, c: f"/schedule/profesor/{_profesor(db, c).id}/materias", lambda db, c: None, 3
+    ),
+    "PUT /schedule/profesor/{profesor_id}/materias": (
+        "PUT", lambda db, c: f"/schedule/profesor/{_profesor(db, c).id}/materias",
+        lambda db, c: {"materias": [materia.id for materia in _profesor(db, c).carrera.materias]}, 11
+    ),
+    "PUT /schedule/profesor/{profesor_id}/availability": (
+        "PUT", lambda db, c: f"/schedule/profesor/{_profesor(db, c).id}/availability",
+        lambda db, c: {"disponibilidad": {"LUNES": ["07:00-15:00"]}}, 9
+    ),
+    "GET /schedule/grupo/{grupo_id}/horario": (
+        "GET", lambda db, c: f"/schedule/grupo/{_grupo(db, c).id}/horario", lambda db, c: None, 3
+    ),
+    "GET /schedule/pendientes/{carrera_id}": (
+        "GET", lambda db, c: f"/schedule/pendientes/{c}", lambda db, c: None, 2
+    ),
+    "GET /schedule/cuadriculas/{carrera_id}": (
+        "GET", lambda db, c: f"/schedule/cuadriculas/{c}", lambda db, c: None, 2
+    ),
+    "GET /register/profile": (
+        "GET", lambda db, c: "/register/profile", lambda db, c: None, 2
+    ),
+}
+
+def setup_instance() -> Tuple[Session, int, str]:
+    """Instancia con horarios generados y un jefe de carrera; devuelve sesión, carrera y token"""
+    db, carrera_ids = create_instance(SPEC)
+    id_carrera = carrera_ids[0]
+    result = ScheduleOptimizer(db).generate_schedule_for_career(
+        id_carrera, solver_params=SolverParameters.from_settings(max_time_in_seconds=10, random_seed=1),
+        num_versions=1
+    )
+    if not result["success"]:
+        raise RuntimeError(f"No se generaron los horarios de la instancia: {result['message']}")
+    
+    db.add(Usuario(
+        email="jefe@example.com", nombre_completo="Jefe de carrera", rol=RolEnum.JEFE_CARRERA,
+        # Las peticiones se autentican con el token: la contraseña no se verifica
+        id_carrera=id_carrera, password="-"
+    ))
+    db.commit()
+    return db, id_carrera, create_access_token({"sub": "jefe@example.com"})
+
+def count_queries(selected: List[str]) -> List[Tuple[str, int, List[str], int]]:
+    """(endpoint, código HTTP, sentencias ejecutadas, presupuesto) de cada endpoint"""
+    db, id_carrera, token = setup_instance()
+    engine = db.get_bind()
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    
+    def override_get_db():
+        # Sesión nueva por petición: el mapa de identidades de otra petición ocultaría las cargas perezosas
+        request_db = session_factory()
+        try:
+            yield request_db
+        finally:
+            request_db.close()
+    
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+    
+    results = []
+    try:
+        for name in selected:
+            method, path, body, budget = ENDPOINTS[name]
+            lookup = session_factory()
+            try:
+                url, payload = path(lookup, id_carrera), body(lookup, id_carrera)
+            finally:
+                lookup.close()
+            
+            statements.clear()
+            response = client.request(method, url, json=payload, headers=headers)
+            results.append((name, response.status_code, list(statements), budget))
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Consultas SQL por endpoint de lectura (detecta consultas N+1)")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--verbose", action="store_true", help="mostrar las sentencias de los endpoints que fallan")
+    args = parser.parse_args(argv)
+    
+    failed = False
+    for name, status_code, statements, budget in count_queries(args.endpoints):
+        ok = status_code == 200 and len(statements) <= budget
+        failed = failed or not ok
+        print(f"{'ok ' if ok else 'FALLA'} {name}: HTTP {status_code}, {len(statements)} consultas (presupuesto {budget})")
+        if args.verbose and not ok:
+            for statement in statements:
+                print(f"    {' '.join(statement.split())[:160]}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
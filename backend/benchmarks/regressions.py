@@ -0,0 +1,144 @@
+"""
+Casos de regresión del optimizador sobre instancias sintéticas pequeñas.
+
+Uso (desde backend/):
+    python -m benchmarks.regressions
+
+Cada caso arma su instancia en SQLite en memoria, genera los horarios y revisa el
+resultado; el comando termina con código 1 si alguno falla.
+"""
+import os
+
+# La aplicación crea su motor de base de datos al importarse: se usa SQLite en memoria
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import sys
+from collections import Counter
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional
+from app.models import Grupo, HorarioGenerado, HorarioPendiente, Materia, Profesor
+from app.models.models import DiaSemanaEnum, TipoProfesorEnum
+from app.services.schedule_optimizer import ScheduleOptimizer
+from app.services.solver_parameters import SolverParameters
+from benchmarks.instances import InstanceSpec, create_instance
+
+def ptc_sin_materias_en_el_grupo() -> Optional[str]:
+    """
+    Un PTC habilitado solo en las materias del primer cuatrimestre: en modo por grupo, los
+    grupos de los demás cuatrimestres no le dejan variables y no deben exigirle 20 horas
+    """
+    db, carrera_ids = create_instance(InstanceSpec(
+        cuatrimestres=3, materias_por_cuatrimestre=5, profesores=12, profesores_por_materia=4, horas_por_materia=(4,)
+    ))
+    ptc = db.query(Profesor).order_by(Profesor.id).first()
+    ptc.tipo_profesor = TipoProfesorEnum.PTC
+    ptc.disponibilidad = {dia.value: ["07:00-21:00"] for dia in DiaSemanaEnum}
+    ptc.materias = db.query(Materia).filter(Materia.id_carrera == carrera_ids[0], Materia.cuatrimestre == 1).all()
+    db.commit()
+    
+    result = ScheduleOptimizer(db).generate_schedule_for_career(
+        carrera_ids[0], solver_params=SolverParameters.from_settings(max_time_in_seconds=10, random_seed=1),
+        num_versions=2
+    )
+    # Un id de grupo por horario generado: 3 grupos × 2 versiones
+    if len(result.get("generated_schedules", [])) != 6 or result.get("diagnostics"):
+        restricciones = sorted({entry["restriccion"] for entry in result.get("diagnostics", [])})
+        return f"{result['message']} (restricciones: {', '.join(restricciones) or 'ninguna'})"
+    return None
+
+def ptc_en_reparacion_universitaria() -> Optional[str]:
+    """
+    Tres profesores de la primera carrera habilitados en todas las materias de la segunda:
+    la reparación de choques entre carreras resuelve de nuevo vecindarios de grupos y cada
+    PTC debe seguir con 20 a 40 horas en los grupos de su carrera
+    """
+    for seed in (3, 4):
+        db, carrera_ids = create_instance(InstanceSpec(
+            carreras=2, cuatrimestres=3, grupos_por_cuatrimestre=2, profesores=6, profesores_por_materia=4,
+            ptc_ratio=0.5, horas_por_materia=(4,), seed=seed
+        ))
+        invitados = db.query(Profesor).filter(Profesor.id_carrera == carrera_ids[0]).order_by(Profesor.id).limit(3).all()
+        for materia in db.query(Materia).filter(Materia.id_carrera == carrera_ids[1]):
+            materia.profesores.extend(profesor for profesor in invitados if profesor not in materia.profesores)
+        db.commit()
+        
+        result = ScheduleOptimizer(db).generate_schedule_for_university(
+            time_budget=60, solver_params=SolverParameters.from_settings(random_seed=seed)
+        )
+        if not result["success"] or result.get("diagnostics") or result.get("professor_conflicts"):
+            return f"semilla {seed}: {result['message']}"
+        if not result.get("lns_iterations"):
+            return f"semilla {seed}: sin choques que reparar, la instancia ya no prueba la reparación"
+        
+        horas: Counter = Counter()
+        rows = db.query(HorarioGenerado, Profesor).join(Profesor).join(Grupo).filter(
+            Profesor.tipo_profesor == TipoProfesorEnum.PTC, Grupo.id_carrera == Profesor.id_carrera
+        )
+        for horario, profesor in rows:
+            duracion = datetime.combine(date.min, horario.hora_fin) - datetime.combine(date.min, horario.hora_inicio)
+            horas[(horario.version_horario, profesor.nombre_completo)] += duracion.seconds // 3600
+        fuera_de_rango = [f"{nombre} v{version}: {total} h" for (version, nombre), total in sorted(horas.items())
+                          if not 20 <= total <= 40]
+        if fuera_de_rango:
+            return f"semilla {seed}: PTC fuera de 20-40 horas ({'; '.join(fuera_de_rango)})"
+    return None
+
+def version_pendiente_distinta() -> Optional[str]:
+    """
+    Solo la versión 2 de cada grupo queda pendiente: al resolverla sola (misma semilla, un
+    hilo) debe seguir a min_hamming_distance celdas de la versión 1 guardada, que se conserva
+    """
+    for engine in ("boolean", "interval"):
+        db, carrera_ids = create_instance(InstanceSpec(cuatrimestres=2, materias_por_cuatrimestre=4, profesores=8))
+        params = SolverParameters.from_settings(max_time_in_seconds=10, random_seed=1, num_search_workers=1)
+        optimizer = ScheduleOptimizer(db)
+        result = optimizer.generate_schedule_for_career(
+            carrera_ids[0], solver_params=params, num_versions=2, min_hamming_distance=4, engine=engine
+        )
+        if not result["success"]:
+            return f"{engine}: {result['message']}"
+        
+        grupos = [grupo_id for grupo_id, in db.query(Grupo.id).filter(Grupo.id_carrera == carrera_ids[0])]
+        db.add_all(HorarioPendiente(id_grupo=grupo_id, version_horario=2) for grupo_id in grupos)
+        db.commit()
+        result = optimizer.generate_schedule_for_career(
+            carrera_ids[0], solver_params=params, only_dirty=True, num_versions=2, min_hamming_distance=4, engine=engine
+        )
+        if not result["success"]:
+            return f"{engine}, solo pendientes: {result['message']}"
+        
+        for grupo_id in grupos:
+            celdas = {
+                version: set(db.query(
+                    HorarioGenerado.id_materia, HorarioGenerado.id_profesor, HorarioGenerado.dia_semana,
+                    HorarioGenerado.hora_inicio
+                ).filter(HorarioGenerado.id_grupo == grupo_id, HorarioGenerado.version_horario == version).all())
+                for version in (1, 2)
+            }
+            distancia = len(celdas[1] ^ celdas[2])
+            if distancia < 4:
+                return f"{engine}: el grupo {grupo_id} tiene versiones a {distancia} celdas (mínimo 4)"
+    return None
+
+# Cada caso devuelve None si pasa o la descripción del fallo
+CASES: Dict[str, Callable[[], Optional[str]]] = {
+    "ptc_sin_materias_en_el_grupo": ptc_sin_materias_en_el_grupo,
+    "ptc_en_reparacion_universitaria": ptc_en_reparacion_universitaria,
+    "version_pendiente_distinta": version_pendiente_distinta,
+}
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Casos de regresión del optimizador")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES))
+    args = parser.parse_args(argv)
+    
+    failed = False
+    for name in args.cases:
+        error = CASES[name]()
+        failed = failed or error is not None
+        print(f"{'ok ' if error is None else 'FALLA'} {name}" + (f": {error}" if error else ""))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
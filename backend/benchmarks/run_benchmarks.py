@@ -0,0 +1,227 @@
+"""
+Benchmarks del optimizador sobre instancias sintéticas en SQLite en memoria.
+
+Uso (desde backend/):
+    python -m benchmarks.run_benchmarks --scales small medium --output resultados.json
+    python -m benchmarks.run_benchmarks --baseline resultados.json --output nuevos.json
+
+Cada escala corre en un proceso nuevo para que la memoria máxima sea la suya. Con
+--baseline se comparan las métricas contra una ejecución anterior y el comando
+termina con código 1 si alguna empeora más que su umbral.
+"""
+import os
+
+# La aplicación crea su motor de base de datos al importarse: se usa SQLite en memoria
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+import ortools
+from sqlalchemy.orm import Session
+from app.models import Grupo, HorarioGenerado, Materia, Profesor, SolverRun
+from app.services.availability import compile_availability
+from app.services.schedule_grid import ScheduleGrid
+from app.services.schedule_model import peak_rss_kb
+from app.services.schedule_optimizer import ScheduleOptimizer
+from app.services.solver_parameters import SolverParameters
+from benchmarks.instances import InstanceSpec, create_instance
+
+SCALES: Dict[str, InstanceSpec] = {
+    "small": InstanceSpec(cuatrimestres=2, grupos_por_cuatrimestre=1, materias_por_cuatrimestre=5, profesores=12),
+    "medium": InstanceSpec(cuatrimestres=5, grupos_por_cuatrimestre=2, materias_por_cuatrimestre=7, profesores=40),
+    "large": InstanceSpec(carreras=2, cuatrimestres=10, grupos_por_cuatrimestre=3, materias_por_cuatrimestre=7,
+                          profesores=80, profesores_por_materia=6),
+    # Muchos profesores y grupos intercambiables: todos imparten todo y comparten 4 disponibilidades
+    "symmetric": InstanceSpec(cuatrimestres=3, grupos_por_cuatrimestre=3, materias_por_cuatrimestre=6,
+                              profesores=24, profesores_por_materia=0, perfiles_disponibilidad=4),
+}
+
+# Umbrales de regresión: aumento relativo permitido y aumento absoluto mínimo para reportarlo
+# (evita marcar como regresión el ruido de mediciones muy pequeñas)
+THRESHOLDS: Dict[str, Dict[str, float]] = {
+    "build_time": {"relative": 0.25, "absolute": 0.05},
+    "solve_time": {"relative": 0.25, "absolute": 0.1},
+    "wall_time": {"relative": 0.25, "absolute": 0.2},
+    "peak_rss_mb": {"relative": 0.25, "absolute": 20},
+    "variables": {"relative": 0.05, "absolute": 0},
+    "gaps": {"relative": 0.10, "absolute": 0},
+    # Métricas de calidad que no deben empeorar en absoluto
+    "missing_schedules": {"relative": 0.0, "absolute": 0},
+    "professor_clashes": {"relative": 0.0, "absolute": 0},
+    "availability_violations": {"relative": 0.0, "absolute": 0},
+    "unmet_hours": {"relative": 0.0, "absolute": 0},
+}
+
+def solution_quality(db: Session, grid: ScheduleGrid, num_versions: int) -> Dict[str, int]:
+    """Calidad de los horarios guardados: faltantes, choques, disponibilidad, horas y huecos"""
+    grupos = db.query(Grupo).all()
+    rows = db.query(HorarioGenerado).all()
+    masks = {profesor.id: compile_availability(profesor.disponibilidad, grid) for profesor in db.query(Profesor).all()}
+    materias = db.query(Materia).all()
+    materias_por_cuatrimestre = defaultdict(list)
+    for materia in materias:
+        materias_por_cuatrimestre[materia.id_carrera, materia.cuatrimestre].append(materia)
+    
+    schedules = {(row.id_grupo, row.version_horario) for row in rows}
+    by_profesor = Counter((row.id_profesor, row.dia_semana, row.hora_inicio, row.version_horario) for row in rows)
+    by_day = defaultdict(set)
+    horas_clase = Counter((row.id_grupo, row.id_materia, row.version_horario) for row in rows)
+    violations = 0
+    for row in rows:
+        dia_idx = grid.dia_index[row.dia_semana]
+        h_idx = grid.slot_index[row.hora_inicio]
+        if not masks[row.id_profesor][dia_idx] >> h_idx & 1:
+            violations += 1
+        by_day[row.id_grupo, row.version_horario, dia_idx].add(h_idx)
+    
+    # Horas que faltan en las materias de los horarios que sí se generaron
+    unmet = 0
+    for grupo in grupos:
+        for version in range(1, num_versions + 1):
+            if (grupo.id, version) in schedules:
+                unmet += sum(
+                    max(0, materia.horas_semanales - horas_clase[grupo.id, materia.id, version])
+                    for materia in materias_por_cuatrimestre[grupo.id_carrera, grupo.cuatrimestre]
+                )
+    
+    return {
+        "schedules": len(schedules),
+        "missing_schedules": len(grupos) * num_versions - len(schedules),
+        "professor_clashes": sum(count - 1 for count in by_profesor.values() if count > 1),
+        "availability_violations": violations,
+        "unmet_hours": unmet,
+        # Horas libres entre la primera y la última clase de cada grupo, día y versión
+        "gaps": sum(max(horas) - min(horas) + 1 - len(horas) for horas in by_day.values()),
+    }
+
+def run_scale(name: str, spec: InstanceSpec, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Genera la instancia de una escala, ejecuta el optimizador y mide tiempos, memoria y calidad"""
+    start = perf_counter()
+    db, carrera_ids = create_instance(spec)
+    instance_time = perf_counter() - start
+    
+    optimizer = ScheduleOptimizer(db)
+    solver_params = SolverParameters.from_settings(
+        max_time_in_seconds=options["max_time"],
+        num_search_workers=options["workers"],
+        random_seed=options["seed"]
+    )
+    start = perf_counter()
+    results = [
+        optimizer.generate_schedule_for_career(
+            carrera_id, joint=options["modo"] == "conjunto", solver_params=solver_params,
+            num_versions=options["versions"], engine=options["engine"],
+            symmetry_breaking=options["symmetry_breaking"]
+        )
+        for carrera_id in carrera_ids
+    ]
+    wall_time = perf_counter() - start
+    
+    runs = db.query(SolverRun).all()
+    metrics = {
+        "instance_time": instance_time,
+        "wall_time": wall_time,
+        "build_time": sum(run.build_time for run in runs),
+        "solve_time": sum(run.solve_time for run in runs),
+        "solves": len(runs),
+        "variables": sum(run.variables for run in runs if run.build_time > 0),
+        "constraints": sum(run.constraints for run in runs if run.build_time > 0),
+        "conflicts": sum(run.conflicts for run in runs),
+        "branches": sum(run.branches for run in runs),
+        "statuses": dict(Counter(run.status for run in runs)),
+        "peak_rss_mb": (peak_rss_kb() or 0) / 1024,
+        "errors": [result["message"] for result in results if not result["success"]],
+        **solution_quality(db, optimizer.grid, options["versions"]),
+    }
+    db.close()
+    return {"spec": spec.as_dict(), "metrics": metrics}
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Regresiones de current respecto a baseline según THRESHOLDS (solo escalas en ambos)"""
+    regressions = []
+    for name, result in current["scales"].items():
+        previous = baseline.get("scales", {}).get(name)
+        if previous is None:
+            continue
+        # Los parámetros agregados después de guardar la línea base toman su valor por defecto
+        if {**InstanceSpec().as_dict(), **previous["spec"]} != result["spec"]:
+            regressions.append(f"{name}: la instancia cambió respecto a la línea base; no se compara")
+            continue
+        for metric, threshold in THRESHOLDS.items():
+            before = previous["metrics"].get(metric)
+            after = result["metrics"].get(metric)
+            if before is None or after is None:
+                continue
+            if after - before > max(threshold["absolute"], threshold["relative"] * before):
+                regressions.append(f"{name}: {metric} {before:.3f} -> {after:.3f}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del optimizador de horarios")
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--modo", choices=["grupo", "conjunto"], default="grupo")
+    parser.add_argument("--engine", choices=["boolean", "interval"], default="boolean")
+    parser.add_argument("--versions", type=int, default=2)
+    parser.add_argument("--no-symmetry-breaking", dest="symmetry_breaking", action="store_false",
+                        help="Sin restricciones de orden entre profesores y grupos intercambiables")
+    parser.add_argument("--max-time", type=float, default=30.0, help="Límite por resolución (segundos)")
+    parser.add_argument("--workers", type=int, default=None, help="num_search_workers de CP-SAT")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla de la instancia y de CP-SAT")
+    parser.add_argument("--output", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--baseline", help="Resultados JSON anteriores contra los cuales comparar")
+    args = parser.parse_args(argv)
+    
+    options = {
+        "modo": args.modo, "engine": args.engine, "versions": args.versions,
+        "max_time": args.max_time, "workers": args.workers, "seed": args.seed,
+        "symmetry_breaking": args.symmetry_breaking
+    }
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "ortools": ortools.__version__,
+        "cpu_count": os.cpu_count(),
+        "options": options,
+        "scales": {}
+    }
+    
+    for name in args.scales:
+        spec = SCALES[name] if args.seed is None else replace(SCALES[name], seed=args.seed)
+        # Un proceso nuevo por escala: la memoria máxima medida es solo la de esa escala
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = pool.submit(run_scale, name, spec, options).result()
+        report["scales"][name] = result
+        metrics = result["metrics"]
+        print(
+            f"{name}: build {metrics['build_time']:.2f}s, solve {metrics['solve_time']:.2f}s, "
+            f"total {metrics['wall_time']:.2f}s, {metrics['variables']} variables, "
+            f"RSS {metrics['peak_rss_mb']:.0f} MB, horarios {metrics['schedules']} "
+            f"(faltan {metrics['missing_schedules']}), choques {metrics['professor_clashes']}, "
+            f"huecos {metrics['gaps']}"
+        )
+    
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            regressions = compare(report, json.load(baseline_file))
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}")
+        if regressions:
+            return 1
+        print("Sin regresiones respecto a la línea base")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())